@@ -1,88 +1,321 @@
-import PyPDF2
 import os
-import re
+import time
+import uuid
+import importlib.util
 import streamlit as st
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill
-from openpyxl.styles.colors import Color
-from io import BytesIO
-import pandas as pd
+from functools import partial
+from io import BytesIO, StringIO
+
+from verificador import (
+    DIRETORIO_CACHE_PADRAO,
+    DIRETORIO_REGRAS_PADRAO,
+    EXTRATOR_PADRAO,
+    EXTRATORES,
+    MEMORIA_LIMITE_PADRAO,
+    MEMORIA_MAXIMA_PADRAO,
+    ORDEM_PRIMEIRA_PRIMEIRO,
+    ORDEM_TODAS,
+    ORDEM_ULTIMA_PRIMEIRO,
+    REGIAO_AUTOMATICA,
+    REGRAS_PADRAO,
+    REGIOES_CARIMBO,
+    ROTULOS_EXTRATORES,
+    TAMANHO_MAXIMO_CACHE_PADRAO,
+    TAREFA_CANCELADA,
+    TAREFA_FALHOU,
+    TAREFA_NA_FILA,
+    TAREFAS_ATIVAS,
+    TEMPO_LIMITE_PADRAO,
+    ArmazemTextos,
+    CacheResultados,
+    FilaTarefas,
+    arquivo_interrompido,
+    carregar_regras,
+    gerar_csv,
+    gerar_excel,
+    gerar_parquet,
+    listar_regras,
+    montar_tabela,
+    montar_matriz,
+    montar_tabela_diagnostico,
+    numero_processos_padrao,
+    resumir_matriz,
+    resumo_perfil,
+)
 
 # Configuração da página Streamlit
 st.set_page_config(page_title="Analisador de Carimbos PDF", page_icon="📄", layout="wide")
 
-# Título da aplicação
-st.title("📄 Analisador de Carimbos em PDFs")
-st.markdown("Esta ferramenta verifica a presença de palavras-chave em arquivos PDF e gera um relatório.")
 
-# Dados FIXOS dos engenheiros e CREAs (sempre serão pesquisados)
-ENGENHEIROS_CREAS_FIXOS = {
-    "RODRIGO DAMASCENO NASCIMENTO": ["0920192912", "092019291-2"],
-    "JÂNIO RIBEIRO LOPES": ["0912111810", "091211181-0"],
-    "FLAVIO SORDI": ["2201136580"],
-    "RITHELLY LOBATO": ["A278773-3", "A2787733"],
-    "SALOMÃO": ["0401863549", "040186354-9"]
-}
+# Fila de análises em segundo plano, única para todas as sessões do servidor
+# e para cada diretório de cache (a chave é o caminho real do diretório)
+@st.cache_resource
+def obter_fila(diretorio):
+    return FilaTarefas(diretorio)
+
+
+# Regras de um projeto, compiladas uma vez e compartilhadas por todas as
+# sessões; a data de modificação entra na chave, então o arquivo só é lido de
+# novo quando muda
+@st.cache_resource
+def obter_regras(caminho, modificado):
+    return carregar_regras(caminho)
+
+
+# Tabelas do tutorial (engenheiros e projetos) em Markdown, montadas uma vez
+# por conjunto de regras (pela impressão); com st.table o pandas seria
+# importado já na partida do app, só para elas
+@st.cache_data
+def tabelas_tutorial(impressao, _regras):
+    engenheiros = "| Engenheiro | CREA(s) |\n|---|---|\n" + "\n".join(
+        f"| {engenheiro} | {', '.join(creas)} |" for engenheiro, creas in _regras.engenheiros.items())
+    projetos = "| Código | Descrição |\n|---|---|\n" + "\n".join(
+        f"| {codigo} | {descricao} |" for codigo, descricao in _regras.projetos.items())
+    return engenheiros, projetos
+
+
+# Dados de uma análise terminada, calculados uma única vez e guardados na
+# sessão: tabela, estatísticas e diagnóstico. Edições na barra lateral
+# executam o script de novo, mas os resultados só são desenhados outra vez.
+def dados_resultados(fila, tarefa):
+    dados = st.session_state.get("dados_resultados")
+    if dados is not None and dados['tarefa'] == tarefa['id']:
+        return dados
+    
+    registros = fila.resultados(tarefa['id'])
+    
+    # Dicionário com os dados de cada PDF, na ordem original de upload
+    resultados = {caminho: resultado for _, caminho, resultado, _, _ in registros if resultado is not None}
+    
+    # Estatísticas da matriz de presença (arquivos x palavras-chave), que a
+    # fila preenche durante a análise; as de análises guardadas antes disso
+    # são calculadas aqui, com as regras usadas na análise para contar os
+    # engenheiros certos
+    avisos = []
+    resumo = (tarefa['estatisticas'] or {}).get('resumo')
+    if resumo is None:
+        regras_tarefa = REGRAS_PADRAO
+        if tarefa['parametros'].get('arquivo_regras'):
+            try:
+                regras_tarefa = carregar_regras(tarefa['parametros']['arquivo_regras'])
+            except (OSError, ValueError) as e:
+                avisos.append(f"Regras da análise indisponíveis ({e}); engenheiros contados com as regras padrão.")
+        resumo = resumir_matriz(montar_matriz(resultados, tarefa['palavras'], regras_tarefa))
+    
+    arquivo_perfil = os.path.join(tarefa['pasta'], "analise.prof")
+    dados = {
+        'tarefa': tarefa['id'],
+        'erros': [(caminho, erro) for _, caminho, _, erro, _ in registros if erro],
+        'analisados': len(registros),
+        'interrompidos': [nome for nome, resultado in resultados.items() if arquivo_interrompido(resultado)],
+        'tabela': montar_tabela(resultados),
+        'resumo': resumo,
+        'diagnostico': montar_tabela_diagnostico(
+            {indice: diagnostico for indice, _, _, _, diagnostico in registros if diagnostico},
+            {indice: caminho for indice, caminho, _, _, _ in registros}),
+        'avisos': avisos,
+        'perfil': arquivo_perfil if tarefa['parametros']['perfil'] and os.path.exists(arquivo_perfil) else None,
+        'exportacoes': {},
+        'tempos_exportacao': {},
+    }
+    if dados['perfil']:
+        dados['resumo_perfil'] = resumo_perfil(arquivo_perfil)
+    st.session_state.dados_resultados = dados
+    return dados
+
+
+# Gera um arquivo de resultados para download (xlsx, csv ou parquet). Chamada
+# só no clique do botão, então o openpyxl e o pyarrow só são importados
+# quando alguém exporta; o arquivo gerado fica guardado para os próximos cliques.
+def exportar(dados, formato):
+    if formato not in dados['exportacoes']:
+        inicio = time.perf_counter()
+        if formato == "csv":
+            buffer = StringIO()
+            gerar_csv(dados['tabela'], buffer)
+            conteudo = buffer.getvalue().encode("utf-8-sig")
+        else:
+            buffer = BytesIO()
+            if formato == "xlsx":
+                gerar_excel(dados['tabela'], buffer, dados['diagnostico'])
+            else:
+                gerar_parquet(dados['tabela'], buffer)
+            conteudo = buffer.getvalue()
+        dados['tempos_exportacao'][formato] = time.perf_counter() - inicio
+        dados['exportacoes'][formato] = conteudo
+    return dados['exportacoes'][formato]
+
+
+# Conteúdo de um arquivo, para download
+def ler_arquivo(caminho):
+    with open(caminho, "rb") as arquivo:
+        return arquivo.read()
+
+
+# Resultados de uma análise terminada, desenhados a partir dos dados guardados
+# na sessão. Em um fragmento, e os downloads não executam o script de novo.
+@st.fragment
+def mostrar_resultados(dados, tarefa):
+    for caminho, erro in dados['erros']:
+        st.error(f"Erro ao processar {caminho}: {erro}")
+    if tarefa['situacao'] == TAREFA_CANCELADA:
+        st.warning(f"Análise cancelada: {dados['analisados']} de {tarefa['total']} arquivo(s) analisado(s).")
+    for aviso in dados['avisos']:
+        st.warning(aviso)
+    
+    # Exibir resultados
+    st.subheader("Resultados da Análise")
+    st.dataframe(dados['tabela'])
+    
+    interrompidos = dados['interrompidos']
+    if interrompidos:
+        st.warning(f"{len(interrompidos)} arquivo(s) interrompido(s) por tempo, memória ou falha do processo: "
+                   + ", ".join(interrompidos))
+    
+    resumo = dados['resumo']
+    st.subheader("Estatísticas")
+    col1, col2, col3, col4, col5 = st.columns(5)
+    with col1:
+        st.metric("Total de Arquivos", tarefa['total'])
+    with col2:
+        st.metric("Arquivos com Nome Encontrado", resumo['nome_arquivo_encontrado'])
+    with col3:
+        st.metric("Arquivos com Prancha Encontrada", resumo['prancha_encontrada'])
+    with col4:
+        st.metric("Arquivos Assinados", resumo['assinado_pelo_nome'])
+    with col5:
+        st.metric("Projetos Encontrados", resumo['projeto_encontrado'])
+    
+    st.caption(f"Páginas lidas: {resumo['paginas_lidas']} | Páginas puladas: {resumo['paginas_puladas']} | "
+               f"Arquivos sem engenheiro: {resumo['sem_engenheiro']}")
+    
+    # Acertos e falhas do cache nesta análise
+    estatisticas_cache = tarefa['estatisticas']
+    if estatisticas_cache is not None and 'acertos_cache' in estatisticas_cache:
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Resultados do cache", estatisticas_cache['acertos_cache'])
+        with col2:
+            st.metric("Arquivos analisados", estatisticas_cache['falhas_cache'])
+        with col3:
+            st.metric("Entradas no cache", estatisticas_cache['entradas'],
+                      help=f"Acertos acumulados: {estatisticas_cache['acertos_total']} | "
+                           f"Falhas acumuladas: {estatisticas_cache['falhas_total']}")
+    
+    # Detalhamento dos engenheiros encontrados
+    st.subheader("Engenheiros Encontrados")
+    engenheiros_encontrados = resumo['por_engenheiro']
+    
+    if engenheiros_encontrados:
+        for engenheiro, count in engenheiros_encontrados.items():
+            st.write(f"• **{engenheiro}**: encontrado em {count} arquivo(s)")
+    else:
+        st.write("Nenhum engenheiro encontrado nos arquivos analisados")
+    
+    # Detalhamento dos projetos
+    st.subheader("Detalhamento dos Projetos")
+    projetos_encontrados = resumo['por_projeto']
+    
+    if projetos_encontrados:
+        for projeto, count in projetos_encontrados.items():
+            st.write(f"• **{projeto}**: {count} arquivo(s)")
+    else:
+        st.write("Nenhum projeto identificado nos arquivos analisados")
+    
+    # Botão para download (a planilha só é gerada no clique)
+    st.download_button(
+        label="📥 Baixar Resultados em Excel",
+        data=partial(exportar, dados, "xlsx"),
+        file_name="resultados_analise.xlsx",
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        on_click="ignore"
+    )
+    
+    # Exportações mais leves para lotes muito grandes
+    col_csv, col_parquet = st.columns(2)
+    with col_csv:
+        st.download_button(
+            label="📥 Baixar em CSV",
+            data=partial(exportar, dados, "csv"),
+            file_name="resultados_analise.csv",
+            mime="text/csv",
+            on_click="ignore"
+        )
+    with col_parquet:
+        if importlib.util.find_spec("pyarrow") is None:
+            st.caption("Exportação em Parquet indisponível (instale o pyarrow)")
+        else:
+            st.download_button(
+                label="📥 Baixar em Parquet",
+                data=partial(exportar, dados, "parquet"),
+                file_name="resultados_analise.parquet",
+                mime="application/vnd.apache.parquet",
+                on_click="ignore"
+            )
+    
+    # Tempo de cada etapa e arquivos mais lentos (a tabela pode ser ordenada por qualquer coluna)
+    with st.expander("⏱️ Diagnóstico de desempenho"):
+        dados_diagnostico = dados['diagnostico']
+        if dados_diagnostico:
+            def total_s(coluna):
+                return sum(linha[coluna] for linha in dados_diagnostico) / 1000
+            
+            tempo_excel = dados['tempos_exportacao'].get("xlsx")
+            st.caption(f"Abertura: {total_s('Abertura (ms)'):.2f} s | "
+                       f"Extração: {total_s('Extração (ms)'):.2f} s | "
+                       f"Busca: {total_s('Busca (ms)'):.2f} s"
+                       + (f" | Excel: {tempo_excel:.2f} s" if tempo_excel is not None else ""))
+            st.write("**Arquivos mais lentos**")
+            st.dataframe(dados_diagnostico, hide_index=True)
+        if dados['perfil']:
+            st.code(dados['resumo_perfil'])
+            st.download_button(
+                label="📥 Baixar perfil (cProfile)",
+                data=partial(ler_arquivo, dados['perfil']),
+                file_name="analise.prof",
+                mime="application/octet-stream",
+                on_click="ignore"
+            )
+    
+    st.success("Análise concluída com sucesso! ✅")
+
 
-# Mapeamento de códigos de projeto para descrições
-MAPEAMENTO_PROJETOS = {
-    "ECX": "PROJETO ELÉTRICO DE BAIXA",
-    "ILUX": "PROJETO DE ILUMINAÇÃO EXTERNA",
-    "CFTV": "PROJETO DE CFTV",
-    "CAB": "PROJETO DE CABEAMENTO",
-    "SOM": "PROJETO DE SONORIZAÇÃO",
-    "SUB": "PROJETO DE SUBESTAÇÃO",
-    "SPDA": "PROJETO DE SPDA",
-    "TEF": "PROJETO DE TELEFONIA",
-    "ALI": "PROJETO ELÉTRICO DE BAIXA",
-    "TUG": "PROJETO ELÉTRICO DE BAIXA",
-    "ILU": "PROJETO ELÉTRICO DE BAIXA",
-    "EME": "PROJETO ELÉTRICO DE BAIXA",
-    "FOT": "PROJETO ELÉTRICO FOTOVOLTAICO",
-    "LEV": "LEVANTAMENTO TOPOGRÁFICO",
-    "EST": "ESTRUTURA DE CONCRETO ARMADO",
-    "FUN": "ESTRUTURA DE CONCRETO ARMADO", 
-    "EMT": "ESTRUTURA METÁLICA",
-    "DRE": "PROJETO DE DRENAGEM",
-    "PAV": "PROJETO DE PAVIMENTAÇÃO",
-    "REG": "PROJETO DE REDE DE ESGOTO",
-    "TER": "PROJETO DE TERRAPLENAGEM",
-    "CANT": "PROJETO DE CANTEIRO DE OBRAS",
-    "HID": "PROJETO DE INSTALAÇÕES HIDRÁULICAS",
-    "IRRI": "PROJETO DE IRRIGAÇÃO",
-    "SAN": "PROJETO DE INSTALAÇÕES SANITÁRIAS",
-    "PLU": "PROJETO DE SISTEMA DE REDES DE ÁGUAS",
-    "INC": "PROJETO DE PREVENÇÃO E COMBATE A INCÊNDIO",
-    "GLP": "PROJETO DE INSTALAÇÕES DE GASES GLP",
-    "CLI": "PROJETO DE INSTALAÇÕES DE GASES GLP",
-    "EXA": "PROJETO DE EXAUSTÃO"
-}
+# Acompanha uma análise da fila atualizando só este trecho da página a cada
+# segundo; quando ela termina, a página inteira é atualizada com os resultados
+@st.fragment(run_every=1)
+def acompanhar_tarefa(fila, tarefa_id):
+    tarefa = fila.obter(tarefa_id)
+    if tarefa['situacao'] not in TAREFAS_ATIVAS:
+        st.rerun()
+    
+    if tarefa['situacao'] == TAREFA_NA_FILA:
+        st.info(f"Análise na fila (posição {tarefa['posicao_fila']}). "
+                "Esta página pode ser fechada: o andamento e os resultados ficam guardados.")
+    else:
+        total = tarefa['total'] or 0
+        st.progress(tarefa['processados'] / total if total else 0.0)
+        st.text(f"Processados {tarefa['processados']} de {total or '...'} arquivo(s)")
+        
+        # Processos usados: menos que os pedidos com o perfil ligado ou com os
+        # núcleos divididos entre outras análises em andamento
+        processos = tarefa['processos']
+        if processos:
+            pedidos = min(tarefa['parametros']['num_processos'] or processos, total or processos)
+            if tarefa['parametros']['perfil']:
+                st.caption("1 processo (o perfil da análise roda em um único processo)")
+            elif processos < pedidos:
+                st.caption(f"{processos} processo(s) em paralelo, de {pedidos} pedidos: os núcleos estão "
+                           "divididos com outra análise em andamento")
+            else:
+                st.caption(f"{processos} processo(s) em paralelo")
+    
+    if st.button("Cancelar análise"):
+        fila.cancelar(tarefa_id)
 
-# Criar lista FIXA de palavras-chave dos engenheiros (sempre serão pesquisadas)
-PALAVRAS_CHAVE_ENGENHEIROS = []
-for engenheiro, creas in ENGENHEIROS_CREAS_FIXOS.items():
-    PALAVRAS_CHAVE_ENGENHEIROS.append(engenheiro)
-    PALAVRAS_CHAVE_ENGENHEIROS.extend(creas)
 
-# Palavras-chave padrão adicionais (projeto específico)
-PALAVRAS_CHAVE_PADRAO = [
-    "IPER",
-    "CONSTRUÇÃO DA SEDE DO INSTITUTO DE PREVIDÊNCIA DO ESTADO",
-    "DE RORAIMA - IPER",
-    "AGOSTO",
-    "2025",
-    "RUA",
-    "CC-22",
-    "LOTE: 712 - REM.", 
-    "LAURA MOREIRA",
-    "69318-105",
-    "BOA VISTA",
-    "RR",
-    "2.220,32",
-    "2.654,11",
-    "SAUDE",
-    "SAÚDE"
-]
+# Título da aplicação
+st.title("📄 Analisador de Carimbos em PDFs")
+st.markdown("Esta ferramenta verifica a presença de palavras-chave em arquivos PDF e gera um relatório.")
 
 # Criar abas para diferentes funcionalidades
 tab1, tab2 = st.tabs(["Analisador de PDF", "Tutorial em Vídeo"])
@@ -92,8 +325,26 @@ with tab1:
     with st.sidebar:
         st.header("Configurações")
         
-        # Upload de arquivos PDF
-        uploaded_files = st.file_uploader("Selecione os arquivos PDF", type="pdf", accept_multiple_files=True)
+        # Upload de arquivos PDF, de ZIPs com PDFs (inclusive em subpastas) ou de uma pasta
+        tipo_envio = st.radio("Enviar", ["Arquivos PDF ou ZIP", "Pasta"], horizontal=True)
+        uploaded_files = st.file_uploader("Selecione os arquivos PDF ou ZIP", type=["pdf", "zip"],
+                                          accept_multiple_files="directory" if tipo_envio == "Pasta" else True)
+        
+        # Regras do projeto: as embutidas ou um arquivo do diretório de regras
+        arquivos_regras = listar_regras(DIRETORIO_REGRAS_PADRAO)
+        regras = REGRAS_PADRAO
+        if arquivos_regras:
+            projeto = st.selectbox("Regras do projeto", ["Padrão"] + list(arquivos_regras),
+                                   help=f"Arquivos JSON ou YAML em {DIRETORIO_REGRAS_PADRAO}")
+            if projeto != "Padrão":
+                try:
+                    regras = obter_regras(arquivos_regras[projeto], os.stat(arquivos_regras[projeto]).st_mtime_ns)
+                except (OSError, ValueError) as e:
+                    st.error(f"Erro ao carregar as regras: {e}")
+                    projeto = "Padrão"
+            arquivo_regras = None if projeto == "Padrão" else arquivos_regras[projeto]
+        else:
+            arquivo_regras = None
         
         # Entrada de palavras-chave
         st.subheader("Palavras-chave")
@@ -101,19 +352,19 @@ with tab1:
         # Informar que engenheiros serão sempre pesquisados
         st.info("🔍 Engenheiros e CREAs serão SEMPRE pesquisados:")
         with st.expander("Ver engenheiros e CREAs fixos"):
-            for engenheiro, creas in ENGENHEIROS_CREAS_FIXOS.items():
+            for engenheiro, creas in regras.engenheiros.items():
                 st.write(f"**{engenheiro}**: {', '.join(creas)}")
         
         # Mostrar mapeamento de projetos
         st.info("🗂️ Mapeamento de códigos de projeto:")
         with st.expander("Ver mapeamento de projetos"):
-            for codigo, descricao in MAPEAMENTO_PROJETOS.items():
+            for codigo, descricao in regras.projetos.items():
                 st.write(f"**{codigo}**: {descricao}")
         
         # Campo para palavras-chave adicionais (projeto específico)
         keywords_input = st.text_area(
             "Insira palavras-chave adicionais do projeto (uma por linha)", 
-            value="\n".join(PALAVRAS_CHAVE_PADRAO),
+            value="\n".join(regras.palavras_chave),
             height=200,
             help="Estas palavras-chave serão pesquisadas além dos engenheiros e CREAs"
         )
@@ -124,293 +375,161 @@ with tab1:
         check_sheet_number = st.checkbox("Verificar número da prancha no conteúdo", value=True)
         check_projeto = st.checkbox("Verificar descrição do projeto no conteúdo", value=True,
                                    help="Verifica se a descrição do projeto está presente no PDF")
+        normalizar = st.checkbox("Ignorar acentos, maiúsculas e formato dos CREAs", value=True,
+                                 help="\"SAUDE\" encontra \"Saúde\" e \"092019291-2\" encontra \"0920192912\"; "
+                                      "variantes da mesma palavra não precisam ser listadas")
+        
+        # Área de extração: página inteira ou só a região do carimbo
+        opcoes_area = ["Página inteira", REGIAO_AUTOMATICA] + list(REGIOES_CARIMBO) + ["Personalizada"]
+        area_extracao = st.selectbox("Área de extração do texto", opcoes_area,
+                                     help="Extrair só a região do carimbo é mais rápido em pranchas densas. "
+                                          "Se o carimbo não for encontrado completo, a página inteira é extraída.")
+        if area_extracao == "Página inteira":
+            regiao_carimbo = None
+        elif area_extracao == "Personalizada":
+            faixa_x = st.slider("Largura da região (% da folha, da esquerda para a direita)", 0, 100, (75, 100))
+            faixa_y = st.slider("Altura da região (% da folha, de baixo para cima)", 0, 100, (0, 60))
+            regiao_carimbo = (faixa_x[0] / 100, faixa_y[0] / 100, faixa_x[1] / 100, faixa_y[1] / 100)
+        else:
+            regiao_carimbo = area_extracao
+        
+        # Ordem de leitura das páginas e parada antecipada
+        ordens_paginas = {
+            "Todas as páginas": ORDEM_TODAS,
+            "Última página primeiro (para ao encontrar tudo)": ORDEM_ULTIMA_PRIMEIRO,
+            "Primeira página primeiro (para ao encontrar tudo)": ORDEM_PRIMEIRA_PRIMEIRO,
+        }
+        ordem_selecionada = st.selectbox("Leitura das páginas", list(ordens_paginas),
+                                         help="Nas opções com parada, as páginas restantes não são lidas quando "
+                                              "todas as palavras-chave e verificações já foram encontradas")
+        
+        # Extrator do texto das páginas
+        extrator = st.selectbox("Extrator do texto", list(EXTRATORES), index=list(EXTRATORES).index(EXTRATOR_PADRAO),
+                                format_func=lambda nome: ROTULOS_EXTRATORES.get(nome, nome),
+                                help="A leitura direta só junta os textos das páginas, sem reconstruir o layout, "
+                                     "e é bem mais rápida. Se o carimbo não for encontrado completo, a página "
+                                     "inteira é extraída de novo pelo PyPDF2.")
+        
+        num_processos = st.number_input("Processos paralelos", min_value=1, max_value=64,
+                                        value=numero_processos_padrao(),
+                                        help="Quantidade de arquivos analisados ao mesmo tempo (um por núcleo do "
+                                             "processador); com outras análises em andamento, os núcleos são "
+                                             "divididos entre elas")
+        memoria_maxima_mb = st.number_input("Memória máxima para PDFs em análise (MB)", min_value=16,
+                                            value=MEMORIA_MAXIMA_PADRAO // (1024 * 1024),
+                                            help="Os PDFs (e as entradas dos ZIPs) são lidos um a um; "
+                                                 "este é o limite de bytes em análise ao mesmo tempo")
+        tempo_limite_s = st.number_input("Tempo máximo por arquivo (s)", min_value=0, value=TEMPO_LIMITE_PADRAO,
+                                         help="Arquivos que passam do limite são interrompidos e analisados mais "
+                                              "uma vez de forma mais econômica (0 = sem limite)")
+        memoria_limite_mb = st.number_input("Memória máxima por arquivo (MB)", min_value=0,
+                                            value=MEMORIA_LIMITE_PADRAO // (1024 * 1024),
+                                            help="Memória do processo que analisa cada arquivo; acima dela o "
+                                                 "processo é encerrado e o lote continua (0 = sem limite)")
+        
+        # Cache de resultados: arquivos sem alteração não são abertos novamente
+        st.subheader("Cache")
+        usar_cache = st.checkbox("Reutilizar resultados de arquivos já analisados", value=True,
+                                 help="Arquivos idênticos analisados com as mesmas regras vêm do cache")
+        usar_textos = st.checkbox("Reutilizar texto extraído das páginas", value=True,
+                                  help="Ao alterar palavras-chave ou opções, refaz apenas a busca, sem extrair o texto de novo")
+        diretorio_cache = st.text_input("Diretório do cache", value=DIRETORIO_CACHE_PADRAO)
+        # Caminho real, sem "~" nem links: "dir", "dir/" e "~/dir" são o mesmo
+        # cache e a mesma fila
+        diretorio_cache = os.path.realpath(os.path.expanduser(diretorio_cache))
+        tamanho_cache_mb = st.number_input("Tamanho máximo do cache (MB)", min_value=1,
+                                           value=TAMANHO_MAXIMO_CACHE_PADRAO // (1024 * 1024))
+        if st.button("Invalidar cache"):
+            cache = CacheResultados(diretorio_cache, tamanho_cache_mb * 1024 * 1024)
+            cache.invalidar()
+            cache.fechar()
+            armazem_textos = ArmazemTextos(diretorio_cache, tamanho_cache_mb * 1024 * 1024)
+            armazem_textos.invalidar()
+            armazem_textos.fechar()
+            st.success("Cache invalidado.")
+        
+        # Perfil da análise para investigar lotes lentos
+        st.subheader("Diagnóstico")
+        gerar_perfil = st.checkbox("Gerar perfil da análise (cProfile)", value=False,
+                                   help="Roda a análise em um único processo para medir também a extração; "
+                                        "o perfil pode ser baixado ao final")
         
         # Botão para iniciar análise
         analyze_button = st.button("Iniciar Análise", type="primary")
 
-    # Função para extrair o número da prancha do nome do arquivo
-    def extrair_numero_prancha(nome_arquivo):
-        # Remove a extensão e possíveis sufixos como "_assinado"
-        nome_sem_ext = os.path.splitext(nome_arquivo)[0].replace("_assinado", "")
-        
-        # Procura por padrões como _01_07 ou -01-07 no nome
-        padroes = [
-            r'[_\-](\d{2})[_\-](\d{2})(?:\..*)?$',
-            r'[_\-](\d{2})[_\-](\d{3})(?:\..*)?$',
-            r'[_\-](\d{3})[_\-](\d{3})(?:\..*)?$'
-        ]
-        
-        for padrao in padroes:
-            correspondencia = re.search(padrao, nome_sem_ext)
-            if correspondencia:
-                return f"{correspondencia.group(1)} {correspondencia.group(2)}"
-        
-        return None
-
-    # Função para verificar se o arquivo está assinado pelo nome
-    def verificar_assinatura_nome(nome_arquivo):
-        # Verifica se o nome do arquivo contém "assinado" (case insensitive)
-        return "assinado" in nome_arquivo.lower()
-
-    # Função para extrair o código do projeto do nome do arquivo - CORRIGIDA
-    def extrair_codigo_projeto(nome_arquivo):
-        # Padrão mais flexível: PRJ-XXX- (onde XXX é o código do projeto)
-        padrao = r'PRJ-([A-Z]+)-'
-        correspondencia = re.search(padrao, nome_arquivo)
-        if correspondencia:
-            return correspondencia.group(1)
-        return None
-
-    # Processamento quando o botão é clicado
+    # Fila de análises compartilhada pelas sessões do servidor; cada sessão tem
+    # um id para a divisão justa da fila
+    fila = obter_fila(diretorio_cache)
+    if "sessao" not in st.session_state:
+        st.session_state.sessao = uuid.uuid4().hex
+    
+    # Enviar a análise para a fila quando o botão é clicado: os arquivos são
+    # gravados em disco e a análise roda em segundo plano, sem depender desta
+    # execução do script (mexer nos controles não interrompe a análise)
     if analyze_button and uploaded_files:
         # Preparar palavras-chave (engenheiros FIXOS + palavras adicionais do usuário)
         palavras_chave_adicionais = [linha.strip() for linha in keywords_input.split('\n') if linha.strip()]
         
-        # Combinar palavras-chave fixas dos engenheiros com as adicionais
-        todas_palavras_chave = PALAVRAS_CHAVE_ENGENHEIROS + palavras_chave_adicionais
-        
-        # Dicionário para armazenar os dados de cada PDF
-        resultados = {}
-        
-        # Barra de progresso
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-        
-        # Processar cada arquivo PDF
-        for i, uploaded_file in enumerate(uploaded_files):
-            # Atualizar barra de progresso
-            progress = (i + 1) / len(uploaded_files)
-            progress_bar.progress(progress)
-            status_text.text(f"Processando {i+1} de {len(uploaded_files)}: {uploaded_file.name}")
-            
-            # Extrair o nome do arquivo sem a extensão
-            nome_arquivo = os.path.splitext(uploaded_file.name)[0]
-            
-            # Verificar se o arquivo está assinado pelo nome
-            assinado_pelo_nome = verificar_assinatura_nome(uploaded_file.name)
-            
-            # Extrair o número da prancha (removendo "_assinado" se existir)
-            nome_sem_assinado = nome_arquivo.replace("_assinado", "")
-            numero_prancha = extrair_numero_prancha(nome_sem_assinado)
-            
-            # Extrair o código do projeto
-            codigo_projeto = extrair_codigo_projeto(uploaded_file.name)
-            descricao_projeto = MAPEAMENTO_PROJETOS.get(codigo_projeto, "Desconhecido") if codigo_projeto else "Não identificado"
-            
-            # Lista para armazenar os dados encontrados no PDF atual
-            dados_carimbo = []
-            nome_arquivo_encontrado = False
-            prancha_encontrada = False
-            projeto_encontrado = False
-            
-            # Ler o conteúdo del PDF
-            try:
-                leitor = PyPDF2.PdfReader(uploaded_file)
-                
-                for pagina in leitor.pages:
-                    texto_extraido = pagina.extract_text()
-                    
-                    if texto_extraido:
-                        texto_extraido = texto_extraido.replace("\n", " ")  # Remover quebras de linha
-                        
-                        # Verificar se o nome do arquivo está no texto da página
-                        if check_filename and nome_sem_assinado in texto_extraido:
-                            nome_arquivo_encontrado = True
-                        
-                        # Verificar se o número da prancha está no texto
-                        if check_sheet_number and numero_prancha:
-                            if (numero_prancha.replace(" ", "_") in texto_extraido or 
-                                numero_prancha.replace(" ", "-") in texto_extraido or 
-                                numero_prancha in texto_extraido):
-                                prancha_encontrada = True
-                        
-                        # Verificar se a descrição do projeto está no texto
-                        if check_projeto and codigo_projeto and descricao_projeto != "Desconhecido":
-                            if descricao_projeto in texto_extraido:
-                                projeto_encontrado = True
-                        
-                        # Verificar palavras-chave FIXAS dos engenheiros
-                        for palavra in PALAVRAS_CHAVE_ENGENHEIROS:
-                            if palavra in texto_extraido and palavra not in dados_carimbo:
-                                dados_carimbo.append(palavra)
-                        
-                        # Verificar palavras-chave adicionais do projeto
-                        for palavra in palavras_chave_adicionais:
-                            if palavra in texto_extraido and palavra not in dados_carimbo:
-                                dados_carimbo.append(palavra)
-            
-            except Exception as e:
-                st.error(f"Erro ao processar {uploaded_file.name}: {str(e)}")
-                continue
-            
-            # Armazenar os dados no dicionário
-            resultados[uploaded_file.name] = {
-                'dados_carimbo': dados_carimbo,
-                'nome_arquivo_encontrado': nome_arquivo_encontrado,
-                'prancha_encontrada': prancha_encontrada,
-                'assinado_pelo_nome': assinado_pelo_nome,
-                'projeto_encontrado': projeto_encontrado,
-                'codigo_projeto': codigo_projeto,
-                'descricao_projeto': descricao_projeto,
-                'numero_prancha': numero_prancha,
-                'nome_arquivo': nome_arquivo
-            }
-        
-        # Limpar barra de progresso
-        progress_bar.empty()
-        status_text.empty()
-        
-        # Criar DataFrame com os resultados
-        dados_tabela = []
-        for nome_arquivo, dados in resultados.items():
-            dados_tabela.append({
-                "Prancha": dados['numero_prancha'] if dados['numero_prancha'] else "Não identificado",
-                "Código Projeto": dados['codigo_projeto'] if dados['codigo_projeto'] else "Não identificado",
-                "Descrição Projeto": dados['descricao_projeto'],
-                "Palavras-chave encontradas": ", ".join(dados['dados_carimbo']) if dados['dados_carimbo'] else "Nenhuma",
-                "Nome do Arquivo": nome_arquivo,
-                "Número da Prancha": dados['numero_prancha'] if dados['numero_prancha'] else "Não identificado",
-                "Nome encontrado": "Sim" if dados['nome_arquivo_encontrado'] else "Não",
-                "Prancha encontrada": "Sim" if dados['prancha_encontrada'] else "Não",
-                "Arquivo assinado": "Sim" if dados['assinado_pelo_nome'] else "Não",
-                "Projeto encontrado": "Sim" if dados['projeto_encontrado'] else "Não"
-            })
-        
-        df = pd.DataFrame(dados_tabela)
-        
-        # Exibir resultados
-        st.subheader("Resultados da Análise")
-        st.dataframe(df)
-        
-        # Estatísticas
-        st.subheader("Estatísticas")
-        col1, col2, col3, col4, col5 = st.columns(5)
-        with col1:
-            st.metric("Total de Arquivos", len(uploaded_files))
-        with col2:
-            st.metric("Arquivos com Nome Encontrado", 
-                     sum(1 for dados in resultados.values() if dados['nome_arquivo_encontrado']))
-        with col3:
-            st.metric("Arquivos com Prancha Encontrada", 
-                     sum(1 for dados in resultados.values() if dados['prancha_encontrada']))
-        with col4:
-            st.metric("Arquivos Assinados", 
-                     sum(1 for dados in resultados.values() if dados['assinado_pelo_nome']))
-        with col5:
-            st.metric("Projetos Encontrados", 
-                     sum(1 for dados in resultados.values() if dados['projeto_encontrado']))
-        
-        # Detalhamento dos engenheiros encontrados
-        st.subheader("Engenheiros Encontrados")
-        engenheiros_encontrados = {}
-        for dados in resultados.values():
-            for palavra in dados['dados_carimbo']:
-                for engenheiro in ENGENHEIROS_CREAS_FIXOS:
-                    if palavra in [engenheiro] + ENGENHEIROS_CREAS_FIXOS[engenheiro]:
-                        engenheiros_encontrados[engenheiro] = engenheiros_encontrados.get(engenheiro, 0) + 1
-        
-        if engenheiros_encontrados:
-            for engenheiro, count in engenheiros_encontrados.items():
-                st.write(f"• **{engenheiro}**: encontrado em {count} arquivo(s)")
-        else:
-            st.write("Nenhum engenheiro encontrado nos arquivos analisados")
-        
-        # Detalhamento dos projetos
-        st.subheader("Detalhamento dos Projetos")
-        projetos_encontrados = {}
-        for dados in resultados.values():
-            codigo = dados['codigo_projeto'] or "Desconhecido"
-            descricao = dados['descricao_projeto']
-            if codigo != "Desconhecido":
-                chave = f"{codigo} - {descricao}"
-                projetos_encontrados[chave] = projetos_encontrados.get(chave, 0) + 1
-        
-        if projetos_encontrados:
-            for projeto, count in projetos_encontrados.items():
-                st.write(f"• **{projeto}**: {count} arquivo(s)")
-        else:
-            st.write("Nenhum projeto identificado nos arquivos analisados")
-        
-        # Criar planilha Excel para download
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Resultados PDF"
-        
-        # Cabeçalhos (sem a coluna "Prancha" que é redundante)
-        cabecalhos = ["Código Projeto", "Descrição Projeto", "Palavras-chave encontradas", 
-                      "Nome do Arquivo", "Número da Prancha", "Nome encontrado", 
-                      "Prancha encontrada", "Arquivo assinado", "Projeto encontrado"]
-        
-        # Escrever cabeçalhos em negrito
-        for col, cabecalho in enumerate(cabecalhos, start=1):
-            celula = ws.cell(row=1, column=col, value=cabecalho)
-            celula.font = Font(bold=True)
-        
-        # Preencher os dados (pulando a coluna "Prancha" que é redundante)
-        for row, dados in enumerate(dados_tabela, start=2):
-            # Ignorar a primeira coluna ("Prancha") e escrever a partir da segunda
-            ws.cell(row=row, column=1, value=dados["Código Projeto"])
-            ws.cell(row=row, column=2, value=dados["Descrição Projeto"])
-            ws.cell(row=row, column=3, value=dados["Palavras-chave encontradas"])
-            ws.cell(row=row, column=4, value=dados["Nome do Arquivo"])
-            ws.cell(row=row, column=5, value=dados["Número da Prancha"])
-            ws.cell(row=row, column=6, value=dados["Nome encontrado"])
-            ws.cell(row=row, column=7, value=dados["Prancha encontrada"])
-            ws.cell(row=row, column=8, value=dados["Arquivo assinado"])
-            ws.cell(row=row, column=9, value=dados["Projeto encontrado"])
-        
-        # Aplicar formatação condicional para as colunas de Sim/Não
-        verde_claro = PatternFill(start_color="00FF00", end_color="00FF00", fill_type="solid")
-        vermelho_claro = PatternFill(start_color="FF2C2B", end_color="FF2C2B", fill_type="solid")
-        
-        # Colunas para formatar (6: Nome encontrado, 7: Prancha encontrada, 8: Arquivo assinado, 9: Projeto encontrado)
-        colunas_para_formatar = [6, 7, 8, 9]
-        
-        for coluna in colunas_para_formatar:
-            for row in range(2, len(dados_tabela) + 2):
-                celula = ws.cell(row=row, column=coluna)
-                if celula.value == "Sim":
-                    celula.fill = verde_claro
-                elif celula.value == "Não":
-                    celula.fill = vermelho_claro
-        
-        # Ajustar largura das colunas
-        for column in ws.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = (max_length + 2) * 1.2
-            ws.column_dimensions[column_letter].width = adjusted_width
-        
-        # Salvar para um buffer em memória
-        excel_buffer = BytesIO()
-        wb.save(excel_buffer)
-        excel_buffer.seek(0)
-        
-        # Botão para download
-        st.download_button(
-            label="📥 Baixar Resultados em Excel",
-            data=excel_buffer,
-            file_name="resultados_analise.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
-        
-        st.success("Análise concluída com sucesso! ✅")
-
-    elif analyze_button and not uploaded_files:
-        st.error("Por favor, selecione pelo menos um arquivo PDF.")
+        # Opções da análise repassadas aos processos
+        opcoes = {
+            "check_filename": check_filename,
+            "check_sheet_number": check_sheet_number,
+            "check_projeto": check_projeto,
+            "regiao_carimbo": regiao_carimbo,
+            "ordem_paginas": ordens_paginas[ordem_selecionada],
+            "extrator": extrator,
+            "normalizar": normalizar,
+        }
+        
+        # Processos, limites, cache e perfil (o perfil roda em um único processo
+        # e sem limites, para que a extração seja medida)
+        parametros = {
+            "num_processos": num_processos,
+            "memoria_maxima": memoria_maxima_mb * 1024 * 1024,
+            "tempo_limite": tempo_limite_s or None,
+            "memoria_limite": memoria_limite_mb * 1024 * 1024 or None,
+            "usar_cache": usar_cache,
+            "usar_textos": usar_textos,
+            "diretorio_cache": diretorio_cache,
+            "tamanho_cache": tamanho_cache_mb * 1024 * 1024,
+            "perfil": gerar_perfil,
+            "arquivo_regras": arquivo_regras,
+        }
+        
+        # Os arquivos enviados vão direto para o disco, um de cada vez, sem
+        # copiar o conteúdo de todos para a memória antes
+        tarefa_id = fila.enviar(st.session_state.sessao,
+                                [(uploaded_file.name, uploaded_file) for uploaded_file in uploaded_files],
+                                palavras_chave_adicionais, opcoes, parametros)
+        
+        # O id fica na sessão e no endereço da página, para reencontrar a análise após uma reconexão
+        st.session_state.tarefa = tarefa_id
+        st.query_params["tarefa"] = tarefa_id
+    
+    # Análise acompanhada por esta sessão (ou indicada no endereço)
+    tarefa_id = st.session_state.get("tarefa") or st.query_params.get("tarefa")
+    tarefa = fila.obter(tarefa_id) if tarefa_id else None
+    
+    # Botão sem arquivos: o aviso vem antes dos resultados de uma análise anterior
+    if analyze_button and not uploaded_files:
+        st.error("Por favor, selecione pelo menos um arquivo PDF (ou um ZIP com PDFs).")
+    
+    elif tarefa is not None and tarefa['situacao'] in TAREFAS_ATIVAS:
+        acompanhar_tarefa(fila, tarefa_id)
+    
+    elif tarefa is not None and tarefa['situacao'] == TAREFA_FALHOU:
+        st.error(f"A análise falhou: {tarefa['erro']}")
+    
+    # Resultados da análise terminada, lidos da fila uma única vez
+    elif tarefa is not None:
+        mostrar_resultados(dados_resultados(fila, tarefa), tarefa)
 
     # Instruções iniciais
     else:
         st.info("👈 Use a barra lateral para configurar e iniciar a análise.")
         st.markdown("""
         ### Como usar:
-        1. Selecione os arquivos PDF que deseja analisar
+        1. Selecione os arquivos PDF que deseja analisar (ou um ZIP / uma pasta com os PDFs)
         2. Insira palavras-chave adicionais do projeto (opcional)
         3. Ajuste as opções conforme necessário
         4. Clique em 'Iniciar Análise'
@@ -446,29 +565,15 @@ with tab2:
     ### Engenheiros e CREAs configurados (busca automática):
     """)
     
-    # Tabela com engenheiros e CREAs
-    dados_engenheiros = []
-    for engenheiro, creas in ENGENHEIROS_CREAS_FIXOS.items():
-        dados_engenheiros.append({
-            "Engenheiro": engenheiro,
-            "CREA(s)": ", ".join(creas)
-        })
-    
-    st.table(pd.DataFrame(dados_engenheiros))
+    # Tabelas com engenheiros e CREAs e com o mapeamento de projetos
+    tabela_engenheiros, tabela_projetos = tabelas_tutorial(regras.impressao, regras)
+    st.markdown(tabela_engenheiros)
     
     st.markdown("""
     ### Mapeamento de códigos de projeto:
     """)
     
-    # Tabela com mapeamento de projetos
-    dados_projetos = []
-    for codigo, descricao in MAPEAMENTO_PROJETOS.items():
-        dados_projetos.append({
-            "Código": codigo,
-            "Descrição": descricao
-        })
-    
-    st.table(pd.DataFrame(dados_projetos))
+    st.markdown(tabela_projetos)
     
     st.markdown("""
     ### ⚠️ Importante:
@@ -0,0 +1,135 @@
+# Micro-benchmark da busca de palavras-chave em uma página de ~20 mil
+# caracteres: um `in` por padrão x uma passada pelo autômato Aho-Corasick.
+#
+# Primeiro na configuração real da análise: palavras-chave padrão, palavras
+# dos engenheiros e os padrões do nome de cada arquivo de lotes de 1 a 1000
+# arquivos, com e sem a normalização. Compara a varredura anterior (um `in`
+# por palavra e pelos dados do nome do próprio arquivo), a passada pelo
+# autômato do lote inteiro e buscar_padroes (a que a análise usa). Depois com
+# quantidades sintéticas de padrões, para conferir LIMITE_VARREDURA.
+#
+# Uso: python benchmarks/bench_busca.py [--repeticoes N]
+import argparse
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from verificador.analise import _dados_do_nome, _mascara_padroes, _variantes_prancha, montar_automato  # noqa: E402
+from verificador.busca import (  # noqa: E402
+    LIMITE_VARREDURA,
+    buscar_padroes,
+    compilar_automato,
+    percorrer_automato,
+    varrer_padroes,
+)
+from verificador.normalizacao import creas_das_palavras, normalizar_texto  # noqa: E402
+from verificador.regras import MAPEAMENTO_PROJETOS, PALAVRAS_CHAVE_ENGENHEIROS, PALAVRAS_CHAVE_PADRAO  # noqa: E402
+
+LOTES = [1, 100, 1000]
+QUANTIDADES = [20, 200, LIMITE_VARREDURA, 2000]
+ALFABETO = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789 -.,:"
+
+
+# Nomes de arquivos de um lote, no formato do conjunto sintético (gerar_pranchas.py)
+def gerar_nomes(quantidade):
+    codigos = sorted(MAPEAMENTO_PROJETOS)
+    return [f"PRJ-{codigos[indice % len(codigos)]}-IPER-{indice // 50 + 1:02d}-{indice % 50 + 1:02d}.pdf"
+            for indice in range(quantidade)]
+
+
+# Texto de uma prancha: muitas cotas e rótulos, com o carimbo do arquivo no final
+def gerar_texto_pagina(gerador, nome, tamanho=20000):
+    partes = []
+    while sum(len(parte) for parte in partes) < tamanho:
+        partes.append("".join(gerador.choice(ALFABETO) for _ in range(gerador.randint(3, 12))))
+    _, nome_sem_assinado, numero_prancha, _, descricao_projeto = _dados_do_nome(nome)
+    partes.extend([nome_sem_assinado, descricao_projeto, f"PRANCHA: {numero_prancha.replace(' ', '-')}"])
+    partes.extend(PALAVRAS_CHAVE_ENGENHEIROS[:3] + PALAVRAS_CHAVE_PADRAO)
+    return " ".join(partes)
+
+
+# Palavras-chave reais completadas com palavras aleatórias até a quantidade desejada
+def gerar_palavras(gerador, quantidade):
+    palavras = list(dict.fromkeys(PALAVRAS_CHAVE_ENGENHEIROS + PALAVRAS_CHAVE_PADRAO))[:quantidade]
+    while len(palavras) < quantidade:
+        palavras.append("".join(gerador.choice(ALFABETO) for _ in range(gerador.randint(4, 20))))
+    return palavras
+
+
+# Varredura anterior: um `in` sobre o texto para cada palavra e para os dados
+# do nome do arquivo, com deduplicação em lista
+def busca_por_palavra(palavras, padroes_arquivo, texto):
+    encontrados = []
+    for palavra in palavras:
+        if palavra in texto and palavra not in encontrados:
+            encontrados.append(palavra)
+    return encontrados, [padrao in texto for padrao in padroes_arquivo]
+
+
+# Menor tempo (ms) de `funcao` em `repeticoes` execuções
+def _tempo(funcao, repeticoes):
+    return min(timeit.repeat(funcao, number=1, repeat=repeticoes)) * 1000
+
+
+def medir_configuracao_real(gerador, repeticoes):
+    palavras = PALAVRAS_CHAVE_ENGENHEIROS + PALAVRAS_CHAVE_PADRAO
+    print(f"Configuração real: {len(palavras)} palavras-chave + padrões do nome de cada arquivo")
+    print(f"{'arquivos':>8} {'normalizar':>10} {'padrões':>8} {'in (ms)':>9} {'autômato (ms)':>14} "
+          f"{'busca (ms)':>11} {'ganho':>7}")
+    for quantidade in LOTES:
+        nomes = gerar_nomes(quantidade)
+        nome = nomes[-1]
+        _, nome_sem_assinado, numero_prancha, _, descricao_projeto = _dados_do_nome(nome)
+        padroes_arquivo = [nome_sem_assinado, descricao_projeto] + _variantes_prancha(numero_prancha)
+        texto = gerar_texto_pagina(gerador, nome)
+        tempo_in = _tempo(lambda: busca_por_palavra(palavras, padroes_arquivo, texto), repeticoes)
+
+        for normalizar in (False, True):
+            opcoes = {"normalizar": normalizar}
+            automato = montar_automato(nomes, PALAVRAS_CHAVE_PADRAO, opcoes)
+            alvo = _mascara_padroes(automato, palavras + padroes_arquivo, normalizar)
+            texto_busca = normalizar_texto(texto, creas_das_palavras(tuple(palavras))) if normalizar else texto
+
+            # As duas buscas precisam encontrar os mesmos padrões do arquivo
+            assert percorrer_automato(automato, texto_busca) & alvo == buscar_padroes(automato, texto_busca, alvo)
+
+            tempo_automato = _tempo(lambda: percorrer_automato(automato, texto_busca), repeticoes)
+            tempo_busca = _tempo(lambda: buscar_padroes(automato, texto_busca, alvo), repeticoes)
+            print(f"{quantidade:>8} {'sim' if normalizar else 'não':>10} {len(automato['padroes']):>8} "
+                  f"{tempo_in:>9.3f} {tempo_automato:>14.3f} {tempo_busca:>11.3f} {tempo_in / tempo_busca:>6.2f}x")
+
+
+def medir_quantidades(gerador, repeticoes):
+    texto = gerar_texto_pagina(gerador, gerar_nomes(1)[0])
+    print(f"\nQuantidades sintéticas de padrões (LIMITE_VARREDURA = {LIMITE_VARREDURA})")
+    print(f"{'padrões':>8} {'in (ms)':>10} {'autômato (ms)':>14} {'montagem (ms)':>14} {'ganho':>7}")
+    for quantidade in QUANTIDADES:
+        palavras = gerar_palavras(gerador, quantidade)
+        automato = compilar_automato(palavras)
+        alvo = (1 << len(automato['padroes'])) - 1
+        montagem = _tempo(lambda: percorrer_automato(compilar_automato(palavras), ""), 1)
+
+        # As duas abordagens precisam encontrar os mesmos padrões
+        assert varrer_padroes(automato, texto, alvo) == percorrer_automato(automato, texto)
+
+        tempo_in = _tempo(lambda: varrer_padroes(automato, texto, alvo), repeticoes)
+        tempo_automato = _tempo(lambda: percorrer_automato(automato, texto), repeticoes)
+        print(f"{quantidade:>8} {tempo_in:>10.3f} {tempo_automato:>14.3f} {montagem:>14.3f} "
+              f"{tempo_in / tempo_automato:>6.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark da busca de palavras-chave em uma página")
+    parser.add_argument("--repeticoes", type=int, default=20)
+    args = parser.parse_args()
+
+    gerador = random.Random(42)
+    medir_configuracao_real(gerador, args.repeticoes)
+    medir_quantidades(gerador, args.repeticoes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+# Benchmark da análise completa de um lote (extração + busca) sobre conjuntos
+# sintéticos de pranchas (gerar_pranchas.py) com 10, 100 e 1000 arquivos.
+# Mede páginas/s, arquivos/s, pico de memória (RSS) e o tempo de cada etapa,
+# e compara com a linha de base guardada em baseline_lote.json.
+# Cada tamanho roda em um processo novo, para que o pico de RSS seja o dele.
+#
+# Uso: python benchmarks/bench_lote.py [--tamanhos 10 100 1000] [--processos N]
+#                                      [--salvar-baseline] [--tolerancia 0.15]
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from functools import partial
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gerar_pranchas import VERSAO_CONJUNTO, gerar_conjunto  # noqa: E402
+from verificador.analise import analisar_lote  # noqa: E402
+from verificador.regras import PALAVRAS_CHAVE_PADRAO  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+TAMANHOS = [10, 100, 1000]
+ARQUIVO_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline_lote.json")
+DIRETORIO_DADOS = os.path.join(tempfile.gettempdir(), "verificador-bench")
+
+
+def _ler(caminho):
+    with open(caminho, "rb") as arquivo:
+        return arquivo.read()
+
+
+# Pico de RSS (MB) deste processo e dos processos filhos já encerrados
+def _pico_rss_mb():
+    if resource is None:
+        return None, None
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / divisor,
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / divisor)
+
+
+# Pasta com o conjunto sintético dos parâmetros dados (gerado uma única vez)
+def preparar_conjunto(quantidade, parametros):
+    nome = "v{versao}-{quantidade}-{paginas}p-{densidade}t-{vetores}v-{semente}".format(
+        versao=VERSAO_CONJUNTO, quantidade=quantidade, **parametros)
+    destino = os.path.join(DIRETORIO_DADOS, nome)
+    if not os.path.isdir(destino) or len(os.listdir(destino)) < quantidade:
+        gerar_conjunto(destino, quantidade, **parametros)
+    return sorted(os.path.join(destino, nome) for nome in os.listdir(destino))
+
+
+# Mede um tamanho de lote no processo atual e devolve as métricas
+def medir(quantidade, parametros, num_processos):
+    caminhos = preparar_conjunto(quantidade, parametros)
+    arquivos = [(os.path.basename(caminho), partial(_ler, caminho)) for caminho in caminhos]
+    diagnosticos = {}
+    erros = 0
+
+    inicio = time.perf_counter()
+    for _, _, _, erro in analisar_lote(arquivos, PALAVRAS_CHAVE_PADRAO, num_processos=num_processos,
+                                       diagnosticos=diagnosticos):
+        erros += erro is not None
+    duracao = time.perf_counter() - inicio
+
+    paginas = sum(diagnostico.get('paginas') or 0 for diagnostico in diagnosticos.values())
+    rss_principal, rss_filhos = _pico_rss_mb()
+    return {
+        "arquivos": len(arquivos),
+        "paginas": paginas,
+        "erros": erros,
+        "duracao_s": round(duracao, 3),
+        "paginas_por_s": round(paginas / duracao, 2),
+        "arquivos_por_s": round(len(arquivos) / duracao, 2),
+        "pico_rss_mb": rss_principal and round(rss_principal, 1),
+        "pico_rss_filhos_mb": rss_filhos and round(rss_filhos, 1),
+        "etapas_s": {
+            etapa: round(sum(diagnostico.get(f"tempo_{etapa}") or 0 for diagnostico in diagnosticos.values()), 3)
+            for etapa in ("leitura", "abertura", "extracao", "busca")
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da análise de lotes de pranchas sintéticas")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=TAMANHOS)
+    parser.add_argument("--processos", type=int, default=None, help="Processos paralelos (padrão: um por núcleo)")
+    parser.add_argument("--paginas", type=int, default=2)
+    parser.add_argument("--densidade", type=int, default=400)
+    parser.add_argument("--vetores", type=int, default=300)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--salvar-baseline", action="store_true", help="Grava os resultados como nova linha de base")
+    parser.add_argument("--tolerancia", type=float, default=0.15,
+                        help="Queda de páginas/s em relação à linha de base considerada regressão")
+    parser.add_argument("--medir", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    parametros = {"paginas": args.paginas, "densidade": args.densidade, "vetores": args.vetores,
+                  "semente": args.semente}
+
+    # Processo filho: mede um tamanho e devolve o JSON
+    if args.medir:
+        print(json.dumps(medir(args.medir, parametros, args.processos)))
+        return 0
+
+    resultados = {}
+    for quantidade in args.tamanhos:
+        preparar_conjunto(quantidade, parametros)
+        comando = [sys.executable, os.path.abspath(__file__), "--medir", str(quantidade)]
+        for opcao, valor in parametros.items():
+            comando += [f"--{opcao}", str(valor)]
+        if args.processos:
+            comando += ["--processos", str(args.processos)]
+        saida = subprocess.run(comando, check=True, capture_output=True, text=True).stdout
+        resultados[str(quantidade)] = json.loads(saida.strip().splitlines()[-1])
+
+    baseline = None
+    if os.path.exists(ARQUIVO_BASELINE):
+        with open(ARQUIVO_BASELINE, encoding="utf-8") as arquivo:
+            baseline = json.load(arquivo)
+        if baseline.get("parametros") != parametros:
+            print("Parâmetros diferentes da linha de base; comparação ignorada")
+            baseline = None
+
+    print(f"{'arquivos':>8} {'páginas':>8} {'tempo (s)':>10} {'pág/s':>8} {'arq/s':>8} {'RSS (MB)':>9} "
+          f"{'filhos (MB)':>12} {'extração':>9} {'busca':>7} {'vs base':>8}")
+    regressoes = []
+    for quantidade, metricas in resultados.items():
+        comparacao = ""
+        anterior = baseline and baseline["resultados"].get(quantidade)
+        if anterior:
+            variacao = metricas["paginas_por_s"] / anterior["paginas_por_s"] - 1
+            comparacao = f"{variacao:+.0%}"
+            if variacao < -args.tolerancia:
+                regressoes.append(quantidade)
+        print(f"{quantidade:>8} {metricas['paginas']:>8} {metricas['duracao_s']:>10.2f} "
+              f"{metricas['paginas_por_s']:>8.1f} {metricas['arquivos_por_s']:>8.1f} "
+              f"{metricas['pico_rss_mb'] or 0:>9.1f} {metricas['pico_rss_filhos_mb'] or 0:>12.1f} "
+              f"{metricas['etapas_s']['extracao']:>9.2f} {metricas['etapas_s']['busca']:>7.2f} {comparacao:>8}")
+
+    if args.salvar_baseline:
+        anteriores = baseline["resultados"] if baseline else {}
+        with open(ARQUIVO_BASELINE, "w", encoding="utf-8") as arquivo:
+            json.dump({
+                "parametros": parametros,
+                "maquina": {"python": platform.python_version(), "sistema": platform.platform(),
+                            "processador": platform.processor() or platform.machine(),
+                            "nucleos": os.cpu_count(), "processos": args.processos},
+                "resultados": {**anteriores, **resultados},
+            }, arquivo, indent=2, ensure_ascii=False)
+            arquivo.write("\n")
+        print(f"Linha de base gravada em {ARQUIVO_BASELINE}")
+
+    if regressoes:
+        print(f"Regressão acima de {args.tolerancia:.0%} em páginas/s: {', '.join(regressoes)} arquivo(s)")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
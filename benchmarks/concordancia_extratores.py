@@ -0,0 +1,108 @@
+# Concordância entre extratores de texto: extrai cada página de uma amostra de
+# PDFs pelo PyPDF2 e por outro extrator (padrão: leitura direta do conteúdo,
+# sem o fallback da análise), faz a mesma busca nos dois textos e compara o
+# que foi encontrado em cada arquivo: palavras-chave, nome do arquivo, número
+# da prancha e descrição do projeto. Mostra as divergências e o tempo de
+# extração de cada extrator; sai com código 1 se algum arquivo divergir.
+# Sem caminhos, usa o conjunto sintético de 100 pranchas do bench_lote.py.
+#
+# Uso: python benchmarks/concordancia_extratores.py [CAMINHO ...] [--extrator conteudo]
+#                                                   [--regiao auto] [--keywords ARQUIVO]
+import argparse
+import os
+import sys
+import time
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import PyPDF2  # noqa: E402
+
+from bench_lote import preparar_conjunto  # noqa: E402
+from verificador.analise import OPCOES_PADRAO, montar_automato, verificar_textos  # noqa: E402
+from verificador.cli import _regiao, ler_palavras_chave  # noqa: E402
+from verificador.entrada import abrir_pdfs  # noqa: E402
+from verificador.extratores import EXTRATOR_CONTEUDO, EXTRATOR_PYPDF2, EXTRATORES  # noqa: E402
+
+# Conjunto sintético usado quando nenhum caminho é informado
+PARAMETROS_CONJUNTO = {"paginas": 2, "densidade": 400, "vetores": 300, "semente": 42}
+
+# Campos do resultado comparados entre os extratores
+CAMPOS = ["nome_arquivo_encontrado", "prancha_encontrada", "projeto_encontrado"]
+
+
+# Resultado da busca com o texto de cada página obtido por `extrator`; devolve
+# o resultado e o tempo de extração
+def _verificar(leitor, nome, extrator, regiao, palavras_chave, opcoes, automato):
+    inicio = time.perf_counter()
+    textos = [EXTRATORES[extrator](pagina, regiao) for pagina in leitor.pages]
+    duracao = time.perf_counter() - inicio
+    return verificar_textos(nome, textos, palavras_chave, opcoes, automato), duracao
+
+
+# Diferenças entre dois resultados, em texto
+def _diferencas(resultado, referencia):
+    diferencas = []
+    for campo in CAMPOS:
+        if resultado[campo] != referencia[campo]:
+            diferencas.append(f"{campo}: {referencia[campo]} -> {resultado[campo]}")
+    so_referencia = [palavra for palavra in referencia['dados_carimbo'] if palavra not in resultado['dados_carimbo']]
+    so_resultado = [palavra for palavra in resultado['dados_carimbo'] if palavra not in referencia['dados_carimbo']]
+    if so_referencia:
+        diferencas.append(f"só no PyPDF2: {', '.join(so_referencia)}")
+    if so_resultado:
+        diferencas.append(f"só no outro extrator: {', '.join(so_resultado)}")
+    return diferencas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concordância da busca entre extratores de texto")
+    parser.add_argument("caminhos", nargs="*", help="Pastas, ZIPs ou PDFs (padrão: conjunto sintético)")
+    parser.add_argument("--extrator", choices=[nome for nome in EXTRATORES if nome != EXTRATOR_PYPDF2],
+                        default=EXTRATOR_CONTEUDO, help="Extrator comparado com o PyPDF2")
+    parser.add_argument("--regiao", type=_regiao, default=None,
+                        help="Extrair só a região do carimbo: auto, A0-A4 ou x0,y0,x1,y1")
+    parser.add_argument("--keywords", metavar="ARQUIVO", help="Palavras-chave adicionais, uma por linha")
+    args = parser.parse_args()
+
+    palavras_chave = ler_palavras_chave(args.keywords)
+    opcoes = dict(OPCOES_PADRAO)
+    caminhos = args.caminhos or [os.path.dirname(preparar_conjunto(100, PARAMETROS_CONJUNTO)[0])]
+
+    arquivos = paginas = erros = 0
+    divergentes = []
+    tempos = {EXTRATOR_PYPDF2: 0.0, args.extrator: 0.0}
+    for caminho in caminhos:
+        with abrir_pdfs(caminho) as pdfs:
+            for nome, ler in pdfs:
+                nome_arquivo = os.path.basename(nome)
+                try:
+                    leitor = PyPDF2.PdfReader(BytesIO(ler()))
+                    automato = montar_automato([nome_arquivo], palavras_chave, opcoes)
+                    resultados = {}
+                    for extrator in tempos:
+                        resultados[extrator], duracao = _verificar(leitor, nome_arquivo, extrator, args.regiao,
+                                                                   palavras_chave, opcoes, automato)
+                        tempos[extrator] += duracao
+                except Exception as e:
+                    print(f"ERRO\t{nome}\t{e}")
+                    erros += 1
+                    continue
+                arquivos += 1
+                paginas += len(leitor.pages)
+                diferencas = _diferencas(resultados[args.extrator], resultados[EXTRATOR_PYPDF2])
+                if diferencas:
+                    divergentes.append(nome)
+                    print(f"DIVERGE\t{nome}\t{'; '.join(diferencas)}")
+
+    print(f"{arquivos} arquivo(s), {paginas} página(s): {arquivos - len(divergentes)} concordam, "
+          f"{len(divergentes)} divergem, {erros} com erro")
+    for extrator, duracao in tempos.items():
+        print(f"  {extrator:>10}: {duracao:8.2f} s de extração ({paginas / duracao if duracao else 0:.1f} pág/s)")
+    if tempos[args.extrator]:
+        print(f"  {args.extrator} é {tempos[EXTRATOR_PYPDF2] / tempos[args.extrator]:.1f}x mais rápido")
+    return 1 if divergentes else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
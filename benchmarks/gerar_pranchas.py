@@ -0,0 +1,178 @@
+# Gerador de conjuntos sintéticos de pranchas em PDF para os benchmarks.
+# Cada arquivo imita uma prancha A1: linhas de desenho, cotas e rótulos
+# espalhados pela folha e o carimbo no canto inferior direito, com o nome do
+# arquivo, a descrição do projeto, o número da prancha, um engenheiro (nome e
+# CREA de ENGENHEIROS_CREAS_FIXOS) e palavras-chave do projeto. Os nomes seguem
+# o padrão PRJ-<CÓDIGO>-IPER-NN-NN[_assinado].pdf; a versão "_assinado" é a
+# prancha com uma atualização incremental de assinatura, como a gravada pelos
+# assinadores digitais. Tudo é determinístico (mesma semente, mesmos arquivos)
+# e feito sem bibliotecas externas.
+#
+# Uso: python benchmarks/gerar_pranchas.py DESTINO [--quantidade N] [--paginas N]
+#                                          [--densidade N] [--vetores N] [--semente N]
+import argparse
+import os
+import random
+import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from verificador.regras import ENGENHEIROS_CREAS_FIXOS, MAPEAMENTO_PROJETOS, PALAVRAS_CHAVE_PADRAO  # noqa: E402
+
+# Folha A1 em paisagem (pontos)
+LARGURA_A1 = 2384
+ALTURA_A1 = 1684
+
+# Versão dos conjuntos gerados; alterar faz os benchmarks gerarem tudo de novo
+VERSAO_CONJUNTO = 2
+
+PALAVRAS_DESENHO = ["COTA", "EIXO", "PAREDE", "QUADRO", "CIRCUITO", "ELETRODUTO", "TOMADA", "PILAR",
+                    "VIGA", "NÍVEL", "CORTE", "DETALHE", "ESCALA", "PLANTA", "ÁREA", "SALA", "ACESSO"]
+
+
+# Escapa um texto para uma string literal do PDF
+def _literal(texto):
+    return "(" + texto.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ")"
+
+
+# Conteúdo de uma página: desenho, textos espalhados e o carimbo
+def _conteudo_pagina(gerador, carimbo, densidade, vetores):
+    operadores = ["0.5 w"]
+    for _ in range(vetores):
+        operadores.append(f"{gerador.randint(20, 2300)} {gerador.randint(20, 1660)} m "
+                          f"{gerador.randint(20, 2300)} {gerador.randint(20, 1660)} l S")
+
+    # Carimbo: moldura de ~180 mm no canto inferior direito
+    operadores.append("1.5 w 1864 20 500 400 re S")
+    operadores.append("BT /F1 7 Tf")
+    for _ in range(densidade):
+        texto = f"{gerador.choice(PALAVRAS_DESENHO)} {gerador.randint(1, 999)}"
+        operadores.append(f"1 0 0 1 {gerador.randint(20, 1800)} {gerador.randint(20, 1660)} Tm {_literal(texto)} Tj")
+    operadores.append("/F1 10 Tf")
+    for linha, texto in enumerate(carimbo):
+        operadores.append(f"1 0 0 1 1880 {400 - 16 * linha} Tm {_literal(texto)} Tj")
+    operadores.append("ET")
+    return "\n".join(operadores).encode("cp1252")
+
+
+# Dicionário da página `indice` (objeto 4 + 2 * indice; o conteúdo vem logo depois)
+def _pagina(indice, largura, altura, extra=""):
+    return (f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {largura} {altura}] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * indice} 0 R{extra} >>").encode()
+
+
+# Função para montar um PDF com as páginas dadas (conteúdo já codificado)
+def montar_pdf(conteudos, largura=LARGURA_A1, altura=ALTURA_A1):
+    objetos = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        ("<< /Type /Pages /Kids [%s] /Count %d >>" % (
+            " ".join(f"{4 + 2 * indice} 0 R" for indice in range(len(conteudos))), len(conteudos))).encode(),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+    for indice, conteudo in enumerate(conteudos):
+        objetos.append(_pagina(indice, largura, altura))
+        objetos.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(conteudo), conteudo))
+
+    saida = bytearray(b"%PDF-1.4\n")
+    posicoes = []
+    for numero, objeto in enumerate(objetos, start=1):
+        posicoes.append(len(saida))
+        saida += b"%d 0 obj\n%s\nendobj\n" % (numero, objeto)
+    inicio_xref = len(saida)
+    saida += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objetos) + 1)
+    for posicao in posicoes:
+        saida += b"%010d 00000 n \n" % posicao
+    saida += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objetos) + 1, inicio_xref)
+    return bytes(saida)
+
+
+# Função para "assinar" um PDF gerado por montar_pdf: acrescenta uma
+# atualização incremental com o dicionário da assinatura, o campo com a sua
+# aparência e o catálogo e a primeira página regravados para apontar para
+# eles, sem mexer no conteúdo das páginas
+def assinar_pdf(conteudo, num_paginas, largura=LARGURA_A1, altura=ALTURA_A1):
+    inicio_xref = int(re.findall(rb"startxref\s+(\d+)", conteudo)[-1])
+    tamanho = 4 + 2 * num_paginas
+    assinatura, campo, aparencia = tamanho, tamanho + 1, tamanho + 2
+    texto = b"BT /F1 8 Tf 4 16 Td (ASSINADO DIGITALMENTE) Tj ET"
+    objetos = {
+        1: b"<< /Type /Catalog /Pages 2 0 R /AcroForm << /Fields [%d 0 R] /SigFlags 3 >> >>" % campo,
+        4: _pagina(0, largura, altura, f" /Annots [{campo} 0 R]"),
+        assinatura: b"<< /Type /Sig /Filter /Adobe.PPKLite /SubFilter /adbe.pkcs7.detached "
+                    b"/M (D:20240101000000-03'00') /Contents <%s> >>" % (b"0" * 1024),
+        campo: b"<< /Type /Annot /Subtype /Widget /FT /Sig /T (Assinatura1) /V %d 0 R /P 4 0 R "
+               b"/Rect [1864 420 2364 460] /F 132 /AP << /N %d 0 R >> >>" % (assinatura, aparencia),
+        aparencia: b"<< /Type /XObject /Subtype /Form /BBox [0 0 500 40] /Resources << /Font << /F1 3 0 R >> >> "
+                   b"/Length %d >>\nstream\n%s\nendstream" % (len(texto), texto),
+    }
+
+    saida = bytearray(conteudo)
+    posicoes = {}
+    for numero, objeto in objetos.items():
+        posicoes[numero] = len(saida)
+        saida += b"%d 0 obj\n%s\nendobj\n" % (numero, objeto)
+    novo_xref = len(saida)
+    saida += b"xref\n0 1\n0000000000 65535 f \n"
+    for numero in (1, 4):
+        saida += b"%d 1\n%010d 00000 n \n" % (numero, posicoes[numero])
+    saida += b"%d 3\n" % assinatura
+    for numero in (assinatura, campo, aparencia):
+        saida += b"%010d 00000 n \n" % posicoes[numero]
+    saida += b"trailer\n<< /Size %d /Root 1 0 R /Prev %d >>\nstartxref\n%d\n%%%%EOF\n" % (
+        aparencia + 1, inicio_xref, novo_xref)
+    return bytes(saida)
+
+
+# Função para gerar o conjunto de pranchas em `destino`. Metade das pranchas
+# também ganha a versão "_assinado" (veja assinar_pdf). Devolve a lista de
+# caminhos gerados.
+def gerar_conjunto(destino, quantidade, paginas=2, densidade=400, vetores=300, semente=42):
+    os.makedirs(destino, exist_ok=True)
+    gerador = random.Random(semente)
+    codigos = sorted(MAPEAMENTO_PROJETOS)
+    engenheiros = sorted(ENGENHEIROS_CREAS_FIXOS)
+    caminhos = []
+
+    indice = 0
+    while len(caminhos) < quantidade:
+        codigo = codigos[indice % len(codigos)]
+        grupo, folha = divmod(indice // len(codigos), 100)
+        nome = f"PRJ-{codigo}-IPER-{grupo:02d}-{folha:02d}"
+        engenheiro = engenheiros[indice % len(engenheiros)]
+        carimbo = [nome, MAPEAMENTO_PROJETOS[codigo], f"PRANCHA: {grupo:02d}-{folha:02d}",
+                   engenheiro, f"CREA: {ENGENHEIROS_CREAS_FIXOS[engenheiro][-1]}"]
+        carimbo += gerador.sample(PALAVRAS_CHAVE_PADRAO, 6)
+        conteudo = montar_pdf([_conteudo_pagina(gerador, carimbo, densidade, vetores) for _ in range(paginas)])
+
+        versoes = [("", conteudo)]
+        if indice % 2:
+            versoes.append(("_assinado", assinar_pdf(conteudo, paginas)))
+        for sufixo, dados in versoes:
+            if len(caminhos) < quantidade:
+                caminho = os.path.join(destino, f"{nome}{sufixo}.pdf")
+                with open(caminho, "wb") as arquivo:
+                    arquivo.write(dados)
+                caminhos.append(caminho)
+        indice += 1
+
+    return caminhos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera pranchas sintéticas em PDF para os benchmarks")
+    parser.add_argument("destino")
+    parser.add_argument("--quantidade", type=int, default=10)
+    parser.add_argument("--paginas", type=int, default=2, help="Páginas por arquivo")
+    parser.add_argument("--densidade", type=int, default=400, help="Textos (cotas e rótulos) por página")
+    parser.add_argument("--vetores", type=int, default=300, help="Linhas de desenho por página")
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+
+    caminhos = gerar_conjunto(args.destino, args.quantidade, args.paginas, args.densidade, args.vetores,
+                              args.semente)
+    print(f"{len(caminhos)} arquivo(s) gerado(s) em {args.destino}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# Latência da interface Streamlit: primeira execução do script em um processo
+# novo (imports do app e desenho da página, sem o import do próprio Streamlit)
+# e novas execuções após uma edição na barra lateral, sem resultados na tela e
+# com os resultados de uma análise terminada. Mostra também quais módulos
+# pesados (PyPDF2, pandas, numpy, openpyxl, pyarrow) já foram importados
+# depois da primeira execução. Cada medida roda em um processo novo (mediana
+# de --rodadas); a análise usada vem de um lote sintético de bench_lote.py,
+# enviado à fila em um diretório de cache temporário.
+#
+# Uso: python benchmarks/latencia_app.py [--app CAMINHO] [--arquivos 12] [--repeticoes 10] [--rodadas 3]
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PADRAO = os.path.join(RAIZ, "Verificar_carimbo_online.py")
+MODULOS_PESADOS = ["PyPDF2", "pandas", "numpy", "openpyxl", "pyarrow"]
+
+# Conjunto sintético da análise mostrada na tela
+PARAMETROS_CONJUNTO = {"paginas": 2, "densidade": 400, "vetores": 300, "semente": 42}
+
+
+# Envia um lote sintético à fila do diretório de cache e espera terminar;
+# devolve o id da tarefa
+def preparar_tarefa(diretorio, quantidade):
+    sys.path.insert(0, RAIZ)
+    from bench_lote import preparar_conjunto
+    from verificador.analise import OPCOES_PADRAO
+    from verificador.tarefas import TAREFAS_ATIVAS, FilaTarefas
+
+    caminhos = preparar_conjunto(quantidade, PARAMETROS_CONJUNTO)
+    arquivos = []
+    for caminho in caminhos:
+        with open(caminho, "rb") as arquivo:
+            arquivos.append((os.path.basename(caminho), arquivo.read()))
+    fila = FilaTarefas(diretorio)
+    tarefa_id = fila.enviar("benchmark", arquivos, [], dict(OPCOES_PADRAO),
+                            {"diretorio_cache": diretorio, "num_processos": 1, "tempo_limite": None,
+                             "memoria_limite": None})
+    while fila.obter(tarefa_id)['situacao'] in TAREFAS_ATIVAS:
+        time.sleep(0.2)
+    return tarefa_id
+
+
+# Mede o app no processo atual (chamado em um processo novo por medida)
+def medir(app, tarefa_id, repeticoes):
+    sys.path.insert(0, os.path.dirname(os.path.abspath(app)))
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(app, default_timeout=300)
+    if tarefa_id:
+        at.query_params["tarefa"] = tarefa_id
+    inicio = time.perf_counter()
+    at.run()
+    primeira = time.perf_counter() - inicio
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    if tarefa_id and not at.dataframe:
+        raise RuntimeError("os resultados da análise não apareceram na página")
+    modulos = [modulo for modulo in MODULOS_PESADOS if modulo in sys.modules]
+
+    # Cada edição nas palavras-chave executa o script de novo
+    tempos = []
+    for repeticao in range(repeticoes):
+        at.text_area[0].input(f"IPER\nSAUDE\n{repeticao}")
+        inicio = time.perf_counter()
+        at.run()
+        tempos.append(time.perf_counter() - inicio)
+    tempos.sort()
+    return {"primeira": primeira, "nova_execucao": tempos[len(tempos) // 2], "modulos": modulos}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latência da interface Streamlit")
+    parser.add_argument("--app", default=APP_PADRAO, help="Script do app (padrão: o deste repositório)")
+    parser.add_argument("--arquivos", type=int, default=12, help="Arquivos da análise mostrada na tela")
+    parser.add_argument("--repeticoes", type=int, default=10, help="Novas execuções medidas por processo")
+    parser.add_argument("--rodadas", type=int, default=3, help="Processos por cenário (vale a mediana)")
+    parser.add_argument("--medir", metavar="TAREFA", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.medir is not None:
+        print(json.dumps(medir(args.app, args.medir, args.repeticoes)))
+        return
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        tarefa_id = preparar_tarefa(diretorio, args.arquivos)
+        # O app abre a fila do diretório de cache padrão, que vem desta variável
+        ambiente = {**os.environ, "VERIFICADOR_CACHE_DIR": diretorio}
+        print(f"{'cenário':<16} {'primeira (ms)':>14} {'nova execução (ms)':>19}  módulos pesados importados")
+        for cenario, tarefa in (("sem resultados", ""), ("com resultados", tarefa_id)):
+            medidas = []
+            for _ in range(args.rodadas):
+                saida = subprocess.run([sys.executable, os.path.abspath(__file__), "--app", args.app,
+                                        "--repeticoes", str(args.repeticoes), "--medir", tarefa],
+                                       capture_output=True, text=True, env=ambiente, check=True)
+                medidas.append(json.loads(saida.stdout.strip().splitlines()[-1]))
+            primeira = sorted(medida["primeira"] for medida in medidas)[len(medidas) // 2]
+            nova_execucao = sorted(medida["nova_execucao"] for medida in medidas)[len(medidas) // 2]
+            print(f"{cenario:<16} {primeira * 1000:>14.0f} {nova_execucao * 1000:>19.0f}  "
+                  f"{', '.join(medidas[0]['modulos']) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
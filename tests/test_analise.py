@@ -0,0 +1,85 @@
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from gerar_pranchas import _conteudo_pagina, montar_pdf  # noqa: E402
+from verificador import analise  # noqa: E402
+from verificador.analise import PAGINAS_NOVA_TENTATIVA, analisar_lote  # noqa: E402
+from verificador.isolamento import SITUACAO_CONCLUIDO, SITUACAO_TEMPO_ESGOTADO, PoolIsolado  # noqa: E402
+from verificador.regras import MAPEAMENTO_PROJETOS  # noqa: E402
+
+PAGINAS = 10
+# Bem acima do tempo da nova tentativa de uma prancha pequena, e bem abaixo
+# da espera das tentativas que devem ser interrompidas
+TEMPO_LIMITE = 2
+ESPERA = 60
+
+NOME = "PRJ-SPDA-IPER-01-07.pdf"
+CARIMBO = ["PRJ-SPDA-IPER-01-07", MAPEAMENTO_PROJETOS["SPDA"], "PRANCHA: 01-07", "RODRIGO DAMASCENO NASCIMENTO",
+           "CREA: 092019291-2", "IPER"]
+
+
+# Tarefas do pool que passam do limite de tempo: só a primeira tentativa (sem
+# "limite_paginas" nas opções) ou todas. Rodam nos processos do pool, por
+# isso ficam no nível do módulo.
+def _espera_na_primeira_tentativa(funcao, nome, conteudo, palavras, opcoes, *argumentos):
+    if "limite_paginas" not in opcoes:
+        time.sleep(ESPERA)
+    return funcao(nome, conteudo, palavras, opcoes, *argumentos)
+
+
+def _espera_sempre(funcao, *argumentos):
+    time.sleep(ESPERA)
+    return funcao(*argumentos)
+
+
+# Analisa uma prancha com o pool trocado por um em que as tarefas passam por `espera`
+def _analisar_com_espera(monkeypatch, espera):
+    class PoolComEspera(PoolIsolado):
+        def enviar(self, chave, funcao, *argumentos):
+            super().enviar(chave, espera, funcao, *argumentos)
+
+    monkeypatch.setattr(analise, "PoolIsolado", PoolComEspera)
+    conteudo = montar_pdf([_conteudo_pagina(random.Random(42), CARIMBO, 40, 30) for _ in range(PAGINAS)])
+    resultados = list(analisar_lote([(NOME, conteudo)], ["IPER"], {"ordem_paginas": "todas"}, num_processos=1,
+                                    tempo_limite=TEMPO_LIMITE, memoria_limite=None))
+    [(indice, nome, resultado, erro)] = resultados
+    assert (indice, nome, erro) == (0, NOME, None)
+    return resultado
+
+
+# Um arquivo interrompido pelo limite de tempo sai com um resultado na nova
+# tentativa, que lê só as últimas páginas pela leitura direta do conteúdo
+def test_nova_tentativa_apos_tempo_esgotado(monkeypatch):
+    resultado = _analisar_com_espera(monkeypatch, _espera_na_primeira_tentativa)
+    assert resultado['situacao'] == f"{SITUACAO_CONCLUIDO} na nova tentativa ({SITUACAO_TEMPO_ESGOTADO.lower()})"
+    assert resultado['paginas_lidas'] <= PAGINAS_NOVA_TENTATIVA
+    assert {"RODRIGO DAMASCENO NASCIMENTO", "092019291-2", "IPER"} <= set(resultado['dados_carimbo'])
+    assert resultado['nome_arquivo_encontrado'] and resultado['prancha_encontrada'] and resultado['projeto_encontrado']
+
+
+# Interrompido também na nova tentativa: resultado vazio com a situação
+def test_tempo_esgotado_nas_duas_tentativas(monkeypatch):
+    resultado = _analisar_com_espera(monkeypatch, _espera_sempre)
+    assert resultado['situacao'] == SITUACAO_TEMPO_ESGOTADO
+    assert resultado['dados_carimbo'] == [] and resultado['paginas_lidas'] == 0
+
+
+# Com a normalização, cada grupo de variantes entra uma única vez em
+# dados_carimbo, na forma configurada que está no texto
+def test_uma_variante_por_grupo():
+    palavras = ["SAUDE", "SAÚDE", "0912111810", "091211181-0", "IPER"]
+    texto = f"{NOME[:-4]} SECRETARIA DA SAÚDE CREA: 091211181-0 iper"
+    resultado = analise.verificar_textos(NOME, [texto], palavras, {"normalizar": True})
+    assert sorted(palavra for palavra in resultado['dados_carimbo'] if palavra in palavras) == [
+        "091211181-0", "IPER", "SAÚDE"]
+    assert not [pendencia for pendencia in analise.pendencias_carimbo(resultado, None, palavras)
+                if pendencia.startswith("palavra-chave")]
+
+    resultado = analise.verificar_textos(NOME, [texto], palavras, {"normalizar": False})
+    assert "SAUDE" not in resultado['dados_carimbo'] and "SAÚDE" in resultado['dados_carimbo']
+    assert analise.pendencias_carimbo(resultado, None, palavras + ["OBRA", "Obra"])[-1:] == [
+        "palavra-chave 'OBRA' ou 'Obra'"]
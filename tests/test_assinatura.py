@@ -0,0 +1,59 @@
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from gerar_pranchas import _conteudo_pagina, assinar_pdf, montar_pdf  # noqa: E402
+from verificador.assinatura import revisao_incremental  # noqa: E402
+
+# Página 1 de montar_pdf, sem o ">>" do fim
+PAGINA = (b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 2384 1684] /Resources << /Font << /F1 3 0 R >> >> "
+          b"/Contents 5 0 R")
+
+
+# Prancha de duas páginas e a sua versão assinada (atualização incremental)
+def _original_e_assinado():
+    gerador = random.Random(1)
+    original = montar_pdf([_conteudo_pagina(gerador, ["PRJ-SPDA-IPER-01-07"], 20, 10) for _ in range(2)])
+    return original, assinar_pdf(original, 2)
+
+
+# Acrescenta ao PDF uma atualização incremental com os objetos dados
+def _atualizar(conteudo, objetos):
+    saida = bytearray(conteudo)
+    for numero, objeto in objetos.items():
+        saida += b"%d 0 obj\n%s\nendobj\n" % (numero, objeto)
+    saida += b"trailer\n<< /Size 20 /Root 1 0 R >>\nstartxref\n0\n%%EOF\n"
+    return bytes(saida)
+
+
+def test_assinatura_reaproveita_o_original():
+    original, assinado = _original_e_assinado()
+    assert revisao_incremental(assinado, len(original))
+    assert revisao_incremental(original, len(original))
+    assert revisao_incremental(_atualizar(original, {9: b"<< /Producer (Assinador) /ModDate (D:20240101) >>"}),
+                               len(original))
+
+
+@pytest.mark.parametrize("objetos", [
+    # Página com outra área, rotação ou recursos
+    {4: PAGINA.replace(b"[0 0 2384 1684]", b"[0 0 1684 2384]") + b" >>"},
+    {4: PAGINA + b" /Rotate 90 >>"},
+    {4: PAGINA.replace(b"/F1 3 0 R", b"/F1 8 0 R") + b" >>",
+     8: b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier >>"},
+    # Árvore de páginas regravada, catálogo apontando para outra árvore ou página nova
+    {2: b"<< /Type /Pages /Kids [4 0 R] /Count 1 >>"},
+    {1: b"<< /Type /Catalog /Pages 12 0 R >>", 12: b"<< /Type /Pages /Kids [4 0 R] /Count 1 >>"},
+    {12: PAGINA + b" >>"},
+    # Fonte ou dicionário de recursos regravados
+    {3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier /Encoding /WinAnsiEncoding >>"},
+    {3: b"<< /Font << /F1 9 0 R >> >>"},
+    # Conteúdo da página regravado
+    {5: b"<< /Length 5 >>\nstream\nBT ET\nendstream"},
+])
+def test_atualizacao_que_muda_as_paginas_nao_reaproveita(objetos):
+    original, _ = _original_e_assinado()
+    assert not revisao_incremental(_atualizar(original, objetos), len(original))
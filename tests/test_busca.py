@@ -0,0 +1,84 @@
+import random
+
+import pytest
+
+from verificador import busca
+from verificador.analise import montar_automato
+from verificador.busca import (
+    LIMITE_VARREDURA,
+    buscar_padroes,
+    compilar_automato,
+    padroes_da_mascara,
+    percorrer_automato,
+    varrer_padroes,
+)
+from verificador.normalizacao import normalizar_palavra, normalizar_texto
+from verificador.regras import PALAVRAS_CHAVE_ENGENHEIROS, PALAVRAS_CHAVE_PADRAO
+
+
+# Padrões encontrados por um `in` para cada um, na ordem do autômato
+def _busca_ingenua(automato, texto):
+    return [padrao for padrao in automato['padroes'] if padrao in texto]
+
+
+# Padrões que se sobrepõem, um dentro do outro ou com prefixos e sufixos em comum
+@pytest.mark.parametrize("padroes, texto", [
+    (["he", "she", "his", "hers"], "ushers"),
+    (["a", "aa", "aaa", "aaaa"], "aaa"),
+    (["abcd", "bc", "bcd", "c", "cde"], "xabcdex"),
+    (["092019291-2", "19291", "CREA", "CREA: 0920"], "CREA: 092019291-2"),
+    (["PRANCHA 01-07", "01-07", "01_07", "1-0"], "PRANCHA 01-07 / 01 07"),
+    (["ABC", "BCD"], ""),
+    (["SAÚDE", "SAUDE", "ÚDE"], "SECRETARIA DA SAÚDE"),
+])
+def test_automato_igual_a_busca_ingenua(padroes, texto):
+    automato = compilar_automato(padroes)
+    assert padroes_da_mascara(automato, percorrer_automato(automato, texto)) == _busca_ingenua(automato, texto)
+
+
+# Textos e padrões aleatórios com um alfabeto pequeno, para haver muitas sobreposições
+def test_automato_igual_a_busca_ingenua_aleatoria():
+    gerador = random.Random(7)
+    for _ in range(200):
+        padroes = ["".join(gerador.choice("ab-1") for _ in range(gerador.randint(1, 6)))
+                   for _ in range(gerador.randint(1, 30))]
+        texto = "".join(gerador.choice("ab-1 ") for _ in range(gerador.randint(0, 80)))
+        automato = compilar_automato(padroes)
+        mascara = percorrer_automato(automato, texto)
+        assert padroes_da_mascara(automato, mascara) == _busca_ingenua(automato, texto)
+        assert mascara == varrer_padroes(automato, texto, (1 << len(automato['padroes'])) - 1)
+
+
+# Acima de LIMITE_VARREDURA padrões a busca passa pelo autômato, inclusive com
+# um alvo (só os padrões de um arquivo)
+def test_busca_acima_do_limite_usa_o_automato(monkeypatch):
+    gerador = random.Random(3)
+    padroes = list(dict.fromkeys("".join(gerador.choice("ABC-0") for _ in range(gerador.randint(2, 8)))
+                                 for _ in range(3 * LIMITE_VARREDURA)))
+    assert len(padroes) > LIMITE_VARREDURA
+    texto = "".join(gerador.choice("ABC-0 ") for _ in range(5000))
+    automato = compilar_automato(padroes)
+
+    chamadas = []
+    monkeypatch.setattr(busca, "percorrer_automato",
+                        lambda *argumentos: chamadas.append(1) or percorrer_automato(*argumentos))
+    todos = (1 << len(padroes)) - 1
+    alvo = todos & ~0b1010101
+    assert padroes_da_mascara(automato, buscar_padroes(automato, texto)) == _busca_ingenua(automato, texto)
+    assert buscar_padroes(automato, texto, alvo) == varrer_padroes(automato, texto, alvo)
+    assert len(chamadas) == 2
+
+
+# Autômato de uma análise com a normalização, forçado para todas as buscas:
+# o mesmo resultado de um `in` sobre o texto normalizado
+@pytest.mark.parametrize("normalizar", [False, True])
+def test_automato_da_analise(monkeypatch, normalizar):
+    monkeypatch.setattr(busca, "LIMITE_VARREDURA", 0)
+    nomes = ["PRJ-SPDA-IPER-01-07.pdf", "PRJ-ECX-IPER-02-07_assinado.pdf"]
+    automato = montar_automato(nomes, ["Saúde", "SAUDE", "IPER"], {"normalizar": normalizar})
+    texto = ("PRJ-SPDA-IPER-01-07  Secretaria da SAÚDE\nPRANCHA: 01-07 CREA: 092019291-2 "
+             + " ".join(PALAVRAS_CHAVE_ENGENHEIROS[:4] + PALAVRAS_CHAVE_PADRAO))
+    if normalizar:
+        texto = normalizar_texto(texto)
+        assert automato['indices'][normalizar_palavra("SAUDE")] == automato['indices'][normalizar_palavra("Saúde")]
+    assert padroes_da_mascara(automato, buscar_padroes(automato, texto)) == _busca_ingenua(automato, texto)
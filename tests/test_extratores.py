@@ -0,0 +1,47 @@
+import os
+import sys
+from io import BytesIO
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+import PyPDF2  # noqa: E402
+
+from gerar_pranchas import gerar_conjunto  # noqa: E402
+from verificador.analise import montar_automato, verificar_textos  # noqa: E402
+from verificador.extratores import EXTRATOR_CONTEUDO, EXTRATOR_PYPDF2, EXTRATORES  # noqa: E402
+from verificador.regiao import REGIAO_AUTOMATICA  # noqa: E402
+from verificador.regras import PALAVRAS_CHAVE_PADRAO  # noqa: E402
+
+# Campos do resultado que dependem do texto extraído
+CAMPOS = ["dados_carimbo", "nome_arquivo_encontrado", "prancha_encontrada", "projeto_encontrado"]
+
+
+# Pequeno conjunto sintético: todos os projetos e engenheiros, acentos no
+# desenho e no carimbo e metade das pranchas com a versão assinada
+@pytest.fixture(scope="module")
+def conjunto(tmp_path_factory):
+    destino = tmp_path_factory.mktemp("pranchas")
+    return gerar_conjunto(str(destino), 30, paginas=2, densidade=80, vetores=20, semente=7)
+
+
+# A leitura direta do conteúdo encontra o mesmo que o PyPDF2 em cada arquivo,
+# na página inteira e na região do carimbo, com e sem a normalização
+@pytest.mark.parametrize("regiao", [None, REGIAO_AUTOMATICA, "A1"])
+@pytest.mark.parametrize("normalizar", [False, True])
+def test_extratores_concordam(conjunto, regiao, normalizar):
+    opcoes = {"regiao_carimbo": regiao, "normalizar": normalizar}
+    for caminho in conjunto:
+        nome = os.path.basename(caminho)
+        with open(caminho, "rb") as arquivo:
+            leitor = PyPDF2.PdfReader(BytesIO(arquivo.read()))
+        automato = montar_automato([nome], PALAVRAS_CHAVE_PADRAO, opcoes)
+        resultados = {}
+        for extrator in (EXTRATOR_PYPDF2, EXTRATOR_CONTEUDO):
+            textos = [EXTRATORES[extrator](pagina, regiao) for pagina in leitor.pages]
+            resultado = verificar_textos(nome, textos, PALAVRAS_CHAVE_PADRAO, opcoes, automato)
+            resultados[extrator] = {campo: resultado[campo] for campo in CAMPOS}
+        assert resultados[EXTRATOR_CONTEUDO] == resultados[EXTRATOR_PYPDF2], nome
+        # O carimbo sintético está completo: a concordância não é só "nada encontrado"
+        assert resultados[EXTRATOR_PYPDF2]['nome_arquivo_encontrado'], nome
@@ -0,0 +1,60 @@
+import pytest
+
+from verificador.normalizacao import creas_das_palavras, normalizar_palavra, normalizar_texto
+
+CREAS = creas_das_palavras(("092019291-2", "A278773-3", "0912111810", "IPER"))
+
+
+def test_acentos():
+    assert normalizar_texto("SAÚDE Área NÍVEL ação Çà") == "saude area nivel acao ca"
+    # Letras decompostas (acento separado) também perdem o acento
+    assert normalizar_texto("SAU\u0301DE") == "saude"
+
+
+def test_casefold():
+    assert normalizar_texto("Straße") == normalizar_texto("STRASSE") == "strasse"
+    assert normalizar_texto("PRJ-ECX-IPER") == "prj-ecx-iper"
+
+
+def test_espacos():
+    assert normalizar_texto("  PROJETO\tELÉTRICO\n\nDE   BAIXA \r\n") == "projeto eletrico de baixa"
+    assert normalizar_texto("") == ""
+
+
+# Palavras-chave que são CREAs perdem o separador do dígito verificador
+@pytest.mark.parametrize("palavra, forma", [
+    ("092019291-2", "0920192912"),
+    ("092019291.2", "0920192912"),
+    ("092019291/2", "0920192912"),
+    ("0920192912", "0920192912"),
+    ("A278773-3", "a2787733"),
+    # Outras palavras ficam só com a normalização comum
+    ("01-07", "01-07"),
+    ("12345-6", "12345-6"),
+    ("123456.78", "123456.78"),
+    ("CREA 092019291-2", "crea 092019291-2"),
+])
+def test_crea_na_palavra(palavra, forma):
+    assert normalizar_palavra(palavra) == forma
+
+
+def test_creas_das_palavras():
+    assert CREAS == {"0920192912", "2787733", "0912111810"}
+
+
+# No texto, só os números de um CREA configurado perdem o separador
+@pytest.mark.parametrize("texto, normalizado", [
+    ("CREA: 092019291-2", "crea: 0920192912"),
+    ("CREA-RR A278773-3", "crea-rr a2787733"),
+    ("CREA 091211181-0 / 091211181.0", "crea 0912111810 / 0912111810"),
+    ("valor 123456.7 e CEP 69301-110", "valor 123456.7 e cep 69301-110"),
+    ("prancha 01-07", "prancha 01-07"),
+    # Mais dígitos antes ou depois: outro número
+    ("1092019291-2 092019291-23", "1092019291-2 092019291-23"),
+])
+def test_crea_no_texto(texto, normalizado):
+    assert normalizar_texto(texto, CREAS) == normalizado
+
+
+def test_crea_no_texto_sem_creas_configurados():
+    assert normalizar_texto("CREA: 092019291-2") == "crea: 092019291-2"
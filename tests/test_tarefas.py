@@ -0,0 +1,81 @@
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from gerar_pranchas import _conteudo_pagina, montar_pdf  # noqa: E402
+from verificador import tarefas  # noqa: E402
+from verificador.tarefas import (  # noqa: E402
+    TAREFA_CONCLUIDA,
+    TAREFA_EM_ANDAMENTO,
+    TAREFA_NA_FILA,
+    TAREFAS_ATIVAS,
+    FilaTarefas,
+)
+
+# Análise no próprio processo, sem cache: a tarefa termina rápido
+PARAMETROS = {"num_processos": 1, "tempo_limite": None, "memoria_limite": None, "usar_cache": False,
+              "usar_textos": False}
+
+
+def _arquivos(quantidade=3):
+    gerador = random.Random(5)
+    return [(f"PRJ-SPDA-IPER-01-{indice:02d}.pdf",
+             montar_pdf([_conteudo_pagina(gerador, [f"PRJ-SPDA-IPER-01-{indice:02d}", "IPER"], 10, 5)]))
+            for indice in range(1, quantidade + 1)]
+
+
+def _esperar(fila, tarefa_id, situacoes=TAREFAS_ATIVAS, limite=60):
+    fim = time.monotonic() + limite
+    while fila.obter(tarefa_id)['situacao'] in situacoes:
+        assert time.monotonic() < fim
+        time.sleep(0.05)
+    return fila.obter(tarefa_id)
+
+
+# Uma segunda fila no mesmo banco (outro caminho para o mesmo diretório ou
+# outro processo do servidor) não roda de novo a tarefa em andamento
+def test_segunda_fila_nao_repete_a_tarefa_em_andamento(tmp_path, monkeypatch):
+    chamadas = []
+    liberar = threading.Event()
+    analisar_lote = tarefas.analisar_lote
+
+    def analisar_lote_contado(*argumentos):
+        chamadas.append(1)
+        liberar.wait(30)
+        yield from analisar_lote(*argumentos)
+
+    monkeypatch.setattr(tarefas, "analisar_lote", analisar_lote_contado)
+    diretorio = str(tmp_path)
+    fila = FilaTarefas(diretorio)
+    tarefa_id = fila.enviar("sessao", _arquivos(), ["IPER"], {}, {**PARAMETROS, "diretorio_cache": diretorio})
+    _esperar(fila, tarefa_id, (TAREFA_NA_FILA,))
+    while not chamadas:
+        time.sleep(0.05)
+
+    FilaTarefas(diretorio + os.sep)
+    liberar.set()
+    tarefa = _esperar(fila, tarefa_id)
+    assert tarefa['situacao'] == TAREFA_CONCLUIDA
+    assert len(chamadas) == 1
+    assert tarefa['processados'] == tarefa['total'] == 3
+
+
+# Só a tarefa sem sinal de vida volta para a fila e é retomada
+def test_tarefa_abandonada_e_retomada(tmp_path):
+    diretorio = str(tmp_path)
+    parado = FilaTarefas(diretorio, max_simultaneas=0)
+    parametros = {**PARAMETROS, "diretorio_cache": diretorio}
+    abandonada = parado.enviar("a", _arquivos(), ["IPER"], {}, parametros)
+    viva = parado.enviar("b", _arquivos(), ["IPER"], {}, parametros)
+    for tarefa_id, pulso in ((abandonada, time.time() - 3600), (viva, time.time())):
+        parado.conexao.execute("UPDATE tarefas SET situacao = ?, dono = ?, pulso = ? WHERE id = ?",
+                               (TAREFA_EM_ANDAMENTO, "outro processo", pulso, tarefa_id))
+    parado.conexao.commit()
+
+    fila = FilaTarefas(diretorio)
+    assert _esperar(fila, abandonada)['situacao'] == TAREFA_CONCLUIDA
+    assert fila.obter(viva)['situacao'] == TAREFA_EM_ANDAMENTO
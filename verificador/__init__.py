@@ -0,0 +1,93 @@
+from .regras import (
+    DIRETORIO_REGRAS_PADRAO,
+    ENGENHEIROS_CREAS_FIXOS,
+    MAPEAMENTO_PROJETOS,
+    PALAVRAS_CHAVE_ENGENHEIROS,
+    PALAVRAS_CHAVE_PADRAO,
+    REGRAS_PADRAO,
+    Regras,
+    carregar_regras,
+    compilar_regras,
+    extrair_codigo_projeto,
+    extrair_numero_prancha,
+    listar_regras,
+    verificar_assinatura_nome,
+)
+from .busca import buscar_padroes, compilar_automato, padrao_encontrado, padroes_da_mascara
+from .normalizacao import creas_das_palavras, normalizar_palavra, normalizar_texto
+from .cache import (
+    DIRETORIO_CACHE_PADRAO,
+    TAMANHO_MAXIMO_CACHE_PADRAO,
+    CacheResultados,
+    hash_conteudo,
+    impressao_regras,
+)
+from .entrada import abrir_pdfs, eh_pdf, eh_zip, entradas_envios, entradas_zip
+from .regiao import FORMATOS_FOLHA, REGIAO_AUTOMATICA, REGIOES_CARIMBO, detectar_formato
+from .textos import ArmazemTextos
+from .conteudo import extrair_texto_conteudo
+from .extratores import (
+    EXTRATOR_CONTEUDO,
+    EXTRATOR_PADRAO,
+    EXTRATOR_PYPDF2,
+    EXTRATORES,
+    ROTULOS_EXTRATORES,
+    texto_pagina,
+)
+from .assinatura import pares_assinados, revisao_incremental
+from .isolamento import (
+    MEMORIA_LIMITE_PADRAO,
+    SITUACAO_CONCLUIDO,
+    SITUACAO_MEMORIA_EXCEDIDA,
+    SITUACAO_PROCESSO_ENCERRADO,
+    SITUACAO_TEMPO_ESGOTADO,
+    SITUACOES_INTERROMPIDAS,
+    TEMPO_LIMITE_PADRAO,
+    PoolIsolado,
+)
+from .analise import (
+    MEMORIA_MAXIMA_PADRAO,
+    MODO_PAGINA_INTEIRA,
+    OPCOES_NOVA_TENTATIVA,
+    OPCOES_PADRAO,
+    ORDEM_PRIMEIRA_PRIMEIRO,
+    ORDEM_TODAS,
+    ORDEM_ULTIMA_PRIMEIRO,
+    PAGINAS_NOVA_TENTATIVA,
+    analisar_lote,
+    arquivo_interrompido,
+    carimbo_completo,
+    modo_extracao,
+    montar_automato,
+    numero_processos_padrao,
+    ordem_paginas,
+    pendencias_carimbo,
+    verificar_textos,
+)
+from .relatorio import (
+    CABECALHOS_DIAGNOSTICO,
+    CABECALHOS_EXCEL,
+    COLUNAS_SIM_NAO,
+    gerar_csv,
+    gerar_excel,
+    gerar_parquet,
+    linha_diagnostico,
+    linha_tabela,
+    montar_tabela,
+    montar_tabela_diagnostico,
+)
+from .diagnostico import perfilar, resumo_perfil
+from .estatisticas import MatrizPresenca, montar_matriz, resumir_matriz
+from .monitor import ARQUIVO_ALTERADO, ARQUIVO_NOVO, ARQUIVO_REMOVIDO, MonitorPasta, arquivo_estado_padrao
+from .tarefas import (
+    LIMITE_POR_SESSAO_PADRAO,
+    MAX_SIMULTANEAS_PADRAO,
+    PARAMETROS_PADRAO,
+    TAREFA_CANCELADA,
+    TAREFA_CONCLUIDA,
+    TAREFA_EM_ANDAMENTO,
+    TAREFA_FALHOU,
+    TAREFA_NA_FILA,
+    TAREFAS_ATIVAS,
+    FilaTarefas,
+)
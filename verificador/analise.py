@@ -0,0 +1,729 @@
+import os
+import time
+from io import BytesIO
+
+from .assinatura import pares_assinados, revisao_incremental
+from .busca import buscar_padroes, compilar_automato, padrao_encontrado
+from .cache import hash_conteudo, impressao_regras
+from .extratores import EXTRATOR_CONTEUDO, EXTRATOR_PADRAO, ROTULOS_EXTRATORES, texto_pagina
+from .isolamento import (
+    MEMORIA_LIMITE_PADRAO,
+    SITUACAO_CONCLUIDO,
+    SITUACOES_INTERROMPIDAS,
+    TEMPO_LIMITE_PADRAO,
+    PoolIsolado,
+)
+from .normalizacao import creas_das_palavras, normalizar_palavra, normalizar_texto
+from .regras import REGRAS_PADRAO, extrair_codigo_projeto, extrair_numero_prancha, verificar_assinatura_nome
+
+# O PyPDF2 é importado só nas funções que abrem os PDFs: a interface importa
+# o pacote na partida e só precisa dele quando uma análise roda
+
+# Opções padrão da análise (mesmos valores padrão da barra lateral)
+OPCOES_PADRAO = {
+    "check_filename": True,
+    "check_sheet_number": True,
+    "check_projeto": True,
+    # None extrai a página inteira; um formato ("A1", "Automático"...) ou um
+    # retângulo (x0, y0, x1, y1) restringe a extração à região do carimbo
+    "regiao_carimbo": None,
+    # Ordem de leitura das páginas; fora de ORDEM_TODAS, a leitura para assim
+    # que o carimbo estiver completo (veja carimbo_completo)
+    "ordem_paginas": "todas",
+    # Extrator do texto (veja extratores.EXTRATORES); com um extrator que não
+    # seja o padrão, se o carimbo não estiver completo a página inteira é
+    # extraída de novo pelo PyPDF2
+    "extrator": EXTRATOR_PADRAO,
+    # Busca sobre a forma normalizada do texto e das palavras-chave (sem
+    # acentos, maiúsculas, espaços repetidos e separador do dígito dos CREAs;
+    # veja normalizacao.py): variantes como "SAUDE" e "SAÚDE" viram um único
+    # padrão e a forma que falta na lista não passa despercebida
+    "normalizar": True,
+}
+
+# Limite padrão de bytes de PDFs em andamento ao mesmo tempo no pool
+MEMORIA_MAXIMA_PADRAO = 512 * 1024 * 1024
+
+# Modos de extração, usados também como chave do armazém de textos
+MODO_PAGINA_INTEIRA = "pagina"
+
+# Ordens de leitura das páginas
+ORDEM_TODAS = "todas"
+ORDEM_PRIMEIRA_PRIMEIRO = "primeira_primeiro"
+ORDEM_ULTIMA_PRIMEIRO = "ultima_primeiro"
+
+# Páginas lidas, no máximo, na nova tentativa de um arquivo interrompido
+PAGINAS_NOVA_TENTATIVA = 3
+
+# Opções da nova tentativa de um arquivo interrompido (tempo, memória ou
+# processo encerrado), bem mais barata que a primeira: texto pela leitura
+# direta do conteúdo, sem o fallback para a página inteira pelo PyPDF2, e no
+# máximo PAGINAS_NOVA_TENTATIVA páginas, da última para a primeira, parando
+# assim que o carimbo estiver completo. As chaves "fallback" e
+# "limite_paginas" existem só aqui (fora de OPCOES_PADRAO, para não mudar a
+# impressão do cache): o resultado da nova tentativa não vai para o cache.
+OPCOES_NOVA_TENTATIVA = {
+    "ordem_paginas": ORDEM_ULTIMA_PRIMEIRO,
+    "extrator": EXTRATOR_CONTEUDO,
+    "fallback": False,
+    "limite_paginas": PAGINAS_NOVA_TENTATIVA,
+}
+
+
+# Número padrão de processos: um por núcleo disponível
+def numero_processos_padrao():
+    return os.cpu_count() or 1
+
+
+# Função para separar os dados que vêm do nome do arquivo
+def _dados_do_nome(nome_original, regras=REGRAS_PADRAO):
+    # Extrair o nome do arquivo sem a extensão
+    nome_arquivo = os.path.splitext(nome_original)[0]
+
+    # Extrair o número da prancha (removendo "_assinado" se existir)
+    nome_sem_assinado = nome_arquivo.replace("_assinado", "")
+    numero_prancha = extrair_numero_prancha(nome_sem_assinado, regras)
+
+    # Extrair o código do projeto
+    codigo_projeto = extrair_codigo_projeto(nome_original, regras)
+    descricao_projeto = regras.projetos.get(codigo_projeto, "Desconhecido") if codigo_projeto else "Não identificado"
+
+    return nome_arquivo, nome_sem_assinado, numero_prancha, codigo_projeto, descricao_projeto
+
+
+# Forma de um padrão no autômato: a canônica, com a normalização, ou o próprio texto
+def _forma(padrao, normalizar):
+    return normalizar_palavra(padrao) if normalizar else padrao
+
+
+# Variantes do número da prancha procuradas no texto ("01 07", "01_07" e "01-07")
+def _variantes_prancha(numero_prancha):
+    return [numero_prancha.replace(" ", "_"), numero_prancha.replace(" ", "-"), numero_prancha]
+
+
+# Função para montar o autômato de busca de uma análise: palavras-chave dos
+# engenheiros, palavras-chave adicionais e, para cada arquivo, o nome, as
+# variantes do número da prancha e a descrição do projeto. Em cada página só
+# os padrões do próprio arquivo são procurados (veja busca.buscar_padroes).
+# Engenheiros, projetos e padrões do nome vêm de `regras` (veja regras.Regras).
+# Com a opção "normalizar", os padrões entram na forma canônica, e variantes
+# de uma mesma palavra ocupam uma única posição.
+def montar_automato(nomes_arquivos, palavras_chave_adicionais, opcoes=None, regras=REGRAS_PADRAO):
+    opcoes = {**OPCOES_PADRAO, **(opcoes or {})}
+    padroes = list(regras.palavras_engenheiros) + list(palavras_chave_adicionais)
+
+    for nome_original in nomes_arquivos:
+        _, nome_sem_assinado, numero_prancha, codigo_projeto, descricao_projeto = _dados_do_nome(nome_original,
+                                                                                                 regras)
+        if opcoes["check_filename"]:
+            padroes.append(nome_sem_assinado)
+        if opcoes["check_sheet_number"] and numero_prancha:
+            padroes.extend(_variantes_prancha(numero_prancha))
+        if opcoes["check_projeto"] and codigo_projeto and descricao_projeto != "Desconhecido":
+            padroes.append(descricao_projeto)
+
+    return compilar_automato([_forma(padrao, opcoes["normalizar"]) for padrao in padroes])
+
+
+# Índices das páginas na ordem de leitura configurada
+def ordem_paginas(num_paginas, ordem):
+    if ordem == ORDEM_ULTIMA_PRIMEIRO:
+        return range(num_paginas - 1, -1, -1)
+    return range(num_paginas)
+
+
+# Identificador do modo de extração das opções (área e, fora do padrão, o extrator)
+def modo_extracao(opcoes):
+    regiao = opcoes.get("regiao_carimbo")
+    if regiao is None:
+        modo = MODO_PAGINA_INTEIRA
+    elif isinstance(regiao, str):
+        modo = f"regiao:{regiao}"
+    else:
+        modo = "regiao:" + ",".join(f"{valor:g}" for valor in regiao)
+    extrator = opcoes.get("extrator", EXTRATOR_PADRAO)
+    return modo if extrator == EXTRATOR_PADRAO else f"{extrator}:{modo}"
+
+
+# Função para listar o que faltou no carimbo de um arquivo: nenhum engenheiro
+# encontrado ou alguma verificação ativa não atendida. Com
+# `palavras_chave_adicionais`, cada grupo de variantes sem nenhuma encontrada
+# também é listado (veja _grupos_palavras).
+def pendencias_carimbo(resultado, opcoes=None, palavras_chave_adicionais=None, regras=REGRAS_PADRAO):
+    opcoes = {**OPCOES_PADRAO, **(opcoes or {})}
+    if arquivo_interrompido(resultado):
+        return [resultado['situacao'].lower()]
+    pendencias = []
+    if not any(palavra in regras.engenheiro_da_palavra for palavra in resultado['dados_carimbo']):
+        pendencias.append("nenhum engenheiro")
+    if opcoes["check_filename"] and not resultado['nome_arquivo_encontrado']:
+        pendencias.append("nome do arquivo")
+    if opcoes["check_sheet_number"] and resultado['numero_prancha'] and not resultado['prancha_encontrada']:
+        pendencias.append("número da prancha")
+    if (opcoes["check_projeto"] and resultado['codigo_projeto'] and
+            resultado['descricao_projeto'] != "Desconhecido" and not resultado['projeto_encontrado']):
+        pendencias.append("descrição do projeto")
+    encontradas = set(resultado['dados_carimbo'])
+    for grupo in _grupos_palavras(palavras_chave_adicionais):
+        if not encontradas.intersection(grupo):
+            pendencias.append("palavra-chave " + " ou ".join(f"'{palavra}'" for palavra in grupo))
+    return pendencias
+
+
+# Função para verificar se a análise do arquivo foi interrompida (tempo
+# esgotado, memória excedida ou processo encerrado) mesmo após a nova tentativa
+def arquivo_interrompido(resultado):
+    return resultado.get('situacao') in SITUACOES_INTERROMPIDAS
+
+
+# Resultado de um arquivo cuja análise foi interrompida: os dados do nome são
+# preenchidos e nada consta como encontrado
+def _resultado_interrompido(nome_original, situacao, regras=REGRAS_PADRAO):
+    nome_arquivo, _, numero_prancha, codigo_projeto, descricao_projeto = _dados_do_nome(nome_original, regras)
+    return {
+        'dados_carimbo': [],
+        'nome_arquivo_encontrado': False,
+        'prancha_encontrada': False,
+        'assinado_pelo_nome': verificar_assinatura_nome(nome_original),
+        'projeto_encontrado': False,
+        'codigo_projeto': codigo_projeto,
+        'descricao_projeto': descricao_projeto,
+        'numero_prancha': numero_prancha,
+        'nome_arquivo': nome_arquivo,
+        'paginas_lidas': 0,
+        'paginas_puladas': None,
+        'modo_extracao': "-",
+        'situacao': situacao
+    }
+
+
+# Grupos das palavras-chave adicionais pela forma canônica: a lista costuma
+# ter variantes ("SAUDE" e "SAÚDE") que nunca aparecem juntas, e qualquer uma
+# delas atende o grupo
+def _grupos_palavras(palavras_chave_adicionais):
+    grupos = {}
+    for palavra in palavras_chave_adicionais or []:
+        grupos.setdefault(normalizar_palavra(palavra), []).append(palavra)
+    return list(grupos.values())
+
+
+# Função para verificar se o carimbo encontrado está completo: ao menos um
+# engenheiro, todas as verificações ativas atendidas e uma palavra de cada
+# grupo de palavras-chave adicionais. É a regra da parada antecipada da
+# leitura (verificar_textos) e do fallback para a página inteira.
+def carimbo_completo(resultado, opcoes, palavras_chave_adicionais=None, regras=REGRAS_PADRAO):
+    return not pendencias_carimbo(resultado, opcoes, palavras_chave_adicionais, regras)
+
+
+# Variante de um grupo a registrar como encontrada: a que está no texto da
+# página (sem as quebras de linha) como foi configurada, senão a que está sem
+# diferença de maiúsculas, senão a primeira do grupo
+def _variante_no_texto(variantes, texto):
+    if len(variantes) == 1:
+        return variantes[0]
+    texto = texto.replace("\n", " ")
+    for palavra in variantes:
+        if palavra in texto:
+            return palavra
+    texto = texto.casefold()
+    for palavra in variantes:
+        if palavra.casefold() in texto:
+            return palavra
+    return variantes[0]
+
+
+# Função para verificar as palavras-chave e os dados do nome do arquivo no
+# texto das páginas. `textos` tem uma posição por página; posições None são
+# páginas ainda não extraídas, obtidas sob demanda por `extrair_pagina(indice)`
+# (sem ela, a função devolve None). Assim, quando só as palavras-chave ou as
+# opções mudam, a busca é refeita sem abrir o PDF, e na leitura com parada
+# antecipada as páginas restantes nem chegam a ser extraídas. Se o autômato da
+# análise não for informado, um autômato só para este arquivo é montado.
+def verificar_textos(nome_original, textos, palavras_chave_adicionais, opcoes=None, automato=None,
+                     extrair_pagina=None, regras=REGRAS_PADRAO):
+    opcoes = {**OPCOES_PADRAO, **(opcoes or {})}
+    check_filename = opcoes["check_filename"]
+    check_sheet_number = opcoes["check_sheet_number"]
+    check_projeto = opcoes["check_projeto"]
+    normalizar = opcoes["normalizar"]
+
+    if automato is None:
+        automato = montar_automato([nome_original], palavras_chave_adicionais, opcoes, regras)
+
+    nome_arquivo, nome_sem_assinado, numero_prancha, codigo_projeto, descricao_projeto = _dados_do_nome(nome_original,
+                                                                                                        regras)
+    verificar_prancha = check_sheet_number and numero_prancha
+    verificar_projeto = check_projeto and codigo_projeto and descricao_projeto != "Desconhecido"
+
+    # Verificar se o arquivo está assinado pelo nome
+    assinado_pelo_nome = verificar_assinatura_nome(nome_original)
+
+    # Cada palavra-chave desta análise (engenheiros das regras + adicionais)
+    # agrupada pelo bit da sua forma no autômato; com a normalização,
+    # variantes de uma mesma palavra têm o mesmo bit, são encontradas juntas e
+    # só uma delas é registrada (veja _variante_no_texto)
+    palavras = list(dict.fromkeys(list(regras.palavras_engenheiros) + list(palavras_chave_adicionais)))
+    variantes_do_bit = {}
+    for palavra in palavras:
+        variantes_do_bit.setdefault(_mascara_padroes(automato, [palavra], normalizar), []).append(palavra)
+    mascara_palavras = 0
+    for bit in variantes_do_bit:
+        mascara_palavras |= bit
+    mascara_engenheiros = _mascara_padroes(automato, regras.palavras_engenheiros, normalizar)
+    # CREAs entre as palavras-chave: no texto normalizado, só eles perdem o separador do dígito
+    creas = creas_das_palavras(tuple(palavras)) if normalizar else frozenset()
+
+    # Tudo o que precisa ser encontrado para parar a leitura antes do fim, a
+    # mesma regra de carimbo_completo: o nome, a descrição, uma variante da
+    # prancha, ao menos um engenheiro (cada folha traz só os seus
+    # responsáveis) e uma palavra de cada grupo de palavras-chave adicionais
+    mascara_obrigatoria = 0
+    mascaras_grupos = [_mascara_padroes(automato, grupo, normalizar)
+                       for grupo in _grupos_palavras(palavras_chave_adicionais)]
+    if normalizar:
+        # Com a normalização, cada grupo é um único padrão
+        for mascara_grupo in mascaras_grupos:
+            mascara_obrigatoria |= mascara_grupo
+        mascaras_grupos = []
+    if check_filename:
+        mascara_obrigatoria |= _mascara_padroes(automato, [nome_sem_assinado], normalizar)
+    if verificar_projeto:
+        mascara_obrigatoria |= _mascara_padroes(automato, [descricao_projeto], normalizar)
+    mascara_prancha = (_mascara_padroes(automato, _variantes_prancha(numero_prancha), normalizar)
+                       if verificar_prancha else 0)
+    parar_antes = opcoes["ordem_paginas"] != ORDEM_TODAS
+
+    # Só os padrões deste arquivo são procurados, não os dos demais do lote
+    mascara_alvo = mascara_palavras | mascara_engenheiros | mascara_obrigatoria | mascara_prancha
+
+    # Lista para armazenar os dados encontrados no PDF atual
+    dados_carimbo = []
+    mascara_arquivo = 0
+    paginas_lidas = 0
+
+    paginas = ordem_paginas(len(textos), opcoes["ordem_paginas"])
+    if opcoes.get("limite_paginas"):
+        paginas = paginas[:opcoes["limite_paginas"]]
+
+    for indice_pagina in paginas:
+        texto_extraido = textos[indice_pagina]
+        if texto_extraido is None:
+            if extrair_pagina is None:
+                return None
+            texto_extraido = textos[indice_pagina] = extrair_pagina(indice_pagina)
+        paginas_lidas += 1
+
+        if texto_extraido:
+            # Normalizado uma única vez por página (ou só sem as quebras de linha)
+            texto_pagina = texto_extraido
+            texto_extraido = (normalizar_texto(texto_extraido, creas) if normalizar
+                              else texto_extraido.replace("\n", " "))
+
+            mascara_pagina = buscar_padroes(automato, texto_extraido, mascara_alvo)
+
+            # Palavras-chave novas desta página, mantendo a ordem em que aparecem nos arquivos
+            novas = mascara_pagina & mascara_palavras & ~mascara_arquivo
+            if novas:
+                dados_carimbo.extend(_variante_no_texto(variantes, texto_pagina)
+                                     for bit, variantes in variantes_do_bit.items() if novas & bit)
+            mascara_arquivo |= mascara_pagina
+
+            # Parada antecipada: nada mais a encontrar nas páginas restantes
+            if (parar_antes and mascara_arquivo & mascara_obrigatoria == mascara_obrigatoria and
+                    mascara_arquivo & mascara_engenheiros and
+                    (not mascara_prancha or mascara_arquivo & mascara_prancha) and
+                    all(mascara_arquivo & mascara_grupo for mascara_grupo in mascaras_grupos)):
+                break
+
+    # Verificar se o nome do arquivo está no texto
+    nome_arquivo_encontrado = check_filename and padrao_encontrado(automato, mascara_arquivo,
+                                                                   _forma(nome_sem_assinado, normalizar))
+
+    # Verificar se o número da prancha está no texto
+    prancha_encontrada = bool(verificar_prancha and mascara_arquivo & mascara_prancha)
+
+    # Verificar se a descrição do projeto está no texto
+    projeto_encontrado = bool(verificar_projeto and padrao_encontrado(automato, mascara_arquivo,
+                                                                      _forma(descricao_projeto, normalizar)))
+
+    return {
+        'dados_carimbo': dados_carimbo,
+        'nome_arquivo_encontrado': nome_arquivo_encontrado,
+        'prancha_encontrada': prancha_encontrada,
+        'assinado_pelo_nome': assinado_pelo_nome,
+        'projeto_encontrado': projeto_encontrado,
+        'codigo_projeto': codigo_projeto,
+        'descricao_projeto': descricao_projeto,
+        'numero_prancha': numero_prancha,
+        'nome_arquivo': nome_arquivo,
+        'paginas_lidas': paginas_lidas,
+        'paginas_puladas': len(textos) - paginas_lidas
+    }
+
+
+# Máscara de bits de uma lista de padrões do autômato
+def _mascara_padroes(automato, padroes, normalizar=False):
+    mascara = 0
+    for padrao in padroes:
+        indice = automato['indices'].get(_forma(padrao, normalizar))
+        if indice is not None:
+            mascara |= 1 << indice
+    return mascara
+
+
+# Extrai sob demanda e verifica um arquivo.
+# `textos_por_modo` traz os textos já conhecidos (listas com None nas páginas
+# não extraídas) e recebe as páginas extraídas agora. Na extração pela região
+# do carimbo ou por um extrator que não seja o padrão, se o carimbo não
+# estiver completo a página inteira é extraída pelo PyPDF2 e verificada
+# (fallback). Devolve None quando falta texto e o conteúdo do PDF não foi
+# informado.
+# Com `diagnostico` (dicionário), o tempo de cada etapa é acumulado nele:
+# abertura do PDF, extração de cada página e busca das palavras-chave.
+def _extrair_e_verificar(nome_original, conteudo, palavras_chave_adicionais, opcoes, automato, textos_por_modo,
+                         diagnostico=None, regras=REGRAS_PADRAO):
+    # Etapas (modo, região, extrator): a das opções e, se não for a página
+    # inteira pelo extrator padrão, o fallback (a menos que desligado)
+    etapas = [(modo_extracao(opcoes), opcoes["regiao_carimbo"], opcoes["extrator"])]
+    if etapas[0][0] != MODO_PAGINA_INTEIRA and opcoes.get("fallback", True):
+        etapas.append((MODO_PAGINA_INTEIRA, None, EXTRATOR_PADRAO))
+    if diagnostico is None:
+        diagnostico = {}
+    for etapa in ("tempo_abertura", "tempo_extracao", "tempo_busca"):
+        diagnostico.setdefault(etapa, 0.0)
+    diagnostico.setdefault("tempos_paginas", [])
+
+    # O PDF só é aberto se alguma página precisar ser extraída
+    leitor = None
+
+    def abrir_pdf():
+        nonlocal leitor
+        if leitor is None:
+            import PyPDF2
+
+            inicio = time.perf_counter()
+            leitor = PyPDF2.PdfReader(BytesIO(conteudo))
+            diagnostico["paginas"] = len(leitor.pages)
+            diagnostico["tempo_abertura"] += time.perf_counter() - inicio
+        return leitor
+
+    for modo, regiao_modo, extrator_modo in etapas:
+        if modo not in textos_por_modo:
+            if conteudo is None:
+                return None
+            textos_por_modo[modo] = [None] * len(abrir_pdf().pages)
+
+        extrair_pagina = None
+        if conteudo is not None:
+            def extrair_pagina(indice, regiao_modo=regiao_modo, extrator_modo=extrator_modo):
+                pagina = abrir_pdf().pages[indice]
+                inicio = time.perf_counter()
+                texto = texto_pagina(pagina, regiao_modo, extrator_modo)
+                diagnostico["tempos_paginas"].append(time.perf_counter() - inicio)
+                return texto
+
+        # O tempo da busca é o da verificação menos o das extrações feitas nela
+        inicio = time.perf_counter()
+        extracoes_antes = sum(diagnostico["tempos_paginas"]) + diagnostico["tempo_abertura"]
+        resultado = verificar_textos(nome_original, textos_por_modo[modo], palavras_chave_adicionais, opcoes,
+                                     automato, extrair_pagina, regras)
+        extracoes = sum(diagnostico["tempos_paginas"]) + diagnostico["tempo_abertura"] - extracoes_antes
+        diagnostico["tempo_busca"] += time.perf_counter() - inicio - extracoes
+        diagnostico["tempo_extracao"] = sum(diagnostico["tempos_paginas"])
+        diagnostico.setdefault("paginas", len(textos_por_modo[modo]))
+        if resultado is None:
+            return None
+        if modo != MODO_PAGINA_INTEIRA:
+            resultado['modo_extracao'] = "Região do carimbo" if regiao_modo is not None else "Página inteira"
+            if extrator_modo != EXTRATOR_PADRAO:
+                rotulo = ROTULOS_EXTRATORES.get(extrator_modo, extrator_modo)
+                resultado['modo_extracao'] += f" ({rotulo.lower()})"
+            if len(etapas) == 1 or carimbo_completo(resultado, opcoes, palavras_chave_adicionais, regras):
+                return resultado
+        else:
+            resultado['modo_extracao'] = "Página inteira (fallback)" if len(etapas) > 1 else "Página inteira"
+            return resultado
+
+
+# Autômato e regras da análise em andamento em cada processo do pool. São
+# enviados uma única vez pelo inicializador (também ao substituir um processo
+# encerrado), e não junto com cada arquivo.
+_AUTOMATO_PROCESSO = None
+_REGRAS_PROCESSO = REGRAS_PADRAO
+
+
+def _inicializar_processo(automato, regras=REGRAS_PADRAO):
+    global _AUTOMATO_PROCESSO, _REGRAS_PROCESSO
+    _AUTOMATO_PROCESSO = automato
+    _REGRAS_PROCESSO = regras
+
+
+# Executa a análise de um arquivo capturando o erro, para que uma falha não
+# interrompa o lote inteiro. Devolve também os textos extraídos por modo, para
+# que o processo principal possa guardá-los, e o diagnóstico com o tempo de
+# cada etapa (mesmo em caso de erro, com o que foi medido até a falha).
+def _analisar_com_erro(nome_original, conteudo, palavras_chave_adicionais, opcoes, automato=None,
+                       textos_por_modo=None, regras=None):
+    diagnostico = {}
+    inicio = time.perf_counter()
+    try:
+        automato = automato or _AUTOMATO_PROCESSO
+        regras = regras or _REGRAS_PROCESSO
+        textos_por_modo = {modo: list(textos) for modo, textos in (textos_por_modo or {}).items()}
+        resultado = _extrair_e_verificar(nome_original, conteudo, palavras_chave_adicionais, opcoes, automato,
+                                         textos_por_modo, diagnostico, regras)
+        diagnostico["tempo_total"] = time.perf_counter() - inicio
+        return resultado, textos_por_modo, None, diagnostico
+    except Exception as e:
+        diagnostico["tempo_total"] = time.perf_counter() - inicio
+        return None, None, str(e), diagnostico
+
+
+# Função para analisar vários PDFs em paralelo.
+# `arquivos` é uma sequência de tuplas (nome, conteúdo), em que o conteúdo são
+# os bytes do PDF ou uma função sem argumentos que os devolve; com funções, cada
+# PDF só é lido quando chega a sua vez, e no máximo `memoria_maxima` bytes de
+# PDFs ficam em andamento ao mesmo tempo. Gera tuplas (indice, nome, resultado,
+# erro) à medida que cada arquivo termina; a ordem de conclusão pode variar, por
+# isso o índice original é devolvido junto.
+# Com um `cache` (CacheResultados), arquivos já analisados com as mesmas regras
+# são devolvidos direto do cache, sem abrir o PDF. Com um `armazem_textos`
+# (ArmazemTextos), arquivos cujo texto já foi extraído passam só pela busca.
+# Um arquivo "_assinado" que é o original do mesmo lote (pelo nome) mais uma
+# atualização incremental que não mexe nas páginas (veja revisao_incremental)
+# reaproveita o texto extraído do original em vez de extrair tudo de novo.
+# Com `diagnosticos` (dicionário), cada índice recebe o diagnóstico do arquivo:
+# origem do resultado (cache, textos guardados, revisão do original sem
+# assinatura ou extração), bytes, páginas e
+# tempo de leitura, abertura, extração por página, busca e total, além do erro.
+# Cada arquivo é analisado em um processo à parte, sob `tempo_limite`
+# (segundos) e `memoria_limite` (bytes de RSS do processo). Um arquivo que
+# estoura um dos limites ou derruba o processo tem o processo encerrado e é
+# analisado mais uma vez com OPCOES_NOVA_TENTATIVA; se falhar de novo, sai com
+# um resultado vazio cuja 'situacao' indica o motivo (veja
+# arquivo_interrompido). Com um único processo e sem limites (None), a análise
+# roda no próprio processo, sem isolamento.
+# `regras` (veja regras.carregar_regras) define engenheiros, projetos e
+# padrões do nome do arquivo; a sua impressão entra na chave do cache.
+def analisar_lote(arquivos, palavras_chave_adicionais, opcoes=None, num_processos=None, cache=None,
+                  armazem_textos=None, memoria_maxima=MEMORIA_MAXIMA_PADRAO, diagnosticos=None,
+                  tempo_limite=TEMPO_LIMITE_PADRAO, memoria_limite=MEMORIA_LIMITE_PADRAO, regras=REGRAS_PADRAO):
+    opcoes = {**OPCOES_PADRAO, **(opcoes or {})}
+    num_processos = num_processos or numero_processos_padrao()
+    num_processos = max(1, min(num_processos, len(arquivos)))
+    impressao = impressao_regras(palavras_chave_adicionais, opcoes, regras) if cache is not None else None
+    modos = {modo_extracao(opcoes), MODO_PAGINA_INTEIRA}
+
+    # Autômato único para todo o lote (só os nomes são necessários)
+    automato = montar_automato([nome for nome, _ in arquivos], palavras_chave_adicionais, opcoes, regras)
+
+    # Assinado -> original sem assinatura; de cada original guarda-se o tamanho
+    # e o hash (para comparar com o começo do assinado) e os textos extraídos
+    pares = pares_assinados([nome for nome, _ in arquivos])
+    originais = set(pares.values())
+    referencias = {}
+    textos_originais = {}
+    # Assinados que esperam o original terminar de ser extraído no pool
+    aguardando = {}
+
+    # Guarda no cache e no armazém o que foi obtido para um arquivo
+    def registrar(pendente, resultado, textos_por_modo):
+        if armazem_textos is not None:
+            for modo, textos in textos_por_modo.items():
+                guardados = pendente['textos_guardados'].get(modo)
+                if guardados is None or _paginas_extraidas(textos) > _paginas_extraidas(guardados):
+                    armazem_textos.guardar(armazem_textos.chave(pendente['hash'], modo), textos)
+        if cache is not None:
+            cache.guardar(pendente['chave_cache'], resultado)
+
+    # Completa e registra o diagnóstico de um arquivo
+    def diagnosticar(pendente, origem, diagnostico=None, erro=None):
+        if diagnosticos is None:
+            return
+        diagnostico = {**pendente['diagnostico'], **(diagnostico or {}), 'origem': origem, 'erro': erro}
+        if origem != "extração" or 'tempo_total' not in diagnostico:
+            diagnostico['tempo_total'] = time.perf_counter() - pendente['inicio']
+        diagnosticos[pendente['indice']] = diagnostico
+
+    # Junta aos textos de um assinado os do seu original (o que tiver mais páginas extraídas)
+    def usar_textos_original(pendente):
+        for modo, textos in textos_originais.get(pendente['original'], {}).items():
+            guardados = pendente['textos_guardados'].get(modo)
+            if guardados is None or _paginas_extraidas(textos) > _paginas_extraidas(guardados):
+                pendente['textos_guardados'][modo] = textos
+                pendente['origem_textos'] = "revisão"
+
+    # Só a etapa de busca, com os textos guardados ou do original; devolve
+    # None quando falta alguma página e o PDF precisa ser aberto
+    def verificar_guardados(pendente):
+        diagnostico = {}
+        resultado = _extrair_e_verificar(pendente['nome'], None, palavras_chave_adicionais, opcoes, automato,
+                                         pendente['textos_guardados'], diagnostico, regras)
+        if resultado is not None:
+            if cache is not None:
+                cache.guardar(pendente['chave_cache'], resultado)
+            if pendente['indice'] in originais:
+                textos_originais[pendente['indice']] = pendente['textos_guardados']
+            diagnosticar(pendente, pendente.get('origem_textos', "textos"), diagnostico)
+        return resultado
+
+    # Pool criado só quando algum arquivo precisa ser extraído
+    pool = None
+    em_andamento = {}
+    memoria_em_uso = 0
+    opcoes_nova_tentativa = {**opcoes, **OPCOES_NOVA_TENTATIVA}
+
+    def enviar(pendente, opcoes_envio):
+        pool.enviar(pendente['indice'], _analisar_com_erro, pendente['nome'], pendente['conteudo'],
+                    palavras_chave_adicionais, opcoes_envio, None, pendente['textos_guardados'])
+
+    # Guarda os textos de um original e libera os assinados que esperavam por
+    # ele: cada um passa só pela busca ou, se faltar página, vai para o pool
+    def liberar_assinados(indice, textos_por_modo):
+        nonlocal memoria_em_uso
+        if indice not in originais:
+            return
+        if textos_por_modo:
+            textos_originais[indice] = textos_por_modo
+        for pendente in aguardando.pop(indice, []):
+            # O tempo de espera pelo original não conta: o total passa a ser
+            # a leitura do arquivo mais o que for feito a partir daqui
+            pendente['inicio'] = time.perf_counter() - pendente['diagnostico']['tempo_leitura']
+            usar_textos_original(pendente)
+            resultado = verificar_guardados(pendente) if pendente['textos_guardados'] else None
+            if resultado is not None:
+                del pendente['conteudo']
+                memoria_em_uso -= pendente['tamanho']
+                yield pendente['indice'], pendente['nome'], resultado, None
+            else:
+                em_andamento[pendente['indice']] = pendente
+                enviar(pendente, opcoes)
+
+    def concluir(concluidas):
+        nonlocal memoria_em_uso
+        for indice, situacao, retorno in concluidas:
+            pendente = em_andamento[indice]
+
+            # Processo interrompido: uma nova tentativa, mais econômica
+            if situacao != SITUACAO_CONCLUIDO and 'motivo_nova_tentativa' not in pendente:
+                pendente['motivo_nova_tentativa'] = situacao
+                enviar(pendente, opcoes_nova_tentativa)
+                continue
+
+            del em_andamento[indice]
+            del pendente['conteudo']
+            memoria_em_uso -= pendente['tamanho']
+            if situacao != SITUACAO_CONCLUIDO:
+                diagnosticar(pendente, "extração", None, situacao)
+                yield indice, pendente['nome'], _resultado_interrompido(pendente['nome'], situacao, regras), None
+                yield from liberar_assinados(indice, None)
+                continue
+
+            resultado, textos_por_modo, erro, diagnostico = retorno
+            if erro is None:
+                motivo = pendente.get('motivo_nova_tentativa')
+                if motivo is None:
+                    registrar(pendente, resultado, textos_por_modo)
+                else:
+                    # Obtido com outras opções: não vai para o cache
+                    resultado['situacao'] = f"{SITUACAO_CONCLUIDO} na nova tentativa ({motivo.lower()})"
+            diagnosticar(pendente, "extração", diagnostico, erro)
+            yield indice, pendente['nome'], resultado, erro
+            yield from liberar_assinados(indice, textos_por_modo)
+
+    try:
+        for indice, (nome, conteudo) in enumerate(arquivos):
+            inicio = time.perf_counter()
+            conteudo = _ler_conteudo(conteudo)
+            pendente = {'indice': indice, 'nome': nome, 'tamanho': len(conteudo), 'textos_guardados': {},
+                        'inicio': inicio,
+                        'diagnostico': {'bytes': len(conteudo), 'tempo_leitura': time.perf_counter() - inicio}}
+
+            if cache is not None or armazem_textos is not None or indice in originais:
+                pendente['hash'] = hash_conteudo(conteudo)
+            if indice in originais:
+                referencias[indice] = (len(conteudo), pendente['hash'])
+
+            # Assinado que é o original mais uma atualização incremental (ou
+            # uma cópia idêntica): as páginas são as mesmas do original
+            referencia = referencias.get(pares.get(indice))
+            if (referencia is not None and len(conteudo) >= referencia[0] and
+                    hash_conteudo(conteudo[:referencia[0]]) == referencia[1] and
+                    revisao_incremental(conteudo, referencia[0])):
+                pendente['original'] = pares[indice]
+
+            # Resultado já no cache: o PDF não é aberto
+            if cache is not None:
+                pendente['chave_cache'] = cache.chave(pendente['hash'], nome, impressao)
+                resultado = cache.obter(pendente['chave_cache'])
+                if resultado is not None:
+                    diagnosticar(pendente, "cache", {
+                        'paginas': (resultado.get('paginas_lidas') or 0) + (resultado.get('paginas_puladas') or 0)})
+                    yield indice, nome, resultado, None
+                    continue
+
+            # Texto já extraído: só a etapa de busca, sem abrir o PDF
+            if armazem_textos is not None:
+                for modo in modos:
+                    textos = armazem_textos.obter(armazem_textos.chave(pendente['hash'], modo))
+                    if textos is None and 'original' in pendente:
+                        textos = armazem_textos.obter(armazem_textos.chave(referencia[1], modo))
+                    if textos is not None:
+                        pendente['textos_guardados'][modo] = textos
+            if 'original' in pendente:
+                if pendente['original'] in em_andamento:
+                    # O original ainda está no pool: o assinado espera por ele
+                    pendente['conteudo'] = conteudo
+                    memoria_em_uso += pendente['tamanho']
+                    aguardando.setdefault(pendente['original'], []).append(pendente)
+                    continue
+                usar_textos_original(pendente)
+            if pendente['textos_guardados']:
+                resultado = verificar_guardados(pendente)
+                if resultado is not None:
+                    yield indice, nome, resultado, None
+                    continue
+
+            # Sem paralelismo nem limites: evita o custo de criar processos
+            if num_processos == 1 and tempo_limite is None and memoria_limite is None:
+                resultado, textos_por_modo, erro, diagnostico = _analisar_com_erro(
+                    nome, conteudo, palavras_chave_adicionais, opcoes, automato, pendente['textos_guardados'], regras)
+                if erro is None:
+                    registrar(pendente, resultado, textos_por_modo)
+                diagnosticar(pendente, "extração", diagnostico, erro)
+                yield indice, nome, resultado, erro
+                if indice in originais and textos_por_modo:
+                    textos_originais[indice] = textos_por_modo
+                continue
+
+            # Limitar o que está em andamento: no máximo dois arquivos por
+            # processo e `memoria_maxima` bytes de PDFs
+            while em_andamento and (len(em_andamento) >= 2 * num_processos or
+                                    (memoria_maxima and memoria_em_uso + len(conteudo) > memoria_maxima)):
+                yield from concluir(pool.aguardar())
+
+            if pool is None:
+                pool = PoolIsolado(num_processos, _inicializar_processo, (automato, regras), tempo_limite,
+                                   memoria_limite)
+            # O conteúdo fica guardado até o fim para uma eventual nova tentativa
+            pendente['conteudo'] = conteudo
+            em_andamento[indice] = pendente
+            memoria_em_uso += pendente['tamanho']
+            enviar(pendente, opcoes)
+            del conteudo
+
+        while em_andamento:
+            yield from concluir(pool.aguardar())
+    finally:
+        if pool is not None:
+            pool.encerrar()
+
+
+# Bytes de um PDF, lendo sob demanda quando o conteúdo é uma função
+def _ler_conteudo(conteudo):
+    return conteudo() if callable(conteudo) else conteudo
+
+
+# Quantidade de páginas com texto já extraído
+def _paginas_extraidas(textos):
+    return sum(1 for texto in textos if texto is not None)
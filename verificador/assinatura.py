@@ -0,0 +1,193 @@
+import re
+
+from .regras import verificar_assinatura_nome
+
+# Objetos de uma atualização incremental ("N G obj ... endobj")
+_RE_OBJETO = re.compile(rb"(\d+)\s+\d+\s+obj\b(.*?)endobj", re.DOTALL)
+_RE_STARTXREF = re.compile(rb"startxref\s+(\d+)")
+_RE_SIZE = re.compile(rb"/Size\s+(\d+)")
+_RE_REFERENCIA_SEGUINTE = re.compile(rb"\s+\d+\s+R(?![^\s/<>\[\]()%])")
+_RE_DELIMITADOR = re.compile(rb"\s*([\[\]<>/()])\s*")
+_ESPACOS = b" \t\r\n\f\x00"
+_DELIMITADORES = b"[]<>/()%{}"
+
+# Chaves do dicionário de informações do documento, que os assinadores
+# costumam regravar (/ModDate, /Producer...)
+_CHAVES_INFO = {b"/Title", b"/Author", b"/Subject", b"/Keywords", b"/Creator", b"/Producer", b"/CreationDate",
+                b"/ModDate", b"/Trapped"}
+
+# Tipos de objeto de uma assinatura: anotações (campos e widgets) e o
+# dicionário da assinatura
+_TIPOS_ASSINATURA = {b"/Annot", b"/Sig"}
+
+
+# Função para achar, pelo nome, o arquivo sem assinatura de cada arquivo
+# "_assinado" de um lote: devolve índice do assinado -> índice do original.
+# Só entram pares em que o original vem antes, para que ele já tenha sido lido.
+def pares_assinados(nomes):
+    originais = {nome: indice for indice, nome in enumerate(nomes) if not verificar_assinatura_nome(nome)}
+    pares = {}
+    for indice, nome in enumerate(nomes):
+        if verificar_assinatura_nome(nome):
+            original = originais.get(nome.replace("_assinado", ""))
+            if original is not None and original < indice:
+                pares[indice] = original
+    return pares
+
+
+# Posição logo depois do valor que começa em `inicio` (dicionário, array,
+# string, nome, referência "N G R" ou outro token)
+def _fim_valor(dados, inicio):
+    while inicio < len(dados) and dados[inicio] in _ESPACOS:
+        inicio += 1
+    if dados.startswith(b"<<", inicio):
+        posicao = inicio + 2
+        while True:
+            while posicao < len(dados) and dados[posicao] in _ESPACOS:
+                posicao += 1
+            if posicao >= len(dados):
+                raise ValueError("dicionário sem fim")
+            if dados.startswith(b">>", posicao):
+                return posicao + 2
+            posicao = _fim_valor(dados, posicao)
+    if dados.startswith(b"[", inicio):
+        posicao = inicio + 1
+        while True:
+            while posicao < len(dados) and dados[posicao] in _ESPACOS:
+                posicao += 1
+            if posicao >= len(dados):
+                raise ValueError("array sem fim")
+            if dados[posicao] == ord("]"):
+                return posicao + 1
+            posicao = _fim_valor(dados, posicao)
+    if dados.startswith(b"(", inicio):
+        posicao, nivel = inicio + 1, 1
+        while nivel:
+            if posicao >= len(dados):
+                raise ValueError("string sem fim")
+            caractere = dados[posicao]
+            if caractere == ord("\\"):
+                posicao += 1
+            elif caractere == ord("("):
+                nivel += 1
+            elif caractere == ord(")"):
+                nivel -= 1
+            posicao += 1
+        return posicao
+    if dados.startswith(b"<", inicio):
+        fim = dados.find(b">", inicio)
+        if fim < 0:
+            raise ValueError("string hexadecimal sem fim")
+        return fim + 1
+
+    posicao = inicio + 1 if dados.startswith(b"/", inicio) else inicio
+    while posicao < len(dados) and dados[posicao] not in _ESPACOS and dados[posicao] not in _DELIMITADORES:
+        posicao += 1
+    if posicao == inicio:
+        raise ValueError("valor inválido")
+    # Um número seguido de "G R" é uma referência
+    referencia = _RE_REFERENCIA_SEGUINTE.match(dados, posicao)
+    if referencia is not None and dados[inicio:posicao].isdigit():
+        return referencia.end()
+    return posicao
+
+
+# Função para ler o dicionário no começo do corpo de um objeto: chave -> valor
+# (bytes, com os espaços normalizados para comparar). None se o objeto não
+# for um dicionário ou não puder ser lido.
+def _dicionario(corpo):
+    corpo = corpo.lstrip(_ESPACOS)
+    if not corpo.startswith(b"<<"):
+        return None
+    dicionario = {}
+    posicao = 2
+    try:
+        while True:
+            while posicao < len(corpo) and corpo[posicao] in _ESPACOS:
+                posicao += 1
+            if corpo.startswith(b">>", posicao):
+                return dicionario
+            if not corpo.startswith(b"/", posicao):
+                return None
+            fim_chave = _fim_valor(corpo, posicao)
+            fim = _fim_valor(corpo, fim_chave)
+            valor = _RE_DELIMITADOR.sub(rb"\1", b" ".join(corpo[fim_chave:fim].split()))
+            dicionario[corpo[posicao:fim_chave]] = valor
+            posicao = fim
+    except ValueError:
+        return None
+
+
+# Última definição do objeto `numero` no PDF (ou None, por exemplo se ele
+# estiver dentro de um stream de objetos)
+def _definicao(conteudo, numero):
+    definicoes = re.findall(rb"(?<![0-9])%d\s+\d+\s+obj\b(.*?)endobj" % numero, conteudo, re.DOTALL)
+    return definicoes[-1] if definicoes else None
+
+
+# Função para verificar se `conteudo` é o PDF dos primeiros `tamanho_original`
+# bytes seguido de uma atualização incremental que não mexe no texto nem no
+# conjunto das páginas, como fazem as assinaturas digitais: dicionário da
+# assinatura, campo e aparência novos, e regravados só o catálogo (com a mesma
+# árvore de páginas), as páginas (só com /Annots diferente), anotações,
+# campos e o dicionário de informações do documento.
+# Quem chama confere antes que os primeiros bytes são os do original (hash).
+# Na dúvida devolve False e o arquivo é extraído normalmente: atualização com
+# objetos comprimidos (/ObjStm), páginas ou nós da árvore de páginas novos,
+# qualquer outro objeto existente regravado (streams, fontes, recursos, nós
+# da árvore de páginas...) ou objeto que não dê para comparar com o original.
+def revisao_incremental(conteudo, tamanho_original):
+    original = conteudo[:tamanho_original]
+    if not original.rstrip().endswith(b"%%EOF"):
+        return False
+    atualizacao = conteudo[tamanho_original:]
+    if not atualizacao.strip():
+        return True
+    if b"/ObjStm" in atualizacao:
+        return False
+
+    # Quantidade de objetos do original, pelo trailer (ou stream de xref) da última seção
+    inicios = _RE_STARTXREF.findall(original[-1024:])
+    if not inicios:
+        return False
+    trecho = original[int(inicios[-1]):]
+    if trecho.startswith(b"xref"):
+        trecho = trecho[trecho.find(b"trailer"):]
+    tamanho = _RE_SIZE.search(trecho)
+    if tamanho is None:
+        return False
+    num_objetos = int(tamanho.group(1))
+
+    for numero, corpo in _RE_OBJETO.findall(atualizacao):
+        numero = int(numero)
+        dicionario = _dicionario(corpo)
+        tipo = dicionario.get(b"/Type") if dicionario is not None else None
+
+        # Objeto novo: só não pode ser página nem nó da árvore de páginas
+        if numero >= num_objetos:
+            if tipo in (b"/Page", b"/Pages"):
+                return False
+            continue
+
+        # Objeto existente regravado: só dicionários de tipos conhecidos
+        if dicionario is None or b"stream" in corpo:
+            return False
+        if tipo in _TIPOS_ASSINATURA or b"/FT" in dicionario or b"/Fields" in dicionario:
+            continue
+        if tipo is None and set(dicionario) <= _CHAVES_INFO:
+            continue
+        if tipo not in (b"/Catalog", b"/Page"):
+            return False
+
+        # Catálogo e páginas: comparados com a definição do original
+        anterior = _definicao(original, numero)
+        anterior = _dicionario(anterior) if anterior is not None else None
+        if anterior is None or anterior.get(b"/Type") != tipo:
+            return False
+        if tipo == b"/Catalog":
+            if dicionario.get(b"/Pages") != anterior.get(b"/Pages"):
+                return False
+        elif ({chave: valor for chave, valor in dicionario.items() if chave != b"/Annots"} !=
+              {chave: valor for chave, valor in anterior.items() if chave != b"/Annots"}):
+            return False
+    return True
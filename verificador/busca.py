@@ -0,0 +1,131 @@
+from collections import deque
+
+# Busca de várias palavras em um texto, com o resultado em uma máscara de bits
+# (bit i = padrão i encontrado). Os padrões são compilados uma vez por análise
+# e usados em todas as páginas. Com poucos padrões a procurar, um `in` por
+# padrão (busca em C) é bem mais rápido; só acima de LIMITE_VARREDURA padrões
+# uma única passada pelo autômato Aho-Corasick compensa (veja
+# benchmarks/bench_busca.py). O autômato é montado só na primeira busca que
+# precisar dele e é formado apenas por listas e dicionários, então pode ser
+# enviado para outros processos.
+
+# Quantidade de padrões a partir da qual a passada pelo autômato é mais rápida
+# que um `in` por padrão (medida com benchmarks/bench_busca.py)
+LIMITE_VARREDURA = 300
+
+
+# Função para compilar uma lista de padrões.
+# Padrões repetidos ou vazios são ignorados; a ordem da primeira ocorrência é mantida.
+def compilar_automato(padroes):
+    lista_padroes = []
+    indices = {}
+    for padrao in padroes:
+        if padrao and padrao not in indices:
+            indices[padrao] = len(lista_padroes)
+            lista_padroes.append(padrao)
+    return {
+        'padroes': lista_padroes,
+        'indices': indices,
+    }
+
+
+# Função para montar o autômato Aho-Corasick dos padrões (uma única vez)
+def _montar_transicoes(automato):
+    if 'transicoes' in automato:
+        return
+
+    # Árvore de prefixos (trie): transicoes[estado] = {caractere: próximo estado}
+    transicoes = [{}]
+    saidas = [0]
+    for indice, padrao in enumerate(automato['padroes']):
+        estado = 0
+        for caractere in padrao:
+            proximo = transicoes[estado].get(caractere)
+            if proximo is None:
+                proximo = len(transicoes)
+                transicoes[estado][caractere] = proximo
+                transicoes.append({})
+                saidas.append(0)
+            estado = proximo
+        saidas[estado] |= 1 << indice
+
+    # Links de falha em largura; cada estado herda as saídas do seu link de falha
+    falhas = [0] * len(transicoes)
+    fila = deque(transicoes[0].values())
+    while fila:
+        estado = fila.popleft()
+        for caractere, proximo in transicoes[estado].items():
+            fila.append(proximo)
+            falha = falhas[estado]
+            while falha and caractere not in transicoes[falha]:
+                falha = falhas[falha]
+            falhas[proximo] = transicoes[falha].get(caractere, 0)
+            saidas[proximo] |= saidas[falhas[proximo]]
+
+    automato['transicoes'] = transicoes
+    automato['falhas'] = falhas
+    automato['saidas'] = saidas
+
+
+# Função para buscar os padrões no texto. Com `alvo` (máscara), só esses
+# padrões são procurados, por exemplo os de um único arquivo de um lote.
+# Retorna a máscara de bits dos padrões encontrados.
+def buscar_padroes(automato, texto, alvo=None):
+    if alvo is None:
+        alvo = (1 << len(automato['padroes'])) - 1
+    if bin(alvo).count("1") <= LIMITE_VARREDURA:
+        return varrer_padroes(automato, texto, alvo)
+    return percorrer_automato(automato, texto) & alvo
+
+
+# Busca com um `in` por padrão do alvo
+def varrer_padroes(automato, texto, alvo):
+    padroes = automato['padroes']
+    mascara = 0
+    while alvo:
+        bit = alvo & -alvo
+        if padroes[bit.bit_length() - 1] in texto:
+            mascara |= bit
+        alvo ^= bit
+    return mascara
+
+
+# Busca de todos os padrões em uma única passada pelo autômato
+def percorrer_automato(automato, texto):
+    _montar_transicoes(automato)
+    transicoes = automato['transicoes']
+    falhas = automato['falhas']
+    saidas = automato['saidas']
+
+    mascara = 0
+    estado = 0
+    for caractere in texto:
+        proximo = transicoes[estado].get(caractere)
+        while proximo is None and estado:
+            estado = falhas[estado]
+            proximo = transicoes[estado].get(caractere)
+        if proximo is None:
+            # Caractere que não inicia nenhum padrão: volta para a raiz
+            estado = 0
+            continue
+        estado = proximo
+        if saidas[estado]:
+            mascara |= saidas[estado]
+    return mascara
+
+
+# Função para verificar se um padrão está presente na máscara
+def padrao_encontrado(automato, mascara, padrao):
+    indice = automato['indices'].get(padrao)
+    return indice is not None and bool(mascara >> indice & 1)
+
+
+# Função para listar, na ordem do autômato, os padrões presentes na máscara
+def padroes_da_mascara(automato, mascara):
+    padroes = automato['padroes']
+    encontrados = []
+    while mascara:
+        bit = mascara & -mascara
+        encontrados.append(padroes[bit.bit_length() - 1])
+        mascara ^= bit
+    return encontrados
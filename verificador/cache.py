@@ -0,0 +1,137 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+from .regras import REGRAS_PADRAO
+
+# Versão do formato dos resultados guardados; alterar invalida o cache antigo
+VERSAO_CACHE = 3
+
+# Diretório e tamanho máximo padrão do cache (podem ser alterados pela
+# variável de ambiente VERIFICADOR_CACHE_DIR ou pela barra lateral)
+DIRETORIO_CACHE_PADRAO = os.environ.get(
+    "VERIFICADOR_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "verificador"))
+TAMANHO_MAXIMO_CACHE_PADRAO = 256 * 1024 * 1024
+
+
+# Função para calcular o hash SHA-256 do conteúdo de um arquivo
+def hash_conteudo(conteudo):
+    return hashlib.sha256(conteudo).hexdigest()
+
+
+# Função para calcular a impressão digital das regras ativas: conjunto de
+# regras (engenheiros, mapeamento de projetos e padrões do nome, pela
+# impressão já calculada em regras.Regras), palavras-chave e opções de
+# verificação. Qualquer mudança nas regras gera uma impressão diferente e,
+# portanto, outra chave.
+def impressao_regras(palavras_chave_adicionais, opcoes, regras=REGRAS_PADRAO):
+    dados = {
+        "versao": VERSAO_CACHE,
+        "regras": regras.impressao,
+        "palavras_chave": list(palavras_chave_adicionais),
+        "opcoes": opcoes,
+    }
+    serializado = json.dumps(dados, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(serializado.encode("utf-8")).hexdigest()
+
+
+# Cache persistente de resultados em SQLite.
+# A chave combina o hash do PDF, o nome do arquivo (de onde saem prancha e
+# código do projeto) e a impressão das regras. Quando o tamanho total passa
+# do limite, as entradas usadas há mais tempo são removidas (LRU).
+class CacheResultados:
+    def __init__(self, diretorio=DIRETORIO_CACHE_PADRAO, tamanho_maximo=TAMANHO_MAXIMO_CACHE_PADRAO):
+        os.makedirs(diretorio, exist_ok=True)
+        self.caminho = os.path.join(diretorio, "resultados.sqlite3")
+        self.tamanho_maximo = tamanho_maximo
+        self.conexao = sqlite3.connect(self.caminho)
+        self.conexao.execute(
+            "CREATE TABLE IF NOT EXISTS resultados ("
+            " chave TEXT PRIMARY KEY,"
+            " resultado TEXT NOT NULL,"
+            " tamanho INTEGER NOT NULL,"
+            " ultimo_acesso REAL NOT NULL)")
+        self.conexao.execute(
+            "CREATE TABLE IF NOT EXISTS contadores (nome TEXT PRIMARY KEY, valor INTEGER NOT NULL)")
+
+        # O limite pode ter sido reduzido desde a última abertura
+        self._remover_excedente()
+        self.conexao.commit()
+
+        # Acertos e falhas desde que o cache foi aberto
+        self.acertos = 0
+        self.falhas = 0
+
+    @staticmethod
+    def chave(hash_arquivo, nome_arquivo, impressao):
+        return f"{hash_arquivo}:{impressao}:{nome_arquivo}"
+
+    # Busca um resultado; devolve None quando não está no cache
+    def obter(self, chave):
+        linha = self.conexao.execute(
+            "SELECT resultado FROM resultados WHERE chave = ?", (chave,)).fetchone()
+        if linha is None:
+            self.falhas += 1
+            self._incrementar("falhas")
+            return None
+
+        self.acertos += 1
+        self._incrementar("acertos")
+        self.conexao.execute(
+            "UPDATE resultados SET ultimo_acesso = ? WHERE chave = ?", (time.time(), chave))
+        self.conexao.commit()
+        return json.loads(linha[0])
+
+    # Guarda um resultado e remove as entradas mais antigas se passar do limite
+    def guardar(self, chave, resultado):
+        serializado = json.dumps(resultado, ensure_ascii=False)
+        self.conexao.execute(
+            "INSERT OR REPLACE INTO resultados (chave, resultado, tamanho, ultimo_acesso) VALUES (?, ?, ?, ?)",
+            (chave, serializado, len(serializado.encode("utf-8")), time.time()))
+        self._remover_excedente()
+        self.conexao.commit()
+
+    # Remove todas as entradas (botão "Invalidar cache")
+    def invalidar(self):
+        self.conexao.execute("DELETE FROM resultados")
+        self.conexao.execute("DELETE FROM contadores")
+        self.conexao.commit()
+        self.conexao.execute("VACUUM")
+        self.acertos = 0
+        self.falhas = 0
+
+    # Quantidade de entradas, bytes ocupados e contadores acumulados
+    def estatisticas(self):
+        entradas, tamanho = self.conexao.execute(
+            "SELECT COUNT(*), COALESCE(SUM(tamanho), 0) FROM resultados").fetchone()
+        contadores = dict(self.conexao.execute("SELECT nome, valor FROM contadores").fetchall())
+        return {
+            "entradas": entradas,
+            "tamanho": tamanho,
+            "acertos_total": contadores.get("acertos", 0),
+            "falhas_total": contadores.get("falhas", 0),
+        }
+
+    def fechar(self):
+        self.conexao.close()
+
+    def _incrementar(self, nome):
+        self.conexao.execute(
+            "INSERT INTO contadores (nome, valor) VALUES (?, 1) "
+            "ON CONFLICT(nome) DO UPDATE SET valor = valor + 1", (nome,))
+
+    def _remover_excedente(self):
+        total = self.conexao.execute("SELECT COALESCE(SUM(tamanho), 0) FROM resultados").fetchone()[0]
+        if total <= self.tamanho_maximo:
+            return
+
+        remover = []
+        for chave, tamanho in self.conexao.execute(
+                "SELECT chave, tamanho FROM resultados ORDER BY ultimo_acesso"):
+            if total <= self.tamanho_maximo:
+                break
+            remover.append((chave,))
+            total -= tamanho
+        self.conexao.executemany("DELETE FROM resultados WHERE chave = ?", remover)
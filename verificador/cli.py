@@ -0,0 +1,351 @@
+import argparse
+import os
+import sys
+import time
+from contextlib import nullcontext
+
+from .analise import (
+    MEMORIA_MAXIMA_PADRAO,
+    ORDEM_PRIMEIRA_PRIMEIRO,
+    ORDEM_TODAS,
+    ORDEM_ULTIMA_PRIMEIRO,
+    analisar_lote,
+    arquivo_interrompido,
+    pendencias_carimbo,
+)
+from .diagnostico import perfilar
+from .cache import DIRETORIO_CACHE_PADRAO, TAMANHO_MAXIMO_CACHE_PADRAO, CacheResultados
+from .entrada import abrir_pdfs
+from .extratores import EXTRATOR_PADRAO, EXTRATORES
+from .isolamento import MEMORIA_LIMITE_PADRAO, TEMPO_LIMITE_PADRAO
+from .monitor import ARQUIVO_REMOVIDO, MonitorPasta, arquivo_estado_padrao
+from .regiao import REGIAO_AUTOMATICA, REGIOES_CARIMBO
+from .regras import REGRAS_PADRAO, carregar_regras
+from .relatorio import gerar_csv, gerar_excel, gerar_parquet, montar_tabela, montar_tabela_diagnostico
+from .textos import ArmazemTextos
+
+# Códigos de saída
+SAIDA_OK = 0
+SAIDA_FALHAS = 1
+SAIDA_ERRO_USO = 2
+
+
+# Função para ler as palavras-chave adicionais de um arquivo (uma por linha);
+# sem arquivo, valem as palavras-chave padrão das regras
+def ler_palavras_chave(caminho, regras=REGRAS_PADRAO):
+    if caminho is None:
+        return list(regras.palavras_chave)
+    with open(caminho, encoding="utf-8") as arquivo:
+        return [linha.strip() for linha in arquivo if linha.strip()]
+
+
+# Converte o argumento --region em um formato, "Automático" ou retângulo
+def _regiao(valor):
+    if valor is None:
+        return None
+    if valor.lower() in ("auto", "automatico", REGIAO_AUTOMATICA.lower()):
+        return REGIAO_AUTOMATICA
+    if valor.upper() in REGIOES_CARIMBO:
+        return valor.upper()
+    try:
+        retangulo = tuple(float(parte) for parte in valor.split(","))
+    except ValueError:
+        retangulo = ()
+    if len(retangulo) != 4:
+        raise argparse.ArgumentTypeError(
+            f"região inválida: {valor!r} (use auto, {', '.join(REGIOES_CARIMBO)} ou x0,y0,x1,y1)")
+    return retangulo
+
+
+# Regras do arquivo de --rules (ou as embutidas); devolve None, com a mensagem
+# de erro, quando o arquivo não pode ser lido
+def _carregar_regras(args):
+    if args.rules is None:
+        return REGRAS_PADRAO
+    try:
+        return carregar_regras(args.rules)
+    except (OSError, ValueError) as e:
+        print(f"Erro ao carregar as regras: {e}", file=sys.stderr)
+        return None
+
+
+# Opções de análise comuns aos subcomandos "check" e "watch"
+def _adicionar_opcoes_analise(subparser):
+    subparser.add_argument("--rules", metavar="ARQUIVO",
+                           help="Regras do projeto em JSON ou YAML: engenheiros, projetos, palavras-chave padrão "
+                                "e padrões do nome (padrão: regras embutidas)")
+    subparser.add_argument("--keywords", metavar="ARQUIVO",
+                           help="Palavras-chave adicionais, uma por linha (padrão: lista do projeto)")
+    subparser.add_argument("--jobs", type=int, default=None, metavar="N",
+                           help="Processos paralelos (padrão: um por núcleo)")
+    subparser.add_argument("--memory-mb", type=int, default=MEMORIA_MAXIMA_PADRAO // (1024 * 1024), metavar="MB",
+                           help="Limite de MB de PDFs em análise ao mesmo tempo")
+    subparser.add_argument("--timeout", type=float, default=TEMPO_LIMITE_PADRAO, metavar="SEGUNDOS",
+                           help="Tempo máximo de análise por arquivo (0 = sem limite)")
+    subparser.add_argument("--max-rss-mb", type=int, default=MEMORIA_LIMITE_PADRAO // (1024 * 1024), metavar="MB",
+                           help="Memória máxima (RSS) do processo que analisa cada arquivo (0 = sem limite)")
+    subparser.add_argument("--out", metavar="RELATORIO.xlsx",
+                           help="Gera o relatório; o formato vem da extensão (.xlsx, .csv ou .parquet)")
+    subparser.add_argument("--no-filename", dest="check_filename", action="store_false",
+                           help="Não verificar o nome do arquivo no conteúdo")
+    subparser.add_argument("--no-sheet-number", dest="check_sheet_number", action="store_false",
+                           help="Não verificar o número da prancha no conteúdo")
+    subparser.add_argument("--no-project", dest="check_projeto", action="store_false",
+                           help="Não verificar a descrição do projeto no conteúdo")
+    subparser.add_argument("--no-normalize", dest="normalizar", action="store_false",
+                           help="Buscar o texto exato, sem ignorar acentos, maiúsculas, espaços repetidos e o "
+                                "separador do dígito dos CREAs")
+    subparser.add_argument("--region", type=_regiao, default=None,
+                           help="Extrair só a região do carimbo: auto, A0-A4 ou x0,y0,x1,y1 (frações da folha)")
+    subparser.add_argument("--pages", choices=[ORDEM_TODAS, ORDEM_ULTIMA_PRIMEIRO, ORDEM_PRIMEIRA_PRIMEIRO],
+                           default=ORDEM_TODAS, help="Ordem de leitura das páginas (com parada antecipada)")
+    subparser.add_argument("--extractor", choices=list(EXTRATORES), default=EXTRATOR_PADRAO,
+                           help="Extrator do texto; fora do padrão, carimbos incompletos são extraídos de novo "
+                                "pelo PyPDF2")
+    subparser.add_argument("--cache-dir", default=DIRETORIO_CACHE_PADRAO, help="Diretório do cache")
+    subparser.add_argument("--no-cache", action="store_true", help="Não usar o cache de resultados e de textos")
+    subparser.add_argument("--strict", action="store_true",
+                           help="Também falha quando alguma palavra-chave adicional não é encontrada")
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m verificador",
+        description="Verificador de carimbos em PDFs, sem interface gráfica.")
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+
+    check = subcomandos.add_parser(
+        "check", help="Verifica os PDFs de uma pasta (recursivamente), de um ZIP ou um PDF isolado")
+    check.add_argument("caminho", help="Pasta, arquivo ZIP ou arquivo PDF")
+    _adicionar_opcoes_analise(check)
+    check.add_argument("--slowest", type=int, default=0, metavar="N",
+                       help="Mostra ao final os N arquivos mais lentos, com o tempo de cada etapa")
+    check.add_argument("--profile", metavar="ARQUIVO.prof",
+                       help="Grava o perfil (cProfile) da análise; roda com um único processo")
+
+    watch = subcomandos.add_parser(
+        "watch", help="Acompanha uma pasta e verifica de novo só os PDFs novos ou alterados")
+    watch.add_argument("pasta", help="Pasta com os PDFs (recursivamente)")
+    _adicionar_opcoes_analise(watch)
+    watch.add_argument("--interval", type=float, default=60, metavar="SEGUNDOS",
+                       help="Intervalo entre as verificações da pasta")
+    watch.add_argument("--once", action="store_true", help="Verifica a pasta uma vez e sai")
+    watch.add_argument("--state", metavar="ARQUIVO.sqlite3",
+                       help="Manifesto e resultados da pasta (padrão: um arquivo por pasta no diretório do cache)")
+    return parser
+
+
+# Geradores de relatório por extensão do arquivo de saída
+GERADORES_RELATORIO = {
+    ".xlsx": gerar_excel,
+    ".csv": gerar_csv,
+    ".parquet": gerar_parquet,
+}
+
+
+# Confere a extensão do relatório pedido em --out; devolve False (com a
+# mensagem de erro) quando o formato não é suportado
+def _relatorio_suportado(args):
+    if args.out and os.path.splitext(args.out)[1].lower() not in GERADORES_RELATORIO:
+        print(f"Formato de relatório não suportado: {args.out} (use {', '.join(GERADORES_RELATORIO)})",
+              file=sys.stderr)
+        return False
+    return True
+
+
+# Opções de verificação a partir dos argumentos
+def _opcoes(args):
+    return {
+        "check_filename": args.check_filename,
+        "check_sheet_number": args.check_sheet_number,
+        "check_projeto": args.check_projeto,
+        "regiao_carimbo": args.region,
+        "ordem_paginas": args.pages,
+        "extrator": args.extractor,
+        "normalizar": args.normalizar,
+    }
+
+
+# Gera o relatório no formato da extensão de `destino`
+def _gerar_relatorio(destino, resultados, dados_diagnostico):
+    extensao = os.path.splitext(destino)[1].lower()
+    if extensao == ".xlsx":
+        gerar_excel(montar_tabela(resultados), destino, dados_diagnostico)
+    else:
+        GERADORES_RELATORIO[extensao](montar_tabela(resultados), destino)
+
+
+# Mostra a linha de um arquivo (OK, FALHA, ERRO ou INTERROMPIDO) e devolve a categoria
+def _mostrar_resultado(caminho, resultado, erro, opcoes, palavras_chave_adicionais, args, saida, regras):
+    if erro:
+        print(f"ERRO\t{caminho}\t{erro}", file=saida, flush=True)
+        return "erro"
+    if arquivo_interrompido(resultado):
+        print(f"INTERROMPIDO\t{caminho}\t{resultado['situacao']}", file=saida, flush=True)
+        return "interrompido"
+    pendencias = pendencias_carimbo(resultado, opcoes, palavras_chave_adicionais if args.strict else None, regras)
+    if pendencias:
+        print(f"FALHA\t{caminho}\tfaltando: {', '.join(pendencias)}", file=saida, flush=True)
+        return "falha"
+    print(f"OK\t{caminho}", file=saida, flush=True)
+    return "ok"
+
+
+# Executa o subcomando "check": analisa os PDFs, mostra cada resultado assim
+# que fica pronto e devolve o código de saída
+def executar_check(args, saida=sys.stdout):
+    if not _relatorio_suportado(args):
+        return SAIDA_ERRO_USO
+    regras = _carregar_regras(args)
+    if regras is None:
+        return SAIDA_ERRO_USO
+
+    palavras_chave_adicionais = ler_palavras_chave(args.keywords, regras)
+    opcoes = _opcoes(args)
+
+    cache = armazem_textos = None
+    if not args.no_cache:
+        cache = CacheResultados(args.cache_dir, TAMANHO_MAXIMO_CACHE_PADRAO)
+        armazem_textos = ArmazemTextos(args.cache_dir, TAMANHO_MAXIMO_CACHE_PADRAO)
+
+    # Com perfil, tudo roda no processo principal (sem isolamento nem limites)
+    # para que a extração seja medida
+    num_processos = 1 if args.profile else args.jobs
+    tempo_limite = None if args.profile else args.timeout or None
+    memoria_limite = None if args.profile else args.max_rss_mb * 1024 * 1024 or None
+
+    resultados_por_indice = {}
+    diagnosticos = {}
+    falhas = 0
+    erros = 0
+    interrompidos = 0
+    try:
+        with abrir_pdfs(args.caminho) as entradas, (perfilar(args.profile) if args.profile else nullcontext()):
+            if not entradas:
+                print(f"Nenhum PDF encontrado em {args.caminho}", file=sys.stderr)
+                return SAIDA_ERRO_USO
+
+            # A análise usa só o nome do arquivo; o caminho relativo vai para o
+            # relatório. Cada PDF é lido só quando chega a sua vez.
+            caminhos = [caminho for caminho, _ in entradas]
+            arquivos = [(os.path.basename(caminho), leitor) for caminho, leitor in entradas]
+            for indice, nome, resultado, erro in analisar_lote(arquivos, palavras_chave_adicionais, opcoes,
+                                                               num_processos, cache, armazem_textos,
+                                                               args.memory_mb * 1024 * 1024, diagnosticos,
+                                                               tempo_limite, memoria_limite, regras):
+                categoria = _mostrar_resultado(caminhos[indice], resultado, erro, opcoes, palavras_chave_adicionais,
+                                               args, saida, regras)
+                erros += categoria == "erro"
+                interrompidos += categoria == "interrompido"
+                falhas += categoria == "falha"
+                if not erro:
+                    resultados_por_indice[indice] = resultado
+    finally:
+        if cache is not None:
+            cache.fechar()
+            armazem_textos.fechar()
+
+    if args.out:
+        resultados = {caminhos[indice]: resultados_por_indice[indice] for indice in sorted(resultados_por_indice)}
+        _gerar_relatorio(args.out, resultados, montar_tabela_diagnostico(diagnosticos, caminhos))
+
+    if args.slowest:
+        print("Arquivos mais lentos (ms): total, abertura, extração, busca", file=saida)
+        for linha in montar_tabela_diagnostico(diagnosticos, caminhos)[:args.slowest]:
+            print(f"{linha['Total (ms)']}\t{linha['Abertura (ms)']}\t{linha['Extração (ms)']}\t"
+                  f"{linha['Busca (ms)']}\t{linha['Arquivo']} ({linha['Origem']})", file=saida)
+
+    print(f"{len(arquivos)} arquivo(s): {len(arquivos) - falhas - erros - interrompidos} ok, {falhas} com falha, "
+          f"{erros} com erro, {interrompidos} interrompido(s)", file=saida, flush=True)
+    return SAIDA_FALHAS if falhas or erros or interrompidos else SAIDA_OK
+
+
+# Executa o subcomando "watch": a cada intervalo compara a pasta com o
+# manifesto, verifica só os PDFs novos ou alterados e, se algo mudou, gera de
+# novo o relatório a partir dos resultados guardados. Com --once, verifica uma
+# vez e devolve o código de saída considerando todos os PDFs da pasta.
+# O arquivo de --rules é conferido a cada ciclo: se mudar, as regras novas
+# valem a partir do ciclo seguinte e todos os PDFs são verificados de novo.
+def executar_watch(args, saida=sys.stdout):
+    if not os.path.isdir(args.pasta):
+        print(f"Pasta não encontrada: {args.pasta}", file=sys.stderr)
+        return SAIDA_ERRO_USO
+    if not _relatorio_suportado(args):
+        return SAIDA_ERRO_USO
+    regras = _carregar_regras(args)
+    if regras is None:
+        return SAIDA_ERRO_USO
+
+    opcoes = _opcoes(args)
+    monitor = MonitorPasta(args.pasta, args.state or arquivo_estado_padrao(args.pasta, args.cache_dir))
+    cache = armazem_textos = None
+    if not args.no_cache:
+        cache = CacheResultados(args.cache_dir, TAMANHO_MAXIMO_CACHE_PADRAO)
+        armazem_textos = ArmazemTextos(args.cache_dir, TAMANHO_MAXIMO_CACHE_PADRAO)
+
+    codigo = SAIDA_OK
+    try:
+        while True:
+            inicio = time.perf_counter()
+            # Com erro no arquivo de regras alterado, continua com as anteriores
+            regras = _carregar_regras(args) or regras
+            palavras_chave_adicionais = ler_palavras_chave(args.keywords, regras)
+            mudancas = {}
+            try:
+                for caminho, mudanca, resultado, erro in monitor.sincronizar(
+                        palavras_chave_adicionais, opcoes, args.jobs, cache, armazem_textos,
+                        args.memory_mb * 1024 * 1024, args.timeout or None, args.max_rss_mb * 1024 * 1024 or None,
+                        regras):
+                    mudancas[mudanca] = mudancas.get(mudanca, 0) + 1
+                    if mudanca == ARQUIVO_REMOVIDO:
+                        print(f"REMOVIDO\t{caminho}", file=saida, flush=True)
+                    else:
+                        _mostrar_resultado(caminho, resultado, erro, opcoes, palavras_chave_adicionais, args, saida,
+                                           regras)
+            except OSError as e:
+                # Arquivo removido ou bloqueado durante a leitura: tenta de novo no próximo ciclo
+                print(f"Erro ao ler a pasta: {e}", file=sys.stderr)
+
+            # O relatório sai da tabela persistente, sem analisar nada de novo
+            registros = monitor.resultados()
+            if args.out and (mudancas or not os.path.exists(args.out)):
+                resultados = {caminho: resultado for caminho, resultado, erro, _ in registros if not erro}
+                dados_diagnostico = montar_tabela_diagnostico(
+                    {indice: diagnostico for indice, (_, _, _, diagnostico) in enumerate(registros) if diagnostico},
+                    [caminho for caminho, _, _, _ in registros])
+                # Gravado em um arquivo temporário e trocado de uma vez: quem
+                # abrir o relatório na pasta compartilhada nunca o vê pela metade
+                temporario = f"{args.out}.tmp{os.path.splitext(args.out)[1]}"
+                _gerar_relatorio(temporario, resultados, dados_diagnostico)
+                os.replace(temporario, args.out)
+
+            pendentes = sum(1 for _, resultado, erro, _ in registros
+                            if erro or arquivo_interrompido(resultado) or
+                            pendencias_carimbo(resultado, opcoes, palavras_chave_adicionais if args.strict else None,
+                                               regras))
+            codigo = SAIDA_FALHAS if pendentes else SAIDA_OK
+            print(f"{len(registros)} arquivo(s) na pasta, {pendentes} com pendência | "
+                  + ", ".join(f"{quantidade} {mudanca.lower()}(s)" for mudanca, quantidade in mudancas.items())
+                  + ("" if mudancas else "nenhuma mudança")
+                  + f" | {time.perf_counter() - inicio:.2f} s", file=saida, flush=True)
+
+            if args.once:
+                break
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        monitor.fechar()
+        if cache is not None:
+            cache.fechar()
+            armazem_textos.fechar()
+    return codigo
+
+
+def main(argv=None):
+    args = criar_parser().parse_args(argv)
+    if args.comando == "check":
+        return executar_check(args)
+    if args.comando == "watch":
+        return executar_watch(args)
+    return SAIDA_ERRO_USO
@@ -0,0 +1,371 @@
+import math
+import re
+import weakref
+
+from .regiao import ponto_na_regiao, ponto_texto
+
+# O PyPDF2 é importado só nas funções, como em analise.py. As tabelas de
+# fonte vêm do build_char_map, interno do PyPDF2 (PyPDF2._cmap), que existe
+# com esta assinatura na série 3.0 (a versão fixada em requirements.txt).
+# Sem ele, extrair_texto_conteudo falha e texto_pagina extrai a página pelo
+# extract_text() do PyPDF2.
+
+# Leitura direta do texto das páginas: o conteúdo é percorrido por expressões
+# regulares e só os operadores de texto (Tj, TJ, ' e "), de posição (Td, TD,
+# Tm, T*, cm, q e Q), de fonte (Tf e TL) e os formulários (Do) são
+# interpretados. Os trechos de desenho, que são a maior parte de uma prancha,
+# são pulados inteiros sem virar objetos. As strings são decodificadas pelas
+# mesmas tabelas de fonte do PyPDF2 (codificação e /ToUnicode), e as quebras
+# de linha e espaços seguem as mesmas regras de posição, sem a reconstrução de
+# layout do extract_text().
+
+_MATRIZ_IDENTIDADE = [1.0, 0.0, 0.0, 1.0, 0.0, 0.0]
+
+# Profundidade máxima de formulários (XObjects) dentro de formulários
+_PROFUNDIDADE_MAXIMA = 8
+
+_NUMERO = rb"[+-]?(?:\d+\.?\d*|\.\d+)"
+_DELIMITADOR = rb"(?=[\s()<>\[\]{}/%]|\Z)"
+
+# Operadores de desenho, cor e estado gráfico só com operandos numéricos: uma
+# sequência deles (com os operandos) é pulada em uma única busca
+_OPERADORES_DESENHO = rb"(?:m|l|c|v|y|h|re|S|s|f\*?|F|B\*?|b\*?|n|W\*?|w|J|j|M|i|g|G|rg|RG|k|K|sc|SC|scn|SCN)"
+
+# Tokens do conteúdo; strings sem parênteses internos vêm inteiras ("literal")
+# e as demais são lidas por _ler_literal a partir do "(" ("aninhada")
+_RE_TOKEN = re.compile(
+    rb"(?P<desenho>(?:\s*(?:" + _NUMERO + rb"\s+)*" + _OPERADORES_DESENHO + _DELIMITADOR + rb")+)"
+    rb"|\s*(?:"
+    rb"(?P<instrucao>(?:" + _NUMERO + rb"\s+)*[A-Za-z'\"][^\s()<>\[\]{}/%]*)"
+    rb"|(?P<numero>" + _NUMERO + rb")" + _DELIMITADOR +
+    rb"|(?P<nome>/[^\s()<>\[\]{}/%]*)"
+    rb"|(?P<literal>\((?:[^()\\]|\\.)*\))"
+    rb"|(?P<aninhada>\()"
+    rb"|(?P<hexa><[0-9A-Fa-f\s]*>)"
+    rb"|(?P<abre><<|\[)"
+    rb"|(?P<fecha>>>|\])"
+    rb"|(?P<comentario>%[^\r\n]*)"
+    rb"|(?P<operador>[^\s()<>\[\]{}/%]+)"
+    rb"|(?P<outro>[()<>{}]))", re.DOTALL)
+_RE_PARENTESES = re.compile(rb"\\.|[()]", re.DOTALL)
+_RE_ESCAPE = re.compile(rb"\\(?:([0-7]{1,3})|(\r\n|\r|\n)|(.))", re.DOTALL)
+_RE_FIM_IMAGEM = re.compile(rb"\sEI" + _DELIMITADOR)
+_RE_NOME_ESCAPADO = re.compile(r"#([0-9A-Fa-f]{2})")
+
+_ESCAPES = {b"n": b"\n", b"r": b"\r", b"t": b"\t", b"b": b"\b", b"f": b"\f"}
+
+# Fonte antes do primeiro Tf e fonte não encontrada nos recursos (mesmos
+# valores do PyPDF2): (codificação, tabela da /ToUnicode, largura do espaço)
+_FONTE_INICIAL = ("charmap", None, 500.0)
+_FONTE_DESCONHECIDA = ({codigo: "\ufffd" for codigo in range(256)}, None, 9999.0)
+
+# Tabelas de fonte já montadas, por documento (PdfReader) e objeto da fonte
+_FONTES_POR_DOCUMENTO = weakref.WeakKeyDictionary()
+
+
+def _multiplicar(m, n):
+    return [m[0] * n[0] + m[1] * n[2],
+            m[0] * n[1] + m[1] * n[3],
+            m[2] * n[0] + m[3] * n[2],
+            m[2] * n[1] + m[3] * n[3],
+            m[4] * n[0] + m[5] * n[2] + n[4],
+            m[4] * n[1] + m[5] * n[3] + n[5]]
+
+
+def _substituir_escape(correspondencia):
+    octal, quebra, caractere = correspondencia.groups()
+    if octal is not None:
+        return bytes((int(octal, 8) & 0xFF,))
+    if quebra is not None:
+        return b""
+    return _ESCAPES.get(caractere, caractere)
+
+
+# Lê uma string literal a partir de `posicao` (logo depois do "("), com
+# parênteses aninhados e escapes; devolve os bytes e a posição seguinte
+def _ler_literal(dados, posicao):
+    inicio = posicao
+    nivel = 1
+    for correspondencia in _RE_PARENTESES.finditer(dados, posicao):
+        simbolo = correspondencia.group()
+        if simbolo == b"(":
+            nivel += 1
+        elif simbolo == b")":
+            nivel -= 1
+            if nivel == 0:
+                bruto = dados[inicio:correspondencia.start()]
+                if b"\\" in bruto:
+                    bruto = _RE_ESCAPE.sub(_substituir_escape, bruto)
+                return bruto, correspondencia.end()
+    return dados[inicio:], len(dados)
+
+
+# O build_char_map do PyPDF2 (veja o começo do arquivo)
+def _build_char_map():
+    try:
+        from PyPDF2._cmap import build_char_map
+    except ImportError as e:
+        raise RuntimeError("esta versão do PyPDF2 não tem o PyPDF2._cmap.build_char_map da leitura direta") from e
+    return build_char_map
+
+
+# Tabela de uma fonte dos recursos, montada uma vez por documento
+def _fonte(recursos, nome, fontes_documento):
+    from PyPDF2.generic import IndirectObject
+
+    fontes = recursos.get("/Font")
+    if fontes is None:
+        return _FONTE_DESCONHECIDA
+    fontes = fontes.get_object()
+    referencia = fontes.raw_get(nome) if nome in fontes else None
+    if referencia is None:
+        return _FONTE_DESCONHECIDA
+    chave = (referencia.idnum, referencia.generation) if isinstance(referencia, IndirectObject) else id(referencia)
+    fonte = fontes_documento.get(chave)
+    if fonte is None:
+        from PyPDF2.generic import DictionaryObject, NameObject
+
+        build_char_map = _build_char_map()
+        try:
+            _, largura_espaco, codificacao, mapa, _ = build_char_map(
+                nome, 200.0, DictionaryObject({NameObject("/Resources"): recursos}))
+        except Exception:
+            fonte = _FONTE_DESCONHECIDA
+        else:
+            tabela = {ord(origem): destino for origem, destino in mapa.items()
+                      if isinstance(origem, str) and len(origem) == 1}
+            if isinstance(codificacao, dict):
+                codificacao = {codigo: destino for codigo, destino in codificacao.items() if isinstance(codigo, int)}
+            fonte = (codificacao, tabela or None, largura_espaco)
+        fontes_documento[chave] = fonte
+    return fonte
+
+
+# Decodifica os bytes de uma string com a fonte atual, como o PyPDF2
+def _decodificar(dados, fonte):
+    codificacao, tabela, _ = fonte
+    if isinstance(codificacao, str):
+        try:
+            texto = dados.decode(codificacao, "surrogatepass")
+        except Exception:
+            texto = dados.decode("utf-16-be" if codificacao == "charmap" else "charmap", "surrogatepass")
+    else:
+        texto = dados.decode("latin-1").translate(codificacao)
+    return texto.translate(tabela) if tabela else texto
+
+
+# Recursos da página (que podem vir das páginas ancestrais)
+def _recursos_pagina(pagina):
+    objeto = pagina
+    while objeto is not None:
+        if "/Resources" in objeto:
+            return objeto["/Resources"].get_object()
+        objeto = objeto.get("/Parent")
+        objeto = objeto.get_object() if objeto is not None else None
+    return {}
+
+
+# Bytes do conteúdo (um stream ou uma lista de streams)
+def _dados_conteudo(conteudo):
+    if conteudo is None:
+        return b""
+    conteudo = conteudo.get_object()
+    if isinstance(conteudo, list):
+        return b"\n".join(parte.get_object().get_data() for parte in conteudo)
+    return conteudo.get_data()
+
+
+# Percorre um conteúdo (da página ou de um formulário) acrescentando o texto
+# em `saida` ({'partes': [...], 'separador': ...}). Com `dentro_da_regiao`,
+# só entra o texto cuja posição de início cai dentro da região.
+def _percorrer(dados, recursos, cm, fontes_documento, saida, dentro_da_regiao, profundidade):
+    partes = saida['partes']
+    tm = list(_MATRIZ_IDENTIDADE)
+    anterior = list(_MATRIZ_IDENTIDADE)
+    fonte = _FONTE_INICIAL
+    tamanho = 12.0
+    entrelinha = 0.0
+    pilha_estado = []
+    operandos = []
+    pilha_listas = []
+    # A CTM mudou desde a última posição: o próximo Tj também confere a quebra
+    cm_alterada = False
+
+    def mostrar(bruto):
+        texto = _decodificar(bruto, fonte)
+        if not texto or (dentro_da_regiao is not None and not dentro_da_regiao(*ponto_texto(cm, tm))):
+            return
+        separador = saida['separador']
+        if separador and partes and not partes[-1].endswith(separador):
+            partes.append(separador)
+        saida['separador'] = None
+        partes.append(texto)
+
+    # Quebra de linha ou espaço conforme o deslocamento desde a última posição
+    def reposicionar():
+        nonlocal anterior, cm_alterada
+        cm_alterada = False
+        m = _multiplicar(tm, cm)
+        delta_x = m[4] - anterior[4]
+        delta_y = m[5] - anterior[5]
+        anterior = m
+        f = tamanho * math.sqrt(abs(m[0] * m[3]) + abs(m[1] * m[2]))
+        if m[3] > 1e-6:
+            transversal, ao_longo = -delta_y, delta_x
+        elif m[3] < -1e-6:
+            transversal, ao_longo = delta_y, delta_x
+        elif m[1] > 0:
+            transversal, ao_longo = delta_x, delta_y
+        else:
+            transversal, ao_longo = -delta_x, delta_y
+        if transversal > 0.8 * f:
+            saida['separador'] = "\n"
+        elif abs(transversal) < 0.3 * f and abs(ao_longo) > fonte[2] / 1000 * f * 15 and saida['separador'] != "\n":
+            saida['separador'] = " "
+
+    posicao = 0
+    fim = len(dados)
+    while posicao < fim:
+        token = _RE_TOKEN.match(dados, posicao)
+        if token is None:
+            posicao += 1
+            continue
+        posicao = token.end()
+        tipo = token.lastgroup
+        if tipo == "desenho" or tipo == "comentario" or tipo == "outro":
+            operandos = []
+            continue
+        if tipo == "numero":
+            operandos.append(float(token.group(tipo)))
+            continue
+        if tipo == "nome":
+            nome = token.group(tipo).decode("latin-1")
+            operandos.append(_RE_NOME_ESCAPADO.sub(lambda c: chr(int(c.group(1), 16)), nome))
+            continue
+        if tipo == "literal":
+            bruto = token.group(tipo)[1:-1]
+            operandos.append(_RE_ESCAPE.sub(_substituir_escape, bruto) if b"\\" in bruto else bruto)
+            continue
+        if tipo == "aninhada":
+            bruto, posicao = _ler_literal(dados, posicao)
+            operandos.append(bruto)
+            continue
+        if tipo == "hexa":
+            digitos = re.sub(rb"\s", b"", token.group(tipo)[1:-1])
+            operandos.append(bytes.fromhex((digitos + b"0" * (len(digitos) % 2)).decode()))
+            continue
+        if tipo == "abre":
+            pilha_listas.append(operandos)
+            operandos = []
+            continue
+        if tipo == "fecha":
+            if pilha_listas:
+                lista = operandos
+                operandos = pilha_listas.pop()
+                operandos.append(lista)
+            continue
+
+        if tipo == "instrucao":
+            # Operador com os operandos numéricos que vêm logo antes dele
+            *numeros, operador = token.group(tipo).split()
+            operandos.extend(map(float, numeros))
+        else:
+            operador = token.group(tipo)
+        if pilha_listas:
+            # Operador dentro de lista ou dicionário (conteúdo malformado)
+            operandos.append(operador)
+            continue
+        try:
+            if operador == b"Tj":
+                mostrar(operandos[-1])
+                if cm_alterada:
+                    reposicionar()
+            elif operador == b"TJ":
+                for item in operandos[-1]:
+                    if isinstance(item, bytes):
+                        mostrar(item)
+                        if cm_alterada:
+                            reposicionar()
+                    elif (isinstance(item, float) and abs(item) >= fonte[2] and partes and
+                          not saida['separador']):
+                        saida['separador'] = " "
+            elif operador == b"Tm":
+                tm = operandos[-6:]
+                reposicionar()
+            elif operador == b"Td" or operador == b"TD":
+                tx, ty = operandos[-2:]
+                if operador == b"TD":
+                    entrelinha = -ty
+                tm[4] += tx * tm[0] + ty * tm[2]
+                tm[5] += tx * tm[1] + ty * tm[3]
+                reposicionar()
+            elif operador == b"T*" or operador == b"'" or operador == b'"':
+                tm[5] -= entrelinha
+                reposicionar()
+                if operador != b"T*":
+                    mostrar(operandos[-1])
+            elif operador == b"BT":
+                tm = list(_MATRIZ_IDENTIDADE)
+            elif operador == b"Tf":
+                fonte = _fonte(recursos, operandos[-2], fontes_documento)
+                tamanho = operandos[-1]
+            elif operador == b"TL":
+                entrelinha = operandos[-1]
+            elif operador == b"cm":
+                cm = _multiplicar(operandos[-6:], cm)
+                cm_alterada = True
+            elif operador == b"q":
+                pilha_estado.append((cm, fonte, tamanho, entrelinha))
+            elif operador == b"Q":
+                if pilha_estado:
+                    cm, fonte, tamanho, entrelinha = pilha_estado.pop()
+                else:
+                    cm = list(_MATRIZ_IDENTIDADE)
+                cm_alterada = True
+            elif operador == b"Do":
+                _percorrer_formulario(recursos, operandos[-1], cm, fontes_documento, saida, dentro_da_regiao,
+                                      profundidade)
+            elif operador == b"ID":
+                # Dados de uma imagem embutida: pula até o EI
+                fim_imagem = _RE_FIM_IMAGEM.search(dados, posicao)
+                posicao = fim_imagem.end() if fim_imagem else fim
+        except (IndexError, TypeError, ValueError, AttributeError):
+            # Operandos faltando ou de outro tipo: o operador é ignorado
+            pass
+        operandos = []
+
+
+# Texto de um formulário (XObject /Form) chamado por Do, em uma linha própria
+def _percorrer_formulario(recursos, nome, cm, fontes_documento, saida, dentro_da_regiao, profundidade):
+    xobjetos = recursos.get("/XObject")
+    if xobjetos is None or profundidade >= _PROFUNDIDADE_MAXIMA:
+        return
+    xobjetos = xobjetos.get_object()
+    if nome not in xobjetos:
+        return
+    formulario = xobjetos[nome].get_object()
+    if formulario.get("/Subtype") != "/Form":
+        return
+    matriz = [float(valor) for valor in formulario.get("/Matrix", _MATRIZ_IDENTIDADE)]
+    recursos_formulario = formulario.get("/Resources")
+    recursos_formulario = recursos_formulario.get_object() if recursos_formulario is not None else recursos
+    saida['separador'] = "\n"
+    _percorrer(formulario.get_data(), recursos_formulario, _multiplicar(matriz, cm), fontes_documento, saida,
+               dentro_da_regiao, profundidade + 1)
+    saida['separador'] = "\n"
+
+
+# Função para extrair o texto de uma página (objeto de página do PyPDF2) pela
+# leitura direta do conteúdo. Com `regiao`, só o texto cuja posição cai dentro
+# da região do carimbo é mantido, como em extrair_texto_regiao.
+def extrair_texto_conteudo(pagina, regiao=None):
+    _build_char_map()
+    dados = _dados_conteudo(pagina.get_contents())
+    if not dados:
+        return ""
+    fontes_documento = _FONTES_POR_DOCUMENTO.setdefault(pagina.pdf, {})
+    dentro_da_regiao = ponto_na_regiao(pagina, regiao) if regiao is not None else None
+    saida = {'partes': [], 'separador': None}
+    _percorrer(dados, _recursos_pagina(pagina), list(_MATRIZ_IDENTIDADE), fontes_documento, saida,
+               dentro_da_regiao, 0)
+    return "".join(saida['partes'])
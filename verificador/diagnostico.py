@@ -0,0 +1,29 @@
+import cProfile
+import io
+import pstats
+from contextlib import contextmanager
+
+
+# Perfil (cProfile) de uma execução, para investigar lotes lentos.
+# Mede só o processo atual: para que a extração entre no perfil, a análise
+# deve rodar com um único processo (num_processos=1).
+# Com `destino`, o perfil é gravado em arquivo ao final (abre com
+# `python -m pstats` ou snakeviz).
+@contextmanager
+def perfilar(destino=None):
+    perfil = cProfile.Profile()
+    perfil.enable()
+    try:
+        yield perfil
+    finally:
+        perfil.disable()
+        if destino is not None:
+            perfil.dump_stats(destino)
+
+
+# Função para resumir um perfil (Profile ou arquivo gravado) em texto: as
+# `limite` funções com maior tempo acumulado
+def resumo_perfil(perfil, limite=30):
+    saida = io.StringIO()
+    pstats.Stats(perfil, stream=saida).sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limite)
+    return saida.getvalue()
@@ -0,0 +1,68 @@
+import os
+import zipfile
+from contextlib import ExitStack, contextmanager
+from functools import partial
+
+
+# Função para verificar pela extensão se um arquivo é PDF
+def eh_pdf(nome):
+    return nome.lower().endswith(".pdf")
+
+
+# Função para verificar pela extensão se um arquivo é ZIP
+def eh_zip(nome):
+    return nome.lower().endswith(".zip")
+
+
+def _ler_arquivo(caminho):
+    with open(caminho, "rb") as arquivo:
+        return arquivo.read()
+
+
+# Função para listar os PDFs de um ZIP já aberto sem descompactá-los.
+# Devolve tuplas (caminho no ZIP, leitor), em que leitor() descompacta e
+# devolve os bytes de uma entrada; as pastas internas ficam no caminho.
+def entradas_zip(arquivo_zip, prefixo=""):
+    return [(prefixo + entrada.filename, partial(arquivo_zip.read, entrada))
+            for entrada in arquivo_zip.infolist()
+            if not entrada.is_dir() and eh_pdf(entrada.filename)]
+
+
+# Função para listar os PDFs de arquivos enviados já gravados em disco:
+# `envios` é uma lista de tuplas (nome enviado, caminho em disco). PDFs entram
+# como estão e ZIPs são listados sem descompactar (com o nome do ZIP como
+# prefixo do caminho); os ZIPs ficam abertos na `pilha` (ExitStack).
+def entradas_envios(pilha, envios):
+    entradas = []
+    for nome, caminho in envios:
+        if eh_zip(nome):
+            arquivo_zip = pilha.enter_context(zipfile.ZipFile(caminho))
+            entradas.extend(entradas_zip(arquivo_zip, prefixo=nome + "/"))
+        elif eh_pdf(nome):
+            entradas.append((nome, partial(_ler_arquivo, caminho)))
+    return entradas
+
+
+# Função para listar os PDFs de uma pasta (recursivamente, em ordem
+# alfabética), de um ZIP ou de um PDF isolado, sem ler o conteúdo.
+# Gera a lista de tuplas (caminho relativo, leitor); os ZIPs ficam abertos
+# enquanto o bloco `with` estiver ativo, e cada PDF só é lido quando o seu
+# leitor é chamado.
+@contextmanager
+def abrir_pdfs(caminho):
+    with ExitStack() as pilha:
+        if zipfile.is_zipfile(caminho):
+            arquivo_zip = pilha.enter_context(zipfile.ZipFile(caminho))
+            yield entradas_zip(arquivo_zip)
+        elif os.path.isfile(caminho):
+            yield [(os.path.basename(caminho), partial(_ler_arquivo, caminho))]
+        else:
+            entradas = []
+            for raiz, pastas, arquivos in os.walk(caminho):
+                pastas.sort()
+                for nome in sorted(arquivos):
+                    if eh_pdf(nome):
+                        caminho_arquivo = os.path.join(raiz, nome)
+                        caminho_relativo = os.path.relpath(caminho_arquivo, caminho).replace(os.sep, "/")
+                        entradas.append((caminho_relativo, partial(_ler_arquivo, caminho_arquivo)))
+            yield entradas
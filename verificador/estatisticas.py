@@ -0,0 +1,114 @@
+from .isolamento import SITUACOES_INTERROMPIDAS
+from .regras import REGRAS_PADRAO
+
+# O numpy é importado só nas funções: os processos de análise importam o
+# pacote e não precisam dele
+
+# Verificações por arquivo guardadas como vetores booleanos na matriz
+VERIFICACOES = ["nome_arquivo_encontrado", "prancha_encontrada", "assinado_pelo_nome", "projeto_encontrado"]
+
+
+# Matriz de presença de um lote, preenchida à medida que os resultados
+# chegam: uma linha por arquivo (na posição do arquivo no lote, reservada na
+# criação) e uma coluna por palavra-chave (engenheiros das regras +
+# adicionais), com True onde a palavra foi encontrada. As verificações, o
+# código do projeto e as páginas de cada arquivo vão para vetores alinhados às
+# linhas, e o índice palavra -> engenheiro de `regras` (veja regras.Regras)
+# vira um vetor alinhado às colunas (-1 fora dos engenheiros). Assim cada
+# resultado é lido uma única vez, ao chegar, e todos os resumos são reduções
+# sobre arrays (veja resumir_matriz).
+class MatrizPresenca:
+    def __init__(self, total, palavras_chave_adicionais=(), regras=REGRAS_PADRAO):
+        import numpy as np
+
+        self.regras = regras
+        self.palavras = list(dict.fromkeys(list(regras.palavras_engenheiros) + list(palavras_chave_adicionais)))
+        self.coluna_da_palavra = {palavra: coluna for coluna, palavra in enumerate(self.palavras)}
+        self.arquivos = [None] * total
+        self.preenchidas = np.zeros(total, dtype=bool)
+        self.presenca = np.zeros((total, len(self.palavras)), dtype=bool)
+        self.verificacoes = np.zeros((total, len(VERIFICACOES)), dtype=bool)
+        self.interrompidos = np.zeros(total, dtype=bool)
+        self.codigos = np.full(total, "", dtype=object)
+        self.paginas = np.zeros((total, 2), dtype=np.int64)
+        self.descricoes = {}
+
+    # Preenche a linha de um arquivo com o seu resultado
+    def adicionar(self, linha, arquivo, dados):
+        self.arquivos[linha] = arquivo
+        self.preenchidas[linha] = True
+        colunas = [self.coluna_da_palavra[palavra] for palavra in dados['dados_carimbo']
+                   if palavra in self.coluna_da_palavra]
+        self.presenca[linha, colunas] = True
+        self.verificacoes[linha] = [bool(dados[campo]) for campo in VERIFICACOES]
+        self.interrompidos[linha] = dados.get('situacao') in SITUACOES_INTERROMPIDAS
+        self.codigos[linha] = dados['codigo_projeto'] or ""
+        if dados['codigo_projeto']:
+            self.descricoes[dados['codigo_projeto']] = dados['descricao_projeto']
+        self.paginas[linha] = (dados.get('paginas_lidas') or 0, dados.get('paginas_puladas') or 0)
+
+    # A matriz das linhas preenchidas, na ordem do lote (veja resumir_matriz)
+    def matriz(self):
+        import numpy as np
+
+        linhas = np.flatnonzero(self.preenchidas)
+        verificacoes = self.verificacoes[linhas]
+        return {
+            'arquivos': [self.arquivos[linha] for linha in linhas],
+            'palavras': self.palavras,
+            'presenca': self.presenca[linhas],
+            'engenheiros': list(self.regras.engenheiros),
+            'engenheiro_da_palavra': np.array([self.regras.engenheiro_da_palavra.get(palavra, -1)
+                                               for palavra in self.palavras], dtype=np.int16),
+            'verificacoes': {campo: verificacoes[:, indice] for indice, campo in enumerate(VERIFICACOES)},
+            'interrompidos': self.interrompidos[linhas],
+            'codigos': self.codigos[linhas],
+            'descricoes': self.descricoes,
+            'paginas_lidas': self.paginas[linhas, 0],
+            'paginas_puladas': self.paginas[linhas, 1],
+        }
+
+
+# Função para montar a matriz de presença de resultados já guardados (nome
+# -> resultado), na ordem do dicionário
+def montar_matriz(resultados, palavras_chave_adicionais=(), regras=REGRAS_PADRAO):
+    matriz = MatrizPresenca(len(resultados), palavras_chave_adicionais, regras)
+    for linha, (arquivo, dados) in enumerate(resultados.items()):
+        matriz.adicionar(linha, arquivo, dados)
+    return matriz.matriz()
+
+
+# Função para calcular as estatísticas do lote a partir da matriz: totais de
+# cada verificação, páginas, arquivos por engenheiro (cada arquivo conta uma
+# vez, mesmo com nome e CREA encontrados) e arquivos por projeto, na ordem em
+# que aparecem
+def resumir_matriz(matriz):
+    import numpy as np
+
+    presenca = matriz['presenca']
+    engenheiros = matriz['engenheiros']
+    engenheiro_da_palavra = matriz['engenheiro_da_palavra']
+
+    # Palavras x engenheiros: um arquivo tem o engenheiro se tiver qualquer uma das suas palavras
+    palavras_por_engenheiro = engenheiro_da_palavra[:, None] == np.arange(len(engenheiros))
+    tem_engenheiro = (presenca.astype(np.uint8) @ palavras_por_engenheiro.astype(np.uint8)) > 0
+    arquivos_por_engenheiro = tem_engenheiro.sum(axis=0)
+
+    codigos = matriz['codigos']
+    com_codigo = codigos != ""
+    unicos, primeira_posicao, contagens = np.unique(codigos[com_codigo].astype(str), return_index=True,
+                                                    return_counts=True)
+    ordem = np.argsort(primeira_posicao)
+
+    return {
+        'total': len(matriz['arquivos']),
+        **{campo: int(vetor.sum()) for campo, vetor in matriz['verificacoes'].items()},
+        'interrompidos': int(matriz['interrompidos'].sum()),
+        'sem_engenheiro': int((~tem_engenheiro.any(axis=1)).sum()),
+        'paginas_lidas': int(matriz['paginas_lidas'].sum()),
+        'paginas_puladas': int(matriz['paginas_puladas'].sum()),
+        'por_engenheiro': {engenheiros[indice]: int(arquivos_por_engenheiro[indice])
+                           for indice in np.flatnonzero(arquivos_por_engenheiro)},
+        'por_projeto': {f"{unicos[indice]} - {matriz['descricoes'][unicos[indice]]}": int(contagens[indice])
+                        for indice in ordem},
+    }
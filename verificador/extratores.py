@@ -0,0 +1,42 @@
+from .conteudo import extrair_texto_conteudo
+from .regiao import extrair_texto_regiao
+
+# Extratores de texto: cada um recebe a página (objeto de página do PyPDF2) e
+# a região do carimbo (None para a página inteira) e devolve o texto. Novos
+# extratores entram neste dicionário no carregamento do módulo, para que os
+# processos do pool também os conheçam.
+EXTRATOR_PYPDF2 = "pypdf2"
+EXTRATOR_CONTEUDO = "conteudo"
+EXTRATOR_PADRAO = EXTRATOR_PYPDF2
+
+
+# Texto pelo extract_text() do PyPDF2, que reconstrói o layout da página
+def _texto_pypdf2(pagina, regiao):
+    if regiao is None:
+        return pagina.extract_text() or ""
+    return extrair_texto_regiao(pagina, regiao)
+
+
+EXTRATORES = {
+    EXTRATOR_PYPDF2: _texto_pypdf2,
+    # Leitura direta dos operadores de texto do conteúdo (veja conteudo.py):
+    # basta para saber se as palavras-chave estão na página e é bem mais rápida
+    EXTRATOR_CONTEUDO: extrair_texto_conteudo,
+}
+
+# Nome de cada extrator na interface e no relatório
+ROTULOS_EXTRATORES = {
+    EXTRATOR_PYPDF2: "PyPDF2",
+    EXTRATOR_CONTEUDO: "Leitura direta",
+}
+
+
+# Função para extrair o texto de uma página com o extrator escolhido. Se um
+# extrator que não seja o padrão falhar na página, ela é extraída pelo PyPDF2.
+def texto_pagina(pagina, regiao=None, extrator=EXTRATOR_PADRAO):
+    if extrator != EXTRATOR_PADRAO:
+        try:
+            return EXTRATORES[extrator](pagina, regiao)
+        except Exception:
+            pass
+    return EXTRATORES[EXTRATOR_PADRAO](pagina, regiao)
@@ -0,0 +1,193 @@
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from multiprocessing.connection import wait
+
+# Situação de cada arquivo ao sair do pool
+SITUACAO_CONCLUIDO = "Concluído"
+SITUACAO_TEMPO_ESGOTADO = "Tempo esgotado"
+SITUACAO_MEMORIA_EXCEDIDA = "Memória excedida"
+SITUACAO_PROCESSO_ENCERRADO = "Processo encerrado"
+SITUACOES_INTERROMPIDAS = (SITUACAO_TEMPO_ESGOTADO, SITUACAO_MEMORIA_EXCEDIDA, SITUACAO_PROCESSO_ENCERRADO)
+
+# Limites padrão por arquivo: tempo de análise e memória (RSS) do processo
+TEMPO_LIMITE_PADRAO = 120
+MEMORIA_LIMITE_PADRAO = 2 * 1024 * 1024 * 1024
+
+# Intervalo entre as medições de memória dos processos, em segundos
+_INTERVALO_MEDICAO = 0.25
+
+# Pasta que contém o pacote: os processos novos ("spawn") copiam o sys.path do
+# processo atual para importá-lo, e o Streamlit só coloca a pasta do app no
+# sys.path enquanto o script está rodando (as tarefas da fila rodam fora disso)
+_PASTA_PACOTE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Aviso enviado por um processo novo depois do inicializador: o prazo da
+# primeira tarefa só começa a contar daí, sem o tempo de criar o processo
+_PRONTO = "pronto"
+
+
+# Função para medir a memória residente (RSS) de um processo, em bytes.
+# Usa /proc no Linux e o psutil (se instalado) nos demais sistemas; sem
+# nenhum dos dois devolve None e o limite de memória não é aplicado.
+def rss_processo(pid):
+    try:
+        with open(f"/proc/{pid}/statm") as arquivo:
+            return int(arquivo.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process(pid).memory_info().rss
+    except Exception:
+        return None
+
+
+# Laço de cada processo do pool: recebe (função, argumentos) e devolve o
+# retorno, até receber None ou a conexão ser fechada
+def _laco_trabalhador(conexao, inicializador, argumentos_inicializador):
+    if inicializador is not None:
+        inicializador(*argumentos_inicializador)
+    conexao.send(_PRONTO)
+    while True:
+        try:
+            tarefa = conexao.recv()
+        except EOFError:
+            break
+        if tarefa is None:
+            break
+        funcao, argumentos = tarefa
+        conexao.send(funcao(*argumentos))
+
+
+# Pool de processos em que cada tarefa roda sob um limite de tempo e de
+# memória. Diferente do ProcessPoolExecutor, um processo travado ou que
+# estoura a memória é encerrado e substituído sem derrubar as demais tarefas:
+# a tarefa sai com a situação correspondente e o lote continua.
+class PoolIsolado:
+    def __init__(self, num_processos, inicializador=None, argumentos_inicializador=(),
+                 tempo_limite=TEMPO_LIMITE_PADRAO, memoria_limite=MEMORIA_LIMITE_PADRAO):
+        # "spawn" evita herdar as threads do servidor Streamlit no processo filho
+        self.contexto = multiprocessing.get_context("spawn")
+        self.num_processos = num_processos
+        self.inicializador = inicializador
+        self.argumentos_inicializador = argumentos_inicializador
+        self.tempo_limite = tempo_limite
+        self.memoria_limite = memoria_limite
+        self.fila = deque()
+        self.livres = []
+        # Conexão do processo -> tarefa em execução (processo, chave e início)
+        self.ocupados = {}
+
+    # Coloca uma tarefa na fila; `chave` identifica a tarefa no retorno de aguardar()
+    def enviar(self, chave, funcao, *argumentos):
+        self.fila.append((chave, funcao, argumentos))
+        self._despachar()
+
+    # Quantidade de tarefas na fila ou em execução
+    def pendentes(self):
+        return len(self.fila) + len(self.ocupados)
+
+    # Espera ao menos uma tarefa terminar e devolve a lista de tuplas
+    # (chave, situação, retorno); o retorno é None nas tarefas interrompidas
+    def aguardar(self):
+        concluidas = []
+        while not concluidas and self.ocupados:
+            # Acorda no próximo prazo e, com limite de memória, a cada medição
+            espera = _INTERVALO_MEDICAO if self.memoria_limite else None
+            inicios = [tarefa['inicio'] for tarefa in self.ocupados.values() if tarefa['inicio'] is not None]
+            if self.tempo_limite and inicios:
+                restante = max(0.0, min(inicios) + self.tempo_limite - time.monotonic())
+                espera = restante if espera is None else min(espera, restante)
+
+            objetos = []
+            for conexao, tarefa in self.ocupados.items():
+                objetos += [conexao, tarefa['processo'].sentinel]
+            prontos = set(wait(objetos, espera))
+
+            agora = time.monotonic()
+            for conexao, tarefa in list(self.ocupados.items()):
+                situacao = None
+                if conexao in prontos or tarefa['processo'].sentinel in prontos:
+                    try:
+                        retorno = conexao.recv()
+                    except (EOFError, OSError):
+                        situacao = SITUACAO_PROCESSO_ENCERRADO
+                    else:
+                        if tarefa['inicio'] is None:
+                            # Processo novo pronto: a tarefa começa agora
+                            tarefa['inicio'] = time.monotonic()
+                            continue
+                        del self.ocupados[conexao]
+                        self.livres.append((tarefa['processo'], conexao))
+                        concluidas.append((tarefa['chave'], SITUACAO_CONCLUIDO, retorno))
+                        continue
+                elif (self.tempo_limite and tarefa['inicio'] is not None and
+                      agora - tarefa['inicio'] > self.tempo_limite):
+                    situacao = SITUACAO_TEMPO_ESGOTADO
+                elif self.memoria_limite and (rss_processo(tarefa['processo'].pid) or 0) > self.memoria_limite:
+                    situacao = SITUACAO_MEMORIA_EXCEDIDA
+
+                if situacao is not None:
+                    del self.ocupados[conexao]
+                    self._encerrar_trabalhador(tarefa['processo'], conexao)
+                    concluidas.append((tarefa['chave'], situacao, None))
+
+            self._despachar()
+        return concluidas
+
+    # Encerra o pool; tarefas ainda em execução são interrompidas
+    def encerrar(self):
+        self.fila.clear()
+        for _, conexao in self.livres:
+            try:
+                conexao.send(None)
+            except OSError:
+                pass
+        for processo, _ in self.livres:
+            processo.join(timeout=5)
+        for processo, conexao in self.livres:
+            self._encerrar_trabalhador(processo, conexao)
+        for conexao, tarefa in self.ocupados.items():
+            self._encerrar_trabalhador(tarefa['processo'], conexao)
+        self.livres = []
+        self.ocupados = {}
+
+    def _novo_trabalhador(self):
+        # Entrada própria, no fim: a do Streamlit pode ser removida a qualquer momento
+        if sys.path[-1] != _PASTA_PACOTE:
+            sys.path.append(_PASTA_PACOTE)
+        conexao, conexao_filho = self.contexto.Pipe()
+        processo = self.contexto.Process(target=_laco_trabalhador, daemon=True,
+                                         args=(conexao_filho, self.inicializador, self.argumentos_inicializador))
+        processo.start()
+        conexao_filho.close()
+        return processo, conexao
+
+    def _encerrar_trabalhador(self, processo, conexao):
+        if processo.is_alive():
+            processo.kill()
+        processo.join()
+        conexao.close()
+
+    # Envia as tarefas da fila aos processos livres, criando processos até o limite
+    def _despachar(self):
+        while self.fila and (self.livres or len(self.ocupados) < self.num_processos):
+            # Em um processo novo, a tarefa começa quando ele avisar que está pronto
+            if self.livres:
+                processo, conexao = self.livres.pop()
+                inicio = time.monotonic()
+            else:
+                processo, conexao = self._novo_trabalhador()
+                inicio = None
+            chave, funcao, argumentos = self.fila.popleft()
+            try:
+                conexao.send((funcao, argumentos))
+            except OSError:
+                # Processo livre que morreu parado: substitui e tenta de novo
+                self._encerrar_trabalhador(processo, conexao)
+                self.fila.appendleft((chave, funcao, argumentos))
+                continue
+            self.ocupados[conexao] = {'processo': processo, 'chave': chave, 'inicio': inicio}
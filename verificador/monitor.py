@@ -0,0 +1,147 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from functools import partial
+
+from .analise import MEMORIA_MAXIMA_PADRAO, OPCOES_PADRAO, analisar_lote
+from .cache import DIRETORIO_CACHE_PADRAO, hash_conteudo, impressao_regras
+from .entrada import eh_pdf
+from .isolamento import MEMORIA_LIMITE_PADRAO, TEMPO_LIMITE_PADRAO
+from .regras import REGRAS_PADRAO
+
+# Mudança de cada arquivo em relação ao manifesto
+ARQUIVO_NOVO = "Novo"
+ARQUIVO_ALTERADO = "Alterado"
+ARQUIVO_REMOVIDO = "Removido"
+
+
+# Função para escolher o arquivo de estado (manifesto e resultados) de uma
+# pasta acompanhada: um por pasta, dentro do diretório do cache, para não
+# gravar nada na pasta compartilhada
+def arquivo_estado_padrao(pasta, diretorio=DIRETORIO_CACHE_PADRAO):
+    absoluto = os.path.abspath(pasta)
+    identificador = hashlib.sha256(absoluto.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(diretorio, "pastas", f"{os.path.basename(absoluto) or 'raiz'}-{identificador}.sqlite3")
+
+
+# Lê um PDF da pasta e anota o hash do conteúdo, para o manifesto
+def _ler_com_hash(caminho, hashes, chave):
+    with open(caminho, "rb") as arquivo:
+        conteudo = arquivo.read()
+    hashes[chave] = hash_conteudo(conteudo)
+    return conteudo
+
+
+# Acompanhamento incremental de uma pasta de PDFs. O manifesto guarda, para
+# cada arquivo, o tamanho, a data de modificação, o hash do conteúdo e a
+# impressão das regras usadas, junto com o último resultado. A cada
+# sincronização só são analisados os arquivos novos, os alterados (tamanho ou
+# data diferentes e hash diferente) e os verificados com outras regras; os
+# demais custam apenas um stat.
+class MonitorPasta:
+    def __init__(self, pasta, arquivo_estado=None):
+        self.pasta = os.path.abspath(pasta)
+        self.arquivo_estado = arquivo_estado or arquivo_estado_padrao(self.pasta)
+        os.makedirs(os.path.dirname(os.path.abspath(self.arquivo_estado)), exist_ok=True)
+        self.conexao = sqlite3.connect(self.arquivo_estado)
+        self.conexao.execute(
+            "CREATE TABLE IF NOT EXISTS arquivos ("
+            " caminho TEXT PRIMARY KEY,"
+            " tamanho INTEGER NOT NULL,"
+            " modificado INTEGER NOT NULL,"
+            " hash TEXT NOT NULL,"
+            " impressao TEXT NOT NULL,"
+            " resultado TEXT,"
+            " erro TEXT,"
+            " diagnostico TEXT,"
+            " verificado REAL NOT NULL)")
+        self.conexao.commit()
+
+    # PDFs da pasta (recursivamente): caminho relativo -> (caminho absoluto,
+    # tamanho, data de modificação em ns)
+    def listar(self):
+        arquivos = {}
+        pendentes = [self.pasta]
+        while pendentes:
+            with os.scandir(pendentes.pop()) as entradas:
+                for entrada in entradas:
+                    if entrada.is_dir(follow_symlinks=False):
+                        pendentes.append(entrada.path)
+                    elif eh_pdf(entrada.name) and entrada.is_file():
+                        estado = entrada.stat()
+                        caminho = os.path.relpath(entrada.path, self.pasta).replace(os.sep, "/")
+                        arquivos[caminho] = (entrada.path, estado.st_size, estado.st_mtime_ns)
+        return arquivos
+
+    # Compara a pasta com o manifesto e analisa só o que mudou. Gera tuplas
+    # (caminho, mudança, resultado, erro) à medida que cada arquivo fica
+    # pronto; os removidos vêm primeiro, com resultado e erro None. Cada
+    # resultado é gravado assim que chega, então uma sincronização
+    # interrompida continua de onde parou na próxima. Arquivos verificados com
+    # outro conjunto de `regras` também são analisados de novo.
+    def sincronizar(self, palavras_chave_adicionais, opcoes=None, num_processos=None, cache=None,
+                    armazem_textos=None, memoria_maxima=MEMORIA_MAXIMA_PADRAO, tempo_limite=TEMPO_LIMITE_PADRAO,
+                    memoria_limite=MEMORIA_LIMITE_PADRAO, regras=REGRAS_PADRAO):
+        impressao = impressao_regras(palavras_chave_adicionais, {**OPCOES_PADRAO, **(opcoes or {})}, regras)
+        manifesto = {caminho: (tamanho, modificado, hash_arquivo, impressao_arquivo)
+                     for caminho, tamanho, modificado, hash_arquivo, impressao_arquivo in self.conexao.execute(
+                         "SELECT caminho, tamanho, modificado, hash, impressao FROM arquivos")}
+        atuais = self.listar()
+
+        removidos = sorted(manifesto.keys() - atuais.keys())
+        self.conexao.executemany("DELETE FROM arquivos WHERE caminho = ?", [(caminho,) for caminho in removidos])
+        self.conexao.commit()
+        for caminho in removidos:
+            yield caminho, ARQUIVO_REMOVIDO, None, None
+
+        pendentes = []
+        for caminho in sorted(atuais):
+            absoluto, tamanho, modificado = atuais[caminho]
+            anterior = manifesto.get(caminho)
+            if anterior is not None and anterior[3] == impressao:
+                if anterior[:2] == (tamanho, modificado):
+                    continue
+                # Tamanho ou data mudaram, mas o conteúdo pode ser o mesmo
+                # (arquivo copiado de novo ou só "tocado"): decide pelo hash
+                hashes = {}
+                _ler_com_hash(absoluto, hashes, caminho)
+                if hashes[caminho] == anterior[2]:
+                    self.conexao.execute("UPDATE arquivos SET tamanho = ?, modificado = ? WHERE caminho = ?",
+                                         (tamanho, modificado, caminho))
+                    continue
+            pendentes.append((caminho, ARQUIVO_NOVO if anterior is None else ARQUIVO_ALTERADO, absoluto,
+                              tamanho, modificado))
+        self.conexao.commit()
+        if not pendentes:
+            return
+
+        # Cada PDF só é lido quando chega a sua vez; o hash sai da mesma leitura
+        hashes = {}
+        arquivos = [(os.path.basename(caminho), partial(_ler_com_hash, absoluto, hashes, indice))
+                    for indice, (caminho, _, absoluto, _, _) in enumerate(pendentes)]
+        diagnosticos = {}
+        for indice, _, resultado, erro in analisar_lote(arquivos, palavras_chave_adicionais, opcoes, num_processos,
+                                                        cache, armazem_textos, memoria_maxima, diagnosticos,
+                                                        tempo_limite, memoria_limite, regras):
+            caminho, mudanca, _, tamanho, modificado = pendentes[indice]
+            diagnostico = diagnosticos.get(indice)
+            self.conexao.execute(
+                "INSERT OR REPLACE INTO arquivos (caminho, tamanho, modificado, hash, impressao, resultado, erro,"
+                " diagnostico, verificado) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (caminho, tamanho, modificado, hashes.pop(indice), impressao,
+                 resultado and json.dumps(resultado, ensure_ascii=False), erro,
+                 diagnostico and json.dumps(diagnostico), time.time()))
+            self.conexao.commit()
+            yield caminho, mudanca, resultado, erro
+
+    # Último resultado de cada arquivo da pasta, em ordem de caminho: lista de
+    # tuplas (caminho, resultado, erro, diagnostico)
+    def resultados(self):
+        return [(caminho, resultado and json.loads(resultado), erro, diagnostico and json.loads(diagnostico))
+                for caminho, resultado, erro, diagnostico in self.conexao.execute(
+                    "SELECT caminho, resultado, erro, diagnostico FROM arquivos ORDER BY caminho")]
+
+    def fechar(self):
+        self.conexao.close()
@@ -0,0 +1,60 @@
+import re
+import unicodedata
+from functools import lru_cache
+
+# Normalização do texto das páginas e das palavras-chave para a busca: sem
+# acentos, em minúsculas e com os espaços em branco reduzidos a um espaço.
+# Assim "SAÚDE" e "Saude" têm a mesma forma canônica e viram um único padrão
+# no autômato. Os CREAs configurados como palavras-chave também perdem o
+# separador do dígito verificador ("092019291-2" e "0920192912"), no texto só
+# onde o número é um deles (veja creas_das_palavras). Tudo é feito com
+# expressões regulares e métodos de string, sem percorrer o texto caractere a
+# caractere em Python.
+
+# Marcas de acento separadas das letras pela decomposição NFKD
+_RE_ACENTOS = re.compile("[\u0300-\u036f]")
+
+# Uma palavra-chave que é um CREA: seis ou mais dígitos (às vezes depois de
+# uma letra), o separador ("-", "." ou "/", opcional) e um único dígito
+# verificador ("092019291-2", "0920192912", "A278773-3")
+_RE_CREA = re.compile(r"([a-z]?)(\d{6,})[-./]?(\d)")
+
+# Número com separador antes de um único dígito no texto de uma página; só
+# perde o separador se os dígitos forem os de um CREA configurado, então
+# valores, CEPs e números de prancha ("123456.7") ficam como estão
+_RE_SEPARADOR_TEXTO = re.compile(r"(?<!\d)(\d{6,})[-./](\d)(?!\d)")
+
+
+# Função para normalizar o texto de uma página (uma vez por página). Texto só
+# com ASCII, o caso comum, dispensa a decomposição dos acentos. `creas` são
+# os dígitos dos CREAs configurados (veja creas_das_palavras).
+def normalizar_texto(texto, creas=frozenset()):
+    if not texto.isascii():
+        texto = _RE_ACENTOS.sub("", unicodedata.normalize("NFKD", texto))
+    texto = " ".join(texto.casefold().split())
+    if creas:
+        texto = _RE_SEPARADOR_TEXTO.sub(
+            lambda numero: numero[1] + numero[2] if numero[1] + numero[2] in creas else numero[0], texto)
+    return texto
+
+
+# Função para obter a forma canônica de uma palavra-chave; as mesmas palavras
+# se repetem em todos os arquivos, então as formas ficam guardadas. Um CREA
+# perde o separador do dígito verificador.
+@lru_cache(maxsize=4096)
+def normalizar_palavra(palavra):
+    texto = normalizar_texto(palavra)
+    crea = _RE_CREA.fullmatch(texto)
+    return crea[1] + crea[2] + crea[3] if crea else texto
+
+
+# Função para obter os dígitos (sem a letra e o separador) das palavras-chave
+# que são CREAs, para normalizar_texto
+@lru_cache(maxsize=64)
+def creas_das_palavras(palavras):
+    creas = set()
+    for palavra in palavras:
+        crea = _RE_CREA.fullmatch(normalizar_texto(palavra))
+        if crea:
+            creas.add(crea[2] + crea[3])
+    return frozenset(creas)
@@ -0,0 +1,104 @@
+# Extração restrita à região do carimbo.
+# As regiões são relativas à folha como ela é exibida (já considerando o
+# /Rotate da página), com origem no canto inferior esquerdo: (x0, y0, x1, y1)
+# em frações da largura e da altura.
+
+PONTOS_POR_MM = 72 / 25.4
+
+# Formatos da série A (lado maior x lado menor, em mm)
+FORMATOS_FOLHA = {
+    "A0": (1189, 841),
+    "A1": (841, 594),
+    "A2": (594, 420),
+    "A3": (420, 297),
+    "A4": (297, 210),
+}
+
+# Região do carimbo por formato: faixa de ~195 mm (carimbo de 175-185 mm mais
+# margem) no canto inferior direito. Em folhas em retrato o carimbo fica no rodapé.
+REGIOES_CARIMBO = {
+    "A0": (0.83, 0.0, 1.0, 0.5),
+    "A1": (0.76, 0.0, 1.0, 0.6),
+    "A2": (0.67, 0.0, 1.0, 0.8),
+    "A3": (0.53, 0.0, 1.0, 1.0),
+    "A4": (0.0, 0.0, 1.0, 0.4),
+}
+
+# Escolhe o formato de cada página pelo tamanho
+REGIAO_AUTOMATICA = "Automático"
+
+# Operadores que mostram texto (Tj, TJ, ' e ")
+_OPERADORES_TEXTO = (b"Tj", b"TJ", b"'", b'"')
+
+
+# Função para identificar o formato da folha pelo tamanho exibido (em pontos)
+def detectar_formato(largura, altura):
+    if altura > largura:
+        return "A4"
+    lado_maior = largura / PONTOS_POR_MM
+    return min(FORMATOS_FOLHA, key=lambda formato: abs(FORMATOS_FOLHA[formato][0] - lado_maior))
+
+
+# Função para obter o retângulo relativo de uma região: nome de formato,
+# "Automático" ou uma sequência (x0, y0, x1, y1)
+def retangulo_regiao(regiao, largura, altura):
+    if regiao == REGIAO_AUTOMATICA:
+        regiao = detectar_formato(largura, altura)
+    if isinstance(regiao, str):
+        return REGIOES_CARIMBO[regiao]
+    return tuple(regiao)
+
+
+# Posição na página de um texto, combinando a matriz de texto com a CTM
+def ponto_texto(cm, tm):
+    return (tm[4] * cm[0] + tm[5] * cm[2] + cm[4],
+            tm[4] * cm[1] + tm[5] * cm[3] + cm[5])
+
+
+# Função para montar o teste de uma página: devolve uma função (x, y) que diz
+# se um ponto da página (no espaço do PDF) cai dentro da região do carimbo
+def ponto_na_regiao(pagina, regiao):
+    caixa = pagina.mediabox
+    x_base, y_base = float(caixa.left), float(caixa.bottom)
+    largura, altura = float(caixa.width), float(caixa.height)
+    rotacao = int(pagina.get("/Rotate", 0) or 0) % 360
+
+    largura_exibida, altura_exibida = (altura, largura) if rotacao in (90, 270) else (largura, altura)
+    u0, v0, u1, v1 = retangulo_regiao(regiao, largura_exibida, altura_exibida)
+
+    # Converte um ponto da página para a posição relativa na folha exibida
+    def dentro_da_regiao(x, y):
+        u = (x - x_base) / largura
+        v = (y - y_base) / altura
+        if rotacao == 90:
+            u, v = v, 1 - u
+        elif rotacao == 180:
+            u, v = 1 - u, 1 - v
+        elif rotacao == 270:
+            u, v = 1 - v, u
+        return u0 <= u <= u1 and v0 <= v <= v1
+
+    return dentro_da_regiao
+
+
+# Função para extrair apenas o texto cuja posição cai dentro da região do
+# carimbo. O PyPDF2 só entrega o texto acumulado ao visitante depois do
+# operador seguinte (ex.: o próximo Tm), então a posição é registrada no
+# primeiro operador de texto de cada trecho.
+def extrair_texto_regiao(pagina, regiao):
+    dentro_da_regiao = ponto_na_regiao(pagina, regiao)
+    partes = []
+    inicio_trecho = [None]
+
+    def antes_do_operador(operador, operandos, cm, tm):
+        if operador in _OPERADORES_TEXTO and inicio_trecho[0] is None:
+            inicio_trecho[0] = ponto_texto(cm, tm)
+
+    def visitante_texto(texto, cm, tm, fonte, tamanho):
+        posicao = inicio_trecho[0] or ponto_texto(cm, tm)
+        inicio_trecho[0] = None
+        if texto and dentro_da_regiao(*posicao):
+            partes.append(texto)
+
+    pagina.extract_text(visitor_operand_before=antes_do_operador, visitor_text=visitante_texto)
+    return "".join(partes)
@@ -0,0 +1,256 @@
+import hashlib
+import json
+import os
+import re
+from collections import namedtuple
+
+# Dados FIXOS dos engenheiros e CREAs (sempre serão pesquisados)
+ENGENHEIROS_CREAS_FIXOS = {
+    "RODRIGO DAMASCENO NASCIMENTO": ["0920192912", "092019291-2"],
+    "JÂNIO RIBEIRO LOPES": ["0912111810", "091211181-0"],
+    "FLAVIO SORDI": ["2201136580"],
+    "RITHELLY LOBATO": ["A278773-3", "A2787733"],
+    "SALOMÃO": ["0401863549", "040186354-9"]
+}
+
+# Mapeamento de códigos de projeto para descrições
+MAPEAMENTO_PROJETOS = {
+    "ECX": "PROJETO ELÉTRICO DE BAIXA",
+    "ILUX": "PROJETO DE ILUMINAÇÃO EXTERNA",
+    "CFTV": "PROJETO DE CFTV",
+    "CAB": "PROJETO DE CABEAMENTO",
+    "SOM": "PROJETO DE SONORIZAÇÃO",
+    "SUB": "PROJETO DE SUBESTAÇÃO",
+    "SPDA": "PROJETO DE SPDA",
+    "TEF": "PROJETO DE TELEFONIA",
+    "ALI": "PROJETO ELÉTRICO DE BAIXA",
+    "TUG": "PROJETO ELÉTRICO DE BAIXA",
+    "ILU": "PROJETO ELÉTRICO DE BAIXA",
+    "EME": "PROJETO ELÉTRICO DE BAIXA",
+    "FOT": "PROJETO ELÉTRICO FOTOVOLTAICO",
+    "LEV": "LEVANTAMENTO TOPOGRÁFICO",
+    "EST": "ESTRUTURA DE CONCRETO ARMADO",
+    "FUN": "ESTRUTURA DE CONCRETO ARMADO",
+    "EMT": "ESTRUTURA METÁLICA",
+    "DRE": "PROJETO DE DRENAGEM",
+    "PAV": "PROJETO DE PAVIMENTAÇÃO",
+    "REG": "PROJETO DE REDE DE ESGOTO",
+    "TER": "PROJETO DE TERRAPLENAGEM",
+    "CANT": "PROJETO DE CANTEIRO DE OBRAS",
+    "HID": "PROJETO DE INSTALAÇÕES HIDRÁULICAS",
+    "IRRI": "PROJETO DE IRRIGAÇÃO",
+    "SAN": "PROJETO DE INSTALAÇÕES SANITÁRIAS",
+    "PLU": "PROJETO DE SISTEMA DE REDES DE ÁGUAS",
+    "INC": "PROJETO DE PREVENÇÃO E COMBATE A INCÊNDIO",
+    "GLP": "PROJETO DE INSTALAÇÕES DE GASES GLP",
+    "CLI": "PROJETO DE INSTALAÇÕES DE GASES GLP",
+    "EXA": "PROJETO DE EXAUSTÃO"
+}
+
+# Criar lista FIXA de palavras-chave dos engenheiros (sempre serão pesquisadas)
+PALAVRAS_CHAVE_ENGENHEIROS = []
+for engenheiro, creas in ENGENHEIROS_CREAS_FIXOS.items():
+    PALAVRAS_CHAVE_ENGENHEIROS.append(engenheiro)
+    PALAVRAS_CHAVE_ENGENHEIROS.extend(creas)
+
+# Palavras-chave padrão adicionais (projeto específico)
+PALAVRAS_CHAVE_PADRAO = [
+    "IPER",
+    "CONSTRUÇÃO DA SEDE DO INSTITUTO DE PREVIDÊNCIA DO ESTADO",
+    "DE RORAIMA - IPER",
+    "AGOSTO",
+    "2025",
+    "RUA",
+    "CC-22",
+    "LOTE: 712 - REM.",
+    "LAURA MOREIRA",
+    "69318-105",
+    "BOA VISTA",
+    "RR",
+    "2.220,32",
+    "2.654,11",
+    "SAUDE",
+    "SAÚDE"
+]
+
+# Padrões do número da prancha no nome do arquivo, como _01_07 ou -01-07
+# (grupos: número da prancha em duas partes)
+PADROES_PRANCHA = [
+    r'[_\-](\d{2})[_\-](\d{2})(?:\..*)?$',
+    r'[_\-](\d{2})[_\-](\d{3})(?:\..*)?$',
+    r'[_\-](\d{3})[_\-](\d{3})(?:\..*)?$'
+]
+
+# Padrão do código do projeto no nome do arquivo: PRJ-XXX- (grupo: o código)
+PADRAO_CODIGO_PROJETO = r'PRJ-([A-Z]+)-'
+
+# Diretório com um arquivo de regras (JSON ou YAML) por projeto; pode ser
+# alterado pela variável de ambiente VERIFICADOR_REGRAS_DIR
+DIRETORIO_REGRAS_PADRAO = os.environ.get(
+    "VERIFICADOR_REGRAS_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "regras"))
+EXTENSOES_REGRAS = (".json", ".yaml", ".yml")
+
+# Conjunto de regras de um projeto, já compilado: engenheiros e CREAs,
+# mapeamento de projetos, palavras-chave padrão, o índice palavra-chave ->
+# engenheiro, as expressões do nome do arquivo compiladas e a impressão
+# digital do que afeta a análise. É montado uma vez por arquivo de regras e
+# não deve ser alterado; por ser uma tupla de dados simples, pode ser enviado
+# para os processos do pool.
+Regras = namedtuple("Regras", [
+    "nome",
+    "engenheiros",
+    "projetos",
+    "palavras_chave",
+    "palavras_engenheiros",
+    "engenheiro_da_palavra",
+    "padroes_prancha",
+    "padrao_codigo",
+    "impressao",
+    "origem",
+])
+
+
+# Confere o tipo de um campo do arquivo de regras
+def _validar(condicao, origem, mensagem):
+    if not condicao:
+        raise ValueError(f"Regras inválidas{f' em {origem}' if origem else ''}: {mensagem}")
+
+
+# Compila uma expressão regular do arquivo de regras com a quantidade de grupos esperada
+def _compilar_padrao(padrao, grupos, origem):
+    _validar(isinstance(padrao, str), origem, f"o padrão {padrao!r} deve ser um texto")
+    try:
+        compilado = re.compile(padrao)
+    except re.error as e:
+        raise ValueError(f"Regras inválidas{f' em {origem}' if origem else ''}: padrão {padrao!r}: {e}") from None
+    _validar(compilado.groups == grupos, origem, f"o padrão {padrao!r} deve ter {grupos} grupo(s)")
+    return compilado
+
+
+# Função para compilar um conjunto de regras a partir de um dicionário com:
+#   engenheiros: {nome: [CREA, ...]} (pesquisados sempre)
+#   projetos: {código: descrição}
+#   palavras_chave: [palavra, ...] (opcional; lista padrão do projeto)
+#   padroes_prancha: [expressão, ...] (opcional; dois grupos cada)
+#   padrao_codigo_projeto: expressão (opcional; um grupo)
+#   nome: nome do projeto (opcional)
+# Faltando as expressões, valem PADROES_PRANCHA e PADRAO_CODIGO_PROJETO.
+def compilar_regras(dados, origem=None):
+    _validar(isinstance(dados, dict), origem, "o conteúdo deve ser um objeto com as regras")
+    engenheiros = dados.get("engenheiros")
+    _validar(isinstance(engenheiros, dict) and engenheiros, origem, "'engenheiros' deve ser um objeto não vazio")
+    engenheiros = {str(nome): [creas] if isinstance(creas, str) else list(creas or [])
+                   for nome, creas in engenheiros.items()}
+    for nome, creas in engenheiros.items():
+        _validar(all(isinstance(crea, str) for crea in creas), origem, f"CREAs de {nome!r} devem ser textos")
+    projetos = dados.get("projetos")
+    _validar(isinstance(projetos, dict), origem, "'projetos' deve ser um objeto (código: descrição)")
+    projetos = {str(codigo): str(descricao) for codigo, descricao in projetos.items()}
+    palavras_chave = dados.get("palavras_chave", [])
+    _validar(isinstance(palavras_chave, list), origem, "'palavras_chave' deve ser uma lista")
+    textos_prancha = dados.get("padroes_prancha", PADROES_PRANCHA)
+    _validar(isinstance(textos_prancha, list), origem, "'padroes_prancha' deve ser uma lista")
+    texto_codigo = dados.get("padrao_codigo_projeto", PADRAO_CODIGO_PROJETO)
+
+    palavras_engenheiros = []
+    engenheiro_da_palavra = {}
+    for indice, (engenheiro, creas) in enumerate(engenheiros.items()):
+        for palavra in [engenheiro] + creas:
+            palavras_engenheiros.append(palavra)
+            engenheiro_da_palavra.setdefault(palavra, indice)
+
+    # Só o que muda o resultado da análise; o nome e as palavras-chave padrão
+    # não entram (as palavras usadas já fazem parte da chave do cache)
+    serializado = json.dumps({"engenheiros": engenheiros, "projetos": projetos, "padroes_prancha": textos_prancha,
+                              "padrao_codigo_projeto": texto_codigo}, sort_keys=True, ensure_ascii=False)
+
+    return Regras(
+        nome=str(dados.get("nome") or (os.path.splitext(os.path.basename(origem))[0] if origem else "Padrão")),
+        engenheiros=engenheiros,
+        projetos=projetos,
+        palavras_chave=tuple(str(palavra) for palavra in palavras_chave),
+        palavras_engenheiros=tuple(palavras_engenheiros),
+        engenheiro_da_palavra=engenheiro_da_palavra,
+        padroes_prancha=tuple(_compilar_padrao(padrao, 2, origem) for padrao in textos_prancha),
+        padrao_codigo=_compilar_padrao(texto_codigo, 1, origem),
+        impressao=hashlib.sha256(serializado.encode("utf-8")).hexdigest(),
+        origem=origem,
+    )
+
+
+# Regras já carregadas: caminho -> ((data de modificação, tamanho), regras)
+_REGRAS_CARREGADAS = {}
+
+
+# Função para carregar as regras de um arquivo JSON ou YAML (o YAML exige o
+# PyYAML). O arquivo só é lido e compilado de novo quando a data de
+# modificação ou o tamanho mudam; nas demais chamadas volta o mesmo objeto.
+def carregar_regras(caminho):
+    caminho = os.path.abspath(caminho)
+    estado = os.stat(caminho)
+    versao = (estado.st_mtime_ns, estado.st_size)
+    carregadas = _REGRAS_CARREGADAS.get(caminho)
+    if carregadas is not None and carregadas[0] == versao:
+        return carregadas[1]
+
+    with open(caminho, encoding="utf-8") as arquivo:
+        if caminho.lower().endswith((".yaml", ".yml")):
+            try:
+                import yaml
+            except ImportError:
+                raise ValueError(f"Para ler {caminho} instale o PyYAML (pip install pyyaml) ou use JSON") from None
+            try:
+                dados = yaml.safe_load(arquivo)
+            except yaml.YAMLError as e:
+                raise ValueError(f"Regras inválidas em {caminho}: {e}") from None
+        else:
+            dados = json.load(arquivo)
+    regras = compilar_regras(dados, caminho)
+    _REGRAS_CARREGADAS[caminho] = (versao, regras)
+    return regras
+
+
+# Função para listar os arquivos de regras de um diretório: nome do projeto
+# (nome do arquivo sem a extensão) -> caminho, em ordem alfabética
+def listar_regras(diretorio=DIRETORIO_REGRAS_PADRAO):
+    if not os.path.isdir(diretorio):
+        return {}
+    return {os.path.splitext(nome)[0]: os.path.join(diretorio, nome)
+            for nome in sorted(os.listdir(diretorio)) if nome.lower().endswith(EXTENSOES_REGRAS)}
+
+
+# Regras embutidas, usadas quando nenhum arquivo de regras é informado
+REGRAS_PADRAO = compilar_regras({
+    "engenheiros": ENGENHEIROS_CREAS_FIXOS,
+    "projetos": MAPEAMENTO_PROJETOS,
+    "palavras_chave": PALAVRAS_CHAVE_PADRAO,
+})
+
+
+# Função para extrair o número da prancha do nome do arquivo
+def extrair_numero_prancha(nome_arquivo, regras=REGRAS_PADRAO):
+    # Remove a extensão e possíveis sufixos como "_assinado"
+    nome_sem_ext = os.path.splitext(nome_arquivo)[0].replace("_assinado", "")
+
+    # Procura por padrões como _01_07 ou -01-07 no nome
+    for padrao in regras.padroes_prancha:
+        correspondencia = padrao.search(nome_sem_ext)
+        if correspondencia:
+            return f"{correspondencia.group(1)} {correspondencia.group(2)}"
+
+    return None
+
+
+# Função para verificar se o arquivo está assinado pelo nome
+def verificar_assinatura_nome(nome_arquivo):
+    # Verifica se o nome do arquivo contém "assinado" (case insensitive)
+    return "assinado" in nome_arquivo.lower()
+
+
+# Função para extrair o código do projeto do nome do arquivo - CORRIGIDA
+def extrair_codigo_projeto(nome_arquivo, regras=REGRAS_PADRAO):
+    # Padrão mais flexível: PRJ-XXX- (onde XXX é o código do projeto)
+    correspondencia = regras.padrao_codigo.search(nome_arquivo)
+    if correspondencia:
+        return correspondencia.group(1)
+    return None
@@ -0,0 +1,186 @@
+import csv
+import os
+
+# O pandas e o openpyxl são importados só nas funções que geram os arquivos:
+# os processos de análise importam o pacote e não precisam deles
+
+# Cabeçalhos da planilha (sem a coluna "Prancha" que é redundante)
+CABECALHOS_EXCEL = ["Código Projeto", "Descrição Projeto", "Palavras-chave encontradas",
+                    "Nome do Arquivo", "Número da Prancha", "Nome encontrado",
+                    "Prancha encontrada", "Arquivo assinado", "Projeto encontrado", "Situação"]
+
+# Cabeçalhos da planilha de diagnóstico (tempos em milissegundos)
+CABECALHOS_DIAGNOSTICO = ["Arquivo", "Origem", "Tamanho (KB)", "Páginas", "Páginas extraídas",
+                          "Leitura (ms)", "Abertura (ms)", "Extração (ms)", "Página mais lenta (ms)",
+                          "Busca (ms)", "Total (ms)", "Erro"]
+
+
+# Função para montar a linha da tabela de resultados de um arquivo
+def linha_tabela(nome_arquivo, dados):
+    return {
+        "Prancha": dados['numero_prancha'] if dados['numero_prancha'] else "Não identificado",
+        "Código Projeto": dados['codigo_projeto'] if dados['codigo_projeto'] else "Não identificado",
+        "Descrição Projeto": dados['descricao_projeto'],
+        "Palavras-chave encontradas": ", ".join(dados['dados_carimbo']) if dados['dados_carimbo'] else "Nenhuma",
+        "Nome do Arquivo": nome_arquivo,
+        "Número da Prancha": dados['numero_prancha'] if dados['numero_prancha'] else "Não identificado",
+        "Nome encontrado": "Sim" if dados['nome_arquivo_encontrado'] else "Não",
+        "Prancha encontrada": "Sim" if dados['prancha_encontrada'] else "Não",
+        "Arquivo assinado": "Sim" if dados['assinado_pelo_nome'] else "Não",
+        "Projeto encontrado": "Sim" if dados['projeto_encontrado'] else "Não",
+        "Situação": dados.get('situacao', "Concluído"),
+        "Extração": dados.get('modo_extracao', "Página inteira"),
+        "Páginas lidas": dados.get('paginas_lidas'),
+        "Páginas puladas": dados.get('paginas_puladas')
+    }
+
+
+# Função para montar a tabela de resultados (uma linha por arquivo)
+def montar_tabela(resultados):
+    return [linha_tabela(nome_arquivo, dados) for nome_arquivo, dados in resultados.items()]
+
+
+# Função para montar a linha de diagnóstico de um arquivo (tempos em ms)
+def linha_diagnostico(caminho, diagnostico):
+    def ms(segundos):
+        return round((segundos or 0) * 1000, 1)
+
+    tempos_paginas = diagnostico.get('tempos_paginas') or []
+    return {
+        "Arquivo": caminho,
+        "Origem": diagnostico.get('origem', ""),
+        "Tamanho (KB)": round(diagnostico.get('bytes', 0) / 1024, 1),
+        "Páginas": diagnostico.get('paginas'),
+        "Páginas extraídas": len(tempos_paginas),
+        "Leitura (ms)": ms(diagnostico.get('tempo_leitura')),
+        "Abertura (ms)": ms(diagnostico.get('tempo_abertura')),
+        "Extração (ms)": ms(diagnostico.get('tempo_extracao')),
+        "Página mais lenta (ms)": ms(max(tempos_paginas, default=0)),
+        "Busca (ms)": ms(diagnostico.get('tempo_busca')),
+        "Total (ms)": ms(diagnostico.get('tempo_total')),
+        "Erro": diagnostico.get('erro') or ""
+    }
+
+
+# Função para montar a tabela de diagnóstico, do arquivo mais lento para o
+# mais rápido. `diagnosticos` vem de analisar_lote (índice -> diagnóstico) e
+# `caminhos` traz o nome ou caminho de cada índice.
+def montar_tabela_diagnostico(diagnosticos, caminhos):
+    linhas = [linha_diagnostico(caminhos[indice], diagnostico) for indice, diagnostico in diagnosticos.items()]
+    return sorted(linhas, key=lambda linha: linha["Total (ms)"], reverse=True)
+
+
+# Colunas com Sim/Não que recebem cor (Nome encontrado, Prancha encontrada,
+# Arquivo assinado e Projeto encontrado)
+COLUNAS_SIM_NAO = ["Nome encontrado", "Prancha encontrada", "Arquivo assinado", "Projeto encontrado"]
+
+
+# Função para calcular a largura de cada coluna pelo maior texto (cabeçalho
+# incluído). No modo write-only do openpyxl as larguras vão no início da
+# planilha, antes da primeira linha, por isso são medidas nos dados da tabela.
+def _larguras_colunas(dados_tabela, cabecalhos):
+    maiores = [len(cabecalho) for cabecalho in cabecalhos]
+    for dados in dados_tabela:
+        for col, cabecalho in enumerate(cabecalhos):
+            tamanho = len(str(dados[cabecalho]))
+            if tamanho > maiores[col]:
+                maiores[col] = tamanho
+    return [(maior + 2) * 1.2 for maior in maiores]
+
+
+# Função para gerar a planilha Excel com os resultados.
+# `destino` pode ser um caminho ou um buffer (BytesIO).
+# A planilha é escrita no modo write-only: cada linha é gravada uma única vez,
+# já com a formatação, sem manter as células em memória.
+# Com `dados_diagnostico` (de montar_tabela_diagnostico), a planilha
+# "Diagnósticos" é incluída com o tempo de cada etapa por arquivo.
+def gerar_excel(dados_tabela, destino, dados_diagnostico=None):
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, PatternFill
+    from openpyxl.utils import get_column_letter
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Resultados PDF")
+
+    # Ajustar largura das colunas
+    for col, largura in enumerate(_larguras_colunas(dados_tabela, CABECALHOS_EXCEL), start=1):
+        ws.column_dimensions[get_column_letter(col)].width = largura
+
+    # Escrever cabeçalhos em negrito
+    negrito = Font(bold=True)
+    linha = []
+    for cabecalho in CABECALHOS_EXCEL:
+        celula = WriteOnlyCell(ws, value=cabecalho)
+        celula.font = negrito
+        linha.append(celula)
+    ws.append(linha)
+
+    # Formatação condicional para as colunas de Sim/Não
+    preenchimentos = {
+        "Sim": PatternFill(start_color="00FF00", end_color="00FF00", fill_type="solid"),
+        "Não": PatternFill(start_color="FF2C2B", end_color="FF2C2B", fill_type="solid"),
+    }
+
+    # Preencher os dados (pulando a coluna "Prancha" que é redundante)
+    for dados in dados_tabela:
+        linha = []
+        for cabecalho in CABECALHOS_EXCEL:
+            valor = dados[cabecalho]
+            if cabecalho in COLUNAS_SIM_NAO and valor in preenchimentos:
+                celula = WriteOnlyCell(ws, value=valor)
+                celula.fill = preenchimentos[valor]
+                linha.append(celula)
+            else:
+                linha.append(valor)
+        ws.append(linha)
+
+    if dados_diagnostico is not None:
+        _escrever_planilha(wb, "Diagnósticos", CABECALHOS_DIAGNOSTICO, dados_diagnostico)
+
+    wb.save(destino)
+
+
+# Escreve uma planilha simples (cabeçalho em negrito e larguras ajustadas)
+# em um Workbook write-only
+def _escrever_planilha(wb, titulo, cabecalhos, linhas):
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+    from openpyxl.utils import get_column_letter
+
+    ws = wb.create_sheet(titulo)
+    for col, largura in enumerate(_larguras_colunas(linhas, cabecalhos), start=1):
+        ws.column_dimensions[get_column_letter(col)].width = largura
+
+    negrito = Font(bold=True)
+    cabecalho = []
+    for texto in cabecalhos:
+        celula = WriteOnlyCell(ws, value=texto)
+        celula.font = negrito
+        cabecalho.append(celula)
+    ws.append(cabecalho)
+
+    for dados in linhas:
+        ws.append([dados[coluna] for coluna in cabecalhos])
+
+
+# Função para exportar os resultados em CSV (mesmas colunas da planilha),
+# mais leve que o Excel para lotes muito grandes. `destino` pode ser um
+# caminho ou um buffer de texto (StringIO).
+def gerar_csv(dados_tabela, destino):
+    if isinstance(destino, (str, os.PathLike)):
+        with open(destino, "w", newline="", encoding="utf-8-sig") as arquivo:
+            gerar_csv(dados_tabela, arquivo)
+        return
+
+    escritor = csv.DictWriter(destino, fieldnames=CABECALHOS_EXCEL, extrasaction="ignore")
+    escritor.writeheader()
+    escritor.writerows(dados_tabela)
+
+
+# Função para exportar os resultados em Parquet (mesmas colunas da planilha).
+# Precisa do pyarrow (ou fastparquet) instalado; sem ele o pandas levanta ImportError.
+def gerar_parquet(dados_tabela, destino):
+    import pandas as pd
+
+    pd.DataFrame(list(dados_tabela), columns=CABECALHOS_EXCEL).to_parquet(destino, index=False)
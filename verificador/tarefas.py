@@ -0,0 +1,398 @@
+import json
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import ExitStack, nullcontext
+
+from .analise import MEMORIA_MAXIMA_PADRAO, analisar_lote, numero_processos_padrao
+from .cache import DIRETORIO_CACHE_PADRAO, TAMANHO_MAXIMO_CACHE_PADRAO, CacheResultados
+from .diagnostico import perfilar
+from .entrada import entradas_envios
+from .estatisticas import MatrizPresenca, resumir_matriz
+from .isolamento import MEMORIA_LIMITE_PADRAO, TEMPO_LIMITE_PADRAO
+from .regras import REGRAS_PADRAO, carregar_regras
+from .textos import ArmazemTextos
+
+# Situações de uma tarefa
+TAREFA_NA_FILA = "Na fila"
+TAREFA_EM_ANDAMENTO = "Em andamento"
+TAREFA_CONCLUIDA = "Concluída"
+TAREFA_CANCELADA = "Cancelada"
+TAREFA_FALHOU = "Falhou"
+TAREFAS_ATIVAS = (TAREFA_NA_FILA, TAREFA_EM_ANDAMENTO)
+
+# Limites padrão da fila: tarefas rodando ao mesmo tempo no servidor e por sessão
+MAX_SIMULTANEAS_PADRAO = 2
+LIMITE_POR_SESSAO_PADRAO = 1
+
+# Tarefas terminadas há mais tempo que isso são apagadas ao abrir a fila
+DIAS_GUARDAR_TAREFAS = 7
+
+# Sinal de vida das tarefas em andamento: a fila que as roda o renova a cada
+# INTERVALO_PULSO segundos; sem sinal há TEMPO_SEM_PULSO segundos, a tarefa é
+# dada como abandonada (servidor parado ou reiniciado) e volta para a fila
+INTERVALO_PULSO = 5
+TEMPO_SEM_PULSO = 30
+
+# Colunas acrescentadas depois da primeira versão da tabela de tarefas
+_COLUNAS_NOVAS = {"dono": "TEXT", "pulso": "REAL", "cancelar": "INTEGER NOT NULL DEFAULT 0", "processos": "INTEGER"}
+
+# Parâmetros padrão de uma tarefa (os mesmos de analisar_lote); as regras
+# vão pelo caminho do arquivo (None para as regras embutidas) e são
+# carregadas quando a tarefa começa
+PARAMETROS_PADRAO = {
+    "arquivo_regras": None,
+    "num_processos": None,
+    "memoria_maxima": MEMORIA_MAXIMA_PADRAO,
+    "tempo_limite": TEMPO_LIMITE_PADRAO,
+    "memoria_limite": MEMORIA_LIMITE_PADRAO,
+    "usar_cache": True,
+    "usar_textos": True,
+    "diretorio_cache": DIRETORIO_CACHE_PADRAO,
+    "tamanho_cache": TAMANHO_MAXIMO_CACHE_PADRAO,
+    "perfil": False,
+}
+
+
+# Fila de análises em segundo plano, sem servidor externo: as tarefas ficam
+# em um banco SQLite e rodam em threads do próprio processo. Os arquivos
+# enviados são gravados em disco e cada resultado é guardado assim que fica
+# pronto, então o andamento e os resultados parciais sobrevivem a novas
+# execuções do script e a reconexões (basta o id da tarefa), e uma tarefa
+# interrompida por reinício do servidor continua de onde parou.
+# No máximo `max_simultaneas` tarefas rodam ao mesmo tempo, e cada sessão tem
+# no máximo `limite_por_sessao` delas rodando; a próxima tarefa é sempre da
+# sessão com menos tarefas rodando, para que um lote enorme não segure a fila
+# dos demais usuários. Os processos de análise são divididos entre as tarefas
+# que rodam ao mesmo tempo.
+# Várias filas podem abrir o mesmo banco (outros processos do servidor): cada
+# tarefa é pega por uma única fila, que troca a situação "Na fila" por "Em
+# andamento" de forma atômica, e só tarefas sem sinal de vida (veja
+# TEMPO_SEM_PULSO) voltam para a fila. O cancelamento também passa pelo banco.
+class FilaTarefas:
+    def __init__(self, diretorio=DIRETORIO_CACHE_PADRAO, max_simultaneas=MAX_SIMULTANEAS_PADRAO,
+                 limite_por_sessao=LIMITE_POR_SESSAO_PADRAO):
+        self.diretorio = os.path.join(diretorio, "tarefas")
+        os.makedirs(self.diretorio, exist_ok=True)
+        self.max_simultaneas = max_simultaneas
+        self.limite_por_sessao = limite_por_sessao
+        self.trava = threading.RLock()
+        # Identifica as tarefas rodadas por esta fila
+        self.dono = uuid.uuid4().hex
+        self.conexao = sqlite3.connect(os.path.join(diretorio, "tarefas.sqlite3"), check_same_thread=False)
+        self.conexao.execute(
+            "CREATE TABLE IF NOT EXISTS tarefas ("
+            " id TEXT PRIMARY KEY,"
+            " sessao TEXT NOT NULL,"
+            " situacao TEXT NOT NULL,"
+            " criada REAL NOT NULL,"
+            " iniciada REAL,"
+            " terminada REAL,"
+            " total INTEGER,"
+            " processados INTEGER NOT NULL DEFAULT 0,"
+            " envios TEXT NOT NULL,"
+            " palavras TEXT NOT NULL,"
+            " opcoes TEXT NOT NULL,"
+            " parametros TEXT NOT NULL,"
+            " estatisticas TEXT,"
+            " erro TEXT)")
+        colunas = {linha[1] for linha in self.conexao.execute("PRAGMA table_info(tarefas)")}
+        for coluna, tipo in _COLUNAS_NOVAS.items():
+            if coluna not in colunas:
+                self.conexao.execute(f"ALTER TABLE tarefas ADD COLUMN {coluna} {tipo}")
+        self.conexao.execute(
+            "CREATE TABLE IF NOT EXISTS resultados ("
+            " tarefa TEXT NOT NULL,"
+            " indice INTEGER NOT NULL,"
+            " caminho TEXT NOT NULL,"
+            " resultado TEXT,"
+            " erro TEXT,"
+            " diagnostico TEXT,"
+            " PRIMARY KEY (tarefa, indice))")
+
+        # Só o processo principal retoma e agenda tarefas, senão a mesma tarefa
+        # rodaria duas vezes: um processo de análise ("spawn") que chegue a
+        # criar a fila, por exemplo ao importar de novo um script principal
+        # que a abra fora de `if __name__ == "__main__"`, não mexe nela.
+        if multiprocessing.current_process().name != "MainProcess":
+            return
+        with self.trava:
+            self._apagar_antigas()
+            self._retomar_abandonadas()
+            self._agendar()
+        threading.Thread(target=self._pulsar, daemon=True, name="fila-pulso").start()
+
+    # Cria uma tarefa com os arquivos enviados (PDFs ou ZIPs) e devolve o seu
+    # id. `arquivos` é uma sequência de tuplas (nome, conteúdo), em que o
+    # conteúdo são os bytes ou um arquivo aberto em modo binário (como os
+    # UploadedFile do Streamlit), copiado para o disco em blocos, um arquivo
+    # de cada vez. `parametros` completa PARAMETROS_PADRAO.
+    def enviar(self, sessao, arquivos, palavras_chave_adicionais, opcoes, parametros=None):
+        tarefa_id = uuid.uuid4().hex
+        pasta = os.path.join(self.diretorio, tarefa_id)
+        envios = []
+        for posicao, (nome, conteudo) in enumerate(arquivos):
+            # Uma subpasta por arquivo: nomes repetidos não se sobrescrevem
+            caminho = os.path.join(pasta, f"{posicao:05d}", os.path.basename(nome))
+            os.makedirs(os.path.dirname(caminho))
+            with open(caminho, "wb") as arquivo:
+                if isinstance(conteudo, (bytes, bytearray, memoryview)):
+                    arquivo.write(conteudo)
+                else:
+                    conteudo.seek(0)
+                    shutil.copyfileobj(conteudo, arquivo)
+            envios.append((nome, os.path.relpath(caminho, pasta)))
+
+        with self.trava:
+            self.conexao.execute(
+                "INSERT INTO tarefas (id, sessao, situacao, criada, envios, palavras, opcoes, parametros)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (tarefa_id, sessao, TAREFA_NA_FILA, time.time(), json.dumps(envios),
+                 json.dumps(list(palavras_chave_adicionais)), json.dumps(opcoes),
+                 json.dumps({**PARAMETROS_PADRAO, **(parametros or {})})))
+            self.conexao.commit()
+            self._agendar()
+        return tarefa_id
+
+    # Dados de uma tarefa (situação, andamento, parâmetros...), ou None
+    def obter(self, tarefa_id):
+        with self.trava:
+            cursor = self.conexao.execute("SELECT * FROM tarefas WHERE id = ?", (tarefa_id,))
+            linha = cursor.fetchone()
+            if linha is None:
+                return None
+            tarefa = dict(zip([coluna[0] for coluna in cursor.description], linha))
+            tarefa['posicao_fila'] = None
+            if tarefa['situacao'] == TAREFA_NA_FILA:
+                tarefa['posicao_fila'] = self.conexao.execute(
+                    "SELECT COUNT(*) FROM tarefas WHERE situacao = ? AND criada <= ?",
+                    (TAREFA_NA_FILA, tarefa['criada'])).fetchone()[0]
+        for campo in ("envios", "palavras", "opcoes", "parametros", "estatisticas"):
+            if tarefa[campo] is not None:
+                tarefa[campo] = json.loads(tarefa[campo])
+        tarefa['pasta'] = os.path.join(self.diretorio, tarefa_id)
+        return tarefa
+
+    # Resultados já guardados de uma tarefa, na ordem dos arquivos: lista de
+    # tuplas (indice, caminho, resultado, erro, diagnostico)
+    def resultados(self, tarefa_id):
+        with self.trava:
+            linhas = self.conexao.execute(
+                "SELECT indice, caminho, resultado, erro, diagnostico FROM resultados"
+                " WHERE tarefa = ? ORDER BY indice", (tarefa_id,)).fetchall()
+        return [(indice, caminho, resultado and json.loads(resultado), erro, diagnostico and json.loads(diagnostico))
+                for indice, caminho, resultado, erro, diagnostico in linhas]
+
+    # Cancela uma tarefa: na fila, sai dela; em andamento, a fila que a roda
+    # (desta ou de outra) para no próximo arquivo. Com a marca gravada antes,
+    # nenhuma fila pega a tarefa entre as duas atualizações.
+    def cancelar(self, tarefa_id):
+        with self.trava:
+            self.conexao.execute("UPDATE tarefas SET cancelar = 1 WHERE id = ? AND situacao IN (?, ?)",
+                                 (tarefa_id, *TAREFAS_ATIVAS))
+            self.conexao.commit()
+            cursor = self.conexao.execute(
+                "UPDATE tarefas SET situacao = ?, terminada = ? WHERE id = ? AND situacao = ?",
+                (TAREFA_CANCELADA, time.time(), tarefa_id, TAREFA_NA_FILA))
+            self.conexao.commit()
+            if cursor.rowcount:
+                self._liberar(tarefa_id)
+
+    # Quantidade de tarefas na fila e em andamento
+    def estatisticas(self):
+        with self.trava:
+            contagens = dict(self.conexao.execute(
+                "SELECT situacao, COUNT(*) FROM tarefas GROUP BY situacao").fetchall())
+        return {"na_fila": contagens.get(TAREFA_NA_FILA, 0), "em_andamento": contagens.get(TAREFA_EM_ANDAMENTO, 0)}
+
+    # Renova o sinal de vida das tarefas desta fila e retoma as abandonadas
+    # pelas demais (em uma thread própria, enquanto o processo existir)
+    def _pulsar(self):
+        while True:
+            time.sleep(INTERVALO_PULSO)
+            try:
+                with self.trava:
+                    self.conexao.execute("UPDATE tarefas SET pulso = ? WHERE dono = ? AND situacao = ?",
+                                         (time.time(), self.dono, TAREFA_EM_ANDAMENTO))
+                    self.conexao.commit()
+                    self._retomar_abandonadas()
+                    self._agendar()
+            except sqlite3.Error:
+                # Banco ocupado por outro processo: tenta no próximo intervalo
+                pass
+
+    # Tarefas em andamento sem sinal de vida (a fila que as rodava parou) voltam
+    # para a fila e continuam de onde pararam; as que tinham sido canceladas
+    # terminam como canceladas
+    def _retomar_abandonadas(self):
+        agora = time.time()
+        self.conexao.execute(
+            "UPDATE tarefas SET dono = NULL,"
+            " situacao = CASE WHEN cancelar THEN ? ELSE ? END,"
+            " terminada = CASE WHEN cancelar THEN ? ELSE terminada END"
+            " WHERE situacao = ? AND (pulso IS NULL OR pulso < ?)",
+            (TAREFA_CANCELADA, TAREFA_NA_FILA, agora, TAREFA_EM_ANDAMENTO, agora - TEMPO_SEM_PULSO))
+        self.conexao.commit()
+
+    # Inicia as tarefas da fila que cabem nos limites: a cada vaga, a tarefa
+    # mais antiga da sessão com menos tarefas rodando
+    def _agendar(self):
+        rodando = dict(self.conexao.execute(
+            "SELECT sessao, COUNT(*) FROM tarefas WHERE situacao = ? GROUP BY sessao",
+            (TAREFA_EM_ANDAMENTO,)).fetchall())
+        na_fila = self.conexao.execute(
+            "SELECT id, sessao FROM tarefas WHERE situacao = ? ORDER BY criada", (TAREFA_NA_FILA,)).fetchall()
+
+        while sum(rodando.values()) < self.max_simultaneas:
+            candidatas = [(rodando.get(sessao, 0), ordem, tarefa_id, sessao)
+                          for ordem, (tarefa_id, sessao) in enumerate(na_fila)
+                          if rodando.get(sessao, 0) < self.limite_por_sessao]
+            if not candidatas:
+                break
+            _, ordem, tarefa_id, sessao = min(candidatas)
+            del na_fila[ordem]
+
+            # Só roda a tarefa se ela ainda estiver na fila: outra fila pode tê-la pegado
+            agora = time.time()
+            cursor = self.conexao.execute(
+                "UPDATE tarefas SET situacao = ?, iniciada = COALESCE(iniciada, ?), dono = ?, pulso = ?"
+                " WHERE id = ? AND situacao = ? AND cancelar = 0",
+                (TAREFA_EM_ANDAMENTO, agora, self.dono, agora, tarefa_id, TAREFA_NA_FILA))
+            self.conexao.commit()
+            if cursor.rowcount != 1:
+                continue
+            rodando[sessao] = rodando.get(sessao, 0) + 1
+            threading.Thread(target=self._executar, args=(tarefa_id,), daemon=True,
+                             name=f"tarefa-{tarefa_id[:8]}").start()
+
+    # Roda uma tarefa (em uma thread própria), guardando cada resultado
+    def _executar(self, tarefa_id):
+        tarefa = self.obter(tarefa_id)
+        parametros = tarefa['parametros']
+        situacao, erro = TAREFA_CONCLUIDA, None
+        try:
+            with ExitStack() as pilha:
+                envios = [(nome, os.path.join(tarefa['pasta'], caminho)) for nome, caminho in tarefa['envios']]
+                entradas = entradas_envios(pilha, envios)
+
+                # Continua de onde parou: arquivos com resultado guardado ficam de fora
+                with self.trava:
+                    self.conexao.execute("UPDATE tarefas SET total = ? WHERE id = ?", (len(entradas), tarefa_id))
+                    self.conexao.commit()
+                    feitos = {indice for (indice,) in self.conexao.execute(
+                        "SELECT indice FROM resultados WHERE tarefa = ?", (tarefa_id,))}
+                pendentes = [indice for indice in range(len(entradas)) if indice not in feitos]
+                arquivos = [(os.path.basename(entradas[indice][0]), entradas[indice][1]) for indice in pendentes]
+
+                cache = armazem_textos = None
+                if parametros['usar_cache']:
+                    cache = CacheResultados(parametros['diretorio_cache'], parametros['tamanho_cache'])
+                    pilha.callback(cache.fechar)
+                if parametros['usar_textos']:
+                    armazem_textos = ArmazemTextos(parametros['diretorio_cache'], parametros['tamanho_cache'])
+                    pilha.callback(armazem_textos.fechar)
+
+                # Sozinha, a tarefa usa os processos pedidos; com outras rodando
+                # (nesta ou em outra fila), os núcleos são divididos entre elas.
+                # A quantidade usada fica na tarefa, para a interface mostrar.
+                perfil = parametros['perfil']
+                num_processos = parametros['num_processos'] or numero_processos_padrao()
+                with self.trava:
+                    rodando = self.conexao.execute("SELECT COUNT(*) FROM tarefas WHERE situacao = ?",
+                                                   (TAREFA_EM_ANDAMENTO,)).fetchone()[0]
+                if rodando > 1:
+                    num_processos = max(1, min(num_processos, numero_processos_padrao() // rodando))
+                num_processos = 1 if perfil else max(1, min(num_processos, len(arquivos)))
+                with self.trava:
+                    self.conexao.execute("UPDATE tarefas SET processos = ? WHERE id = ?", (num_processos, tarefa_id))
+                    self.conexao.commit()
+                pilha.enter_context(perfilar(os.path.join(tarefa['pasta'], "analise.prof")) if perfil
+                                    else nullcontext())
+
+                arquivo_regras = parametros.get('arquivo_regras')
+                regras = carregar_regras(arquivo_regras) if arquivo_regras else REGRAS_PADRAO
+
+                # Matriz de presença das estatísticas, preenchida à medida que
+                # os resultados chegam (com os já guardados, ao continuar)
+                matriz = MatrizPresenca(len(entradas), tarefa['palavras'], regras)
+                for indice, caminho, resultado, _, _ in self.resultados(tarefa_id):
+                    if resultado is not None:
+                        matriz.adicionar(indice, caminho, resultado)
+
+                diagnosticos = {}
+                lote = analisar_lote(arquivos, tarefa['palavras'], tarefa['opcoes'], num_processos, cache,
+                                     armazem_textos, parametros['memoria_maxima'], diagnosticos,
+                                     None if perfil else parametros['tempo_limite'],
+                                     None if perfil else parametros['memoria_limite'], regras)
+                pilha.callback(lote.close)
+                for indice, _, resultado, erro_arquivo in lote:
+                    original = pendentes[indice]
+                    if resultado is not None:
+                        matriz.adicionar(original, entradas[original][0], resultado)
+                    self._guardar_resultado(tarefa_id, original, entradas[original][0], resultado, erro_arquivo,
+                                            diagnosticos.get(indice))
+                    if self._cancelada(tarefa_id):
+                        situacao = TAREFA_CANCELADA
+                        break
+
+                estatisticas = {"resumo": resumir_matriz(matriz.matriz())}
+                if cache is not None:
+                    estatisticas.update({"acertos_cache": cache.acertos, "falhas_cache": cache.falhas,
+                                         **cache.estatisticas()})
+                self._guardar_estatisticas(tarefa_id, estatisticas)
+        except Exception as e:
+            situacao, erro = TAREFA_FALHOU, str(e)
+
+        with self.trava:
+            self._terminar(tarefa_id, situacao, erro)
+
+    def _cancelada(self, tarefa_id):
+        with self.trava:
+            return bool(self.conexao.execute("SELECT cancelar FROM tarefas WHERE id = ?", (tarefa_id,)).fetchone()[0])
+
+    def _guardar_resultado(self, tarefa_id, indice, caminho, resultado, erro, diagnostico):
+        with self.trava:
+            self.conexao.execute(
+                "INSERT OR REPLACE INTO resultados (tarefa, indice, caminho, resultado, erro, diagnostico)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (tarefa_id, indice, caminho, resultado and json.dumps(resultado, ensure_ascii=False), erro,
+                 diagnostico and json.dumps(diagnostico)))
+            self.conexao.execute("UPDATE tarefas SET processados = (SELECT COUNT(*) FROM resultados WHERE tarefa = ?)"
+                                 " WHERE id = ?", (tarefa_id, tarefa_id))
+            self.conexao.commit()
+
+    def _guardar_estatisticas(self, tarefa_id, estatisticas):
+        with self.trava:
+            self.conexao.execute("UPDATE tarefas SET estatisticas = ? WHERE id = ?",
+                                 (json.dumps(estatisticas), tarefa_id))
+            self.conexao.commit()
+
+    # Marca a tarefa como terminada e a libera (veja _liberar)
+    def _terminar(self, tarefa_id, situacao, erro=None):
+        self.conexao.execute("UPDATE tarefas SET situacao = ?, terminada = ?, erro = ? WHERE id = ?",
+                             (situacao, time.time(), erro, tarefa_id))
+        self.conexao.commit()
+        self._liberar(tarefa_id)
+
+    # Apaga os arquivos enviados de uma tarefa terminada (o perfil, se houver,
+    # fica) e libera a vaga para a próxima da fila
+    def _liberar(self, tarefa_id):
+        pasta = os.path.join(self.diretorio, tarefa_id)
+        if os.path.isdir(pasta):
+            for nome in os.listdir(pasta):
+                if nome != "analise.prof":
+                    shutil.rmtree(os.path.join(pasta, nome), ignore_errors=True)
+        self._agendar()
+
+    def _apagar_antigas(self):
+        limite = time.time() - DIAS_GUARDAR_TAREFAS * 24 * 60 * 60
+        antigas = [(tarefa_id,) for (tarefa_id,) in self.conexao.execute(
+            "SELECT id FROM tarefas WHERE terminada IS NOT NULL AND terminada < ?", (limite,))]
+        self.conexao.executemany("DELETE FROM resultados WHERE tarefa = ?", antigas)
+        self.conexao.executemany("DELETE FROM tarefas WHERE id = ?", antigas)
+        for (tarefa_id,) in antigas:
+            shutil.rmtree(os.path.join(self.diretorio, tarefa_id), ignore_errors=True)
@@ -0,0 +1,103 @@
+import os
+import sqlite3
+import time
+import zlib
+
+from .cache import DIRETORIO_CACHE_PADRAO, TAMANHO_MAXIMO_CACHE_PADRAO
+
+
+# Armazém persistente do texto extraído de cada página, comprimido com zlib.
+# A extração não depende das palavras-chave nem das opções, por isso o texto
+# é guardado pelo hash do arquivo, pelo modo de extração (página inteira ou
+# região do carimbo) e pelo índice da página: ao mudar uma palavra-chave, a
+# reanálise refaz só a busca, sem abrir o PDF.
+# O limite de tamanho é aplicado por arquivo, removendo primeiro os usados há
+# mais tempo (LRU), como no cache de resultados.
+class ArmazemTextos:
+    def __init__(self, diretorio=DIRETORIO_CACHE_PADRAO, tamanho_maximo=TAMANHO_MAXIMO_CACHE_PADRAO):
+        os.makedirs(diretorio, exist_ok=True)
+        self.caminho = os.path.join(diretorio, "textos.sqlite3")
+        self.tamanho_maximo = tamanho_maximo
+        self.conexao = sqlite3.connect(self.caminho)
+        self.conexao.execute(
+            "CREATE TABLE IF NOT EXISTS arquivos ("
+            " chave TEXT PRIMARY KEY,"
+            " num_paginas INTEGER NOT NULL,"
+            " tamanho INTEGER NOT NULL,"
+            " ultimo_acesso REAL NOT NULL)")
+        self.conexao.execute(
+            "CREATE TABLE IF NOT EXISTS paginas ("
+            " chave TEXT NOT NULL,"
+            " pagina INTEGER NOT NULL,"
+            " texto BLOB NOT NULL,"
+            " PRIMARY KEY (chave, pagina))")
+        self._remover_excedente()
+        self.conexao.commit()
+
+    @staticmethod
+    def chave(hash_arquivo, modo):
+        return f"{hash_arquivo}:{modo}"
+
+    # Devolve a lista com o texto de cada página (None nas páginas que não
+    # foram extraídas), ou None se o arquivo não está no armazém
+    def obter(self, chave):
+        linha = self.conexao.execute(
+            "SELECT num_paginas FROM arquivos WHERE chave = ?", (chave,)).fetchone()
+        if linha is None:
+            return None
+
+        textos = [None] * linha[0]
+        for pagina, texto in self.conexao.execute(
+                "SELECT pagina, texto FROM paginas WHERE chave = ?", (chave,)):
+            textos[pagina] = zlib.decompress(texto).decode("utf-8")
+
+        self.conexao.execute(
+            "UPDATE arquivos SET ultimo_acesso = ? WHERE chave = ?", (time.time(), chave))
+        self.conexao.commit()
+        return textos
+
+    # Guarda o texto das páginas de um arquivo; páginas None (não extraídas
+    # por causa da parada antecipada) ficam de fora
+    def guardar(self, chave, textos):
+        comprimidos = [(pagina, zlib.compress(texto.encode("utf-8")))
+                       for pagina, texto in enumerate(textos) if texto is not None]
+        self.conexao.execute("DELETE FROM paginas WHERE chave = ?", (chave,))
+        self.conexao.executemany(
+            "INSERT INTO paginas (chave, pagina, texto) VALUES (?, ?, ?)",
+            [(chave, pagina, texto) for pagina, texto in comprimidos])
+        self.conexao.execute(
+            "INSERT OR REPLACE INTO arquivos (chave, num_paginas, tamanho, ultimo_acesso) VALUES (?, ?, ?, ?)",
+            (chave, len(textos), sum(len(texto) for _, texto in comprimidos), time.time()))
+        self._remover_excedente()
+        self.conexao.commit()
+
+    def invalidar(self):
+        self.conexao.execute("DELETE FROM paginas")
+        self.conexao.execute("DELETE FROM arquivos")
+        self.conexao.commit()
+        self.conexao.execute("VACUUM")
+
+    # Quantidade de arquivos e páginas guardados e bytes ocupados (comprimidos)
+    def estatisticas(self):
+        arquivos, tamanho = self.conexao.execute(
+            "SELECT COUNT(*), COALESCE(SUM(tamanho), 0) FROM arquivos").fetchone()
+        paginas = self.conexao.execute("SELECT COUNT(*) FROM paginas").fetchone()[0]
+        return {"arquivos": arquivos, "paginas": paginas, "tamanho": tamanho}
+
+    def fechar(self):
+        self.conexao.close()
+
+    def _remover_excedente(self):
+        total = self.conexao.execute("SELECT COALESCE(SUM(tamanho), 0) FROM arquivos").fetchone()[0]
+        if total <= self.tamanho_maximo:
+            return
+
+        remover = []
+        for chave, tamanho in self.conexao.execute(
+                "SELECT chave, tamanho FROM arquivos ORDER BY ultimo_acesso"):
+            if total <= self.tamanho_maximo:
+                break
+            remover.append((chave,))
+            total -= tamanho
+        self.conexao.executemany("DELETE FROM paginas WHERE chave = ?", remover)
+        self.conexao.executemany("DELETE FROM arquivos WHERE chave = ?", remover)